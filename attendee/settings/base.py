@@ -205,4 +205,6 @@ STORAGES = {
 }
 AWS_S3_SIGNATURE_VERSION = "s3v4"
 AWS_RECORDING_STORAGE_BUCKET_NAME = os.getenv("AWS_RECORDING_STORAGE_BUCKET_NAME")
+# If set, utterance audio is stored in this directory instead of the recording storage bucket
+UTTERANCE_AUDIO_STORAGE_DIRECTORY = os.getenv("UTTERANCE_AUDIO_STORAGE_DIRECTORY")
 CHARGE_CREDITS_FOR_BOTS = os.getenv("CHARGE_CREDITS_FOR_BOTS", "false") == "true"
@@ -1,4 +1,5 @@
 import os
+import tempfile
 
 from .base import *
 
@@ -16,6 +17,9 @@ DATABASES = {
     }
 }
 
+# Keep utterance audio on the local filesystem, so the tests don't need S3
+UTTERANCE_AUDIO_STORAGE_DIRECTORY = os.path.join(tempfile.gettempdir(), "attendee_test_utterance_audio")
+
 
 # Log more stuff in development
 LOGGING = {
@@ -0,0 +1,105 @@
+import io
+
+import av
+import numpy as np
+
+# Encodes and decodes audio in process with the FFmpeg libraries bundled with PyAV, instead of spawning an ffmpeg
+# process for every conversion like pydub does. Resampling is done by the encoder or decoder in the same pass.
+
+# Codec and container for each format we encode
+ENCODERS = {
+    "mp3": ("libmp3lame", "mp3"),
+    "flac": ("flac", "flac"),
+    "opus": ("libopus", "ogg"),
+}
+
+# Packed sample formats for each sample width in bytes, and the numpy dtype of their samples
+SAMPLE_FORMATS = {
+    1: ("u8", np.uint8),
+    2: ("s16", np.int16),
+    4: ("s32", np.int32),
+}
+
+CHANNEL_LAYOUTS = {
+    1: "mono",
+    2: "stereo",
+}
+
+
+def parse_bitrate(bitrate):
+    # Bitrates are given the way ffmpeg takes them, like "128k"
+    if isinstance(bitrate, str) and bitrate.lower().endswith("k"):
+        return int(float(bitrate[:-1]) * 1000)
+    return int(bitrate)
+
+
+def pcm_frame(pcm_data, sample_rate, channels, sample_width):
+    sample_format, dtype = SAMPLE_FORMATS[sample_width]
+    samples = np.frombuffer(pcm_data, dtype=dtype)
+    # Packed formats hold interleaved samples for all channels in a single plane
+    frame = av.AudioFrame.from_ndarray(samples.reshape(1, -1), format=sample_format, layout=CHANNEL_LAYOUTS[channels])
+    frame.sample_rate = sample_rate
+    return frame
+
+
+def encode_pcm(pcm_data, *, format, sample_rate, channels=1, sample_width=2, output_sample_rate=None, bitrate=None) -> bytes:
+    """
+    Encodes raw PCM audio to one of the formats in ENCODERS, resampling it to output_sample_rate on the way.
+    """
+    codec_name, container_format = ENCODERS[format]
+    output_sample_rate = output_sample_rate or sample_rate
+
+    buffer = io.BytesIO()
+    with av.open(buffer, mode="w", format=container_format) as container:
+        stream = container.add_stream(codec_name, rate=output_sample_rate)
+        stream.codec_context.layout = CHANNEL_LAYOUTS[channels]
+        if format == "flac":
+            # Keep the sample width, so the PCM can be recovered exactly
+            stream.codec_context.format = SAMPLE_FORMATS[sample_width][0]
+        if bitrate is not None:
+            stream.codec_context.bit_rate = parse_bitrate(bitrate)
+
+        if pcm_data:
+            # The encoder converts the frame to its own sample format, rate and frame size
+            for packet in stream.encode(pcm_frame(pcm_data, sample_rate, channels, sample_width)):
+                container.mux(packet)
+        for packet in stream.encode(None):
+            container.mux(packet)
+
+    return buffer.getvalue()
+
+
+def decode_to_pcm(source, *, format=None, sample_rate=None, channels=None, sample_width=2) -> bytes:
+    """
+    Decodes audio from bytes or a file-like object to raw PCM. The sample rate and channels default to the ones the
+    audio was encoded with, otherwise the audio is resampled as it is decoded.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+
+    pcm_chunks = []
+    with av.open(source, mode="r", format=format) as container:
+        stream = container.streams.audio[0]
+        resampler = av.AudioResampler(
+            format=SAMPLE_FORMATS[sample_width][0],
+            layout=CHANNEL_LAYOUTS[channels] if channels else stream.codec_context.layout,
+            rate=sample_rate or stream.codec_context.sample_rate,
+        )
+        for frame in container.decode(stream):
+            for resampled_frame in resampler.resample(frame):
+                pcm_chunks.append(resampled_frame.to_ndarray().tobytes())
+        for resampled_frame in resampler.resample(None):
+            pcm_chunks.append(resampled_frame.to_ndarray().tobytes())
+
+    return b"".join(pcm_chunks)
+
+
+def audio_duration_ms(audio_data, *, format) -> int:
+    """
+    Returns the duration of encoded audio in milliseconds. The audio is decoded to count its samples, because the
+    packet durations in an MP3 include the encoder's padding.
+    """
+    with av.open(io.BytesIO(audio_data), mode="r", format=format) as container:
+        stream = container.streams.audio[0]
+        sample_count = sum(frame.samples for frame in container.decode(stream))
+        return round(sample_count * 1000 / stream.codec_context.sample_rate)
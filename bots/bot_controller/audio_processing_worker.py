@@ -0,0 +1,52 @@
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class AudioProcessingWorker:
+    """
+    Runs the per participant non-streaming audio pipeline (voice activity detection, utterance accumulation and
+    flushing) on its own thread, so bursts of audio and stalls on the GLib main loop don't hold each other up.
+    The audio input manager hands completed utterances to its save callback on this thread, so that callback
+    should only queue them for the main loop.
+    """
+
+    # How often to check for the silence that ends an utterance while someone is speaking
+    PENDING_AUDIO_CHECK_INTERVAL_SECONDS = 0.1
+
+    def __init__(self, *, audio_input_manager, on_error_callback):
+        self.audio_input_manager = audio_input_manager
+        self.on_error_callback = on_error_callback
+        self.wake_event = threading.Event()
+        self.stop_requested = False
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name="audio_processing_worker", daemon=True)
+        self.thread.start()
+
+    # Thread safe. Called when new audio arrives.
+    def wake(self):
+        self.wake_event.set()
+
+    def stop(self):
+        self.stop_requested = True
+        self.wake_event.set()
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join()
+
+    def run(self):
+        while not self.stop_requested:
+            timeout = self.PENDING_AUDIO_CHECK_INTERVAL_SECONDS if self.audio_input_manager.has_pending_audio() else None
+            self.wake_event.wait(timeout=timeout)
+            self.wake_event.clear()
+            if self.stop_requested:
+                return
+
+            try:
+                self.audio_input_manager.process_chunks()
+            except Exception as e:
+                logger.exception(f"Error in audio processing worker: {e}")
+                self.on_error_callback(e)
+                return
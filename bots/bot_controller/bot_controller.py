@@ -1,10 +1,12 @@
 import json
 import logging
 import os
+import queue
 import signal
 import threading
 import time
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
 
 import gi
@@ -14,6 +16,8 @@ from django.utils import timezone
 
 from bots.automatic_leave_configuration import AutomaticLeaveConfiguration
 from bots.bot_adapter import BotAdapter
+from bots.bot_heartbeat_utils import write_heartbeat_to_redis
+from bots.bot_metrics import start_metrics_server_if_configured
 from bots.bots_api_utils import BotCreationSource
 from bots.models import (
     Bot,
@@ -37,24 +41,31 @@ from bots.models import (
     RecordingFormats,
     RecordingManager,
     RecordingStates,
+    RecordingTranscriptionStates,
     RecordingTypes,
     TranscriptionProviders,
     Utterance,
-    WebhookTriggerTypes,
 )
+from bots.redis_utils import get_redis_client
 from bots.utils import meeting_type_from_url
-from bots.webhook_payloads import chat_message_webhook_payload, participant_event_webhook_payload, utterance_webhook_payload
-from bots.webhook_utils import trigger_webhook
+from bots.utterance_audio_utils import store_utterance_audio
 
 from .audio_output_manager import AudioOutputManager
+from .audio_processing_worker import AudioProcessingWorker
+from .cleanup_step_runner import CleanupStepRunner
 from .closed_caption_manager import ClosedCaptionManager
+from .database_write_buffer import DatabaseWriteBuffer
 from .file_uploader import FileUploader
 from .gstreamer_pipeline import GstreamerPipeline
+from .main_loop_scheduler import MainLoopScheduler
+from .media_trace import MediaTraceWriter
 from .per_participant_non_streaming_audio_input_manager import PerParticipantNonStreamingAudioInputManager
 from .per_participant_streaming_audio_input_manager import PerParticipantStreamingAudioInputManager
 from .pipeline_configuration import PipelineConfiguration
 from .rtmp_client import RTMPClient
 from .screen_and_audio_recorder import ScreenAndAudioRecorder
+from .utterance_audio_conditioner import UtteranceAudioConditioner
+from .utterance_termination_tracker import UtteranceTerminationTracker
 from .video_output_manager import VideoOutputManager
 
 gi.require_version("GLib", "2.0")
@@ -66,6 +77,7 @@ logger = logging.getLogger(__name__)
 class BotController:
     # Default wait time for utterance termination (5 minutes)
     UTTERANCE_TERMINATION_WAIT_TIME_SECONDS = 300
+    UTTERANCE_TERMINATION_DATABASE_RECHECK_INTERVAL_SECONDS = 30
 
     def per_participant_audio_input_manager(self):
         if self.bot_in_db.deepgram_use_streaming():
@@ -79,7 +91,7 @@ class BotController:
         if self.get_recording_transcription_provider() == TranscriptionProviders.CLOSED_CAPTION_FROM_PLATFORM:
             add_audio_chunk_callback = None
         else:
-            add_audio_chunk_callback = self.per_participant_audio_input_manager().add_chunk
+            add_audio_chunk_callback = self.trace_adapter_callback("add_audio_chunk", self.add_audio_chunk)
 
         return GoogleMeetBotAdapter(
             display_name=self.bot_in_db.name,
@@ -89,9 +101,9 @@ class BotController:
             add_video_frame_callback=None,
             wants_any_video_frames_callback=None,
             add_mixed_audio_chunk_callback=None,
-            upsert_caption_callback=self.closed_caption_manager.upsert_caption,
-            upsert_chat_message_callback=self.on_new_chat_message,
-            add_participant_event_callback=self.add_participant_event,
+            upsert_caption_callback=self.trace_adapter_callback("upsert_caption", self.upsert_caption),
+            upsert_chat_message_callback=self.trace_adapter_callback("upsert_chat_message", self.on_new_chat_message),
+            add_participant_event_callback=self.trace_adapter_callback("add_participant_event", self.add_participant_event),
             automatic_leave_configuration=self.automatic_leave_configuration,
             add_encoded_mp4_chunk_callback=None,
             recording_view=self.bot_in_db.recording_view(),
@@ -115,9 +127,9 @@ class BotController:
             add_video_frame_callback=None,
             wants_any_video_frames_callback=None,
             add_mixed_audio_chunk_callback=None,
-            upsert_caption_callback=self.closed_caption_manager.upsert_caption,
-            upsert_chat_message_callback=self.on_new_chat_message,
-            add_participant_event_callback=self.add_participant_event,
+            upsert_caption_callback=self.trace_adapter_callback("upsert_caption", self.upsert_caption),
+            upsert_chat_message_callback=self.trace_adapter_callback("upsert_chat_message", self.on_new_chat_message),
+            add_participant_event_callback=self.trace_adapter_callback("add_participant_event", self.add_participant_event),
             automatic_leave_configuration=self.automatic_leave_configuration,
             add_encoded_mp4_chunk_callback=None,
             recording_view=self.bot_in_db.recording_view(),
@@ -140,27 +152,39 @@ class BotController:
         if not zoom_oauth_credentials:
             raise Exception("Zoom OAuth credentials data not found")
 
-        add_audio_chunk_callback = self.per_participant_audio_input_manager().add_chunk
-
         return ZoomBotAdapter(
             use_one_way_audio=self.pipeline_configuration.transcribe_audio,
             use_mixed_audio=self.pipeline_configuration.record_audio or self.pipeline_configuration.rtmp_stream_audio,
             use_video=self.pipeline_configuration.record_video or self.pipeline_configuration.rtmp_stream_video,
             display_name=self.bot_in_db.name,
             send_message_callback=self.on_message_from_adapter,
-            add_audio_chunk_callback=add_audio_chunk_callback,
+            add_audio_chunk_callback=self.trace_adapter_callback("add_audio_chunk", self.add_audio_chunk),
             zoom_client_id=zoom_oauth_credentials["client_id"],
             zoom_client_secret=zoom_oauth_credentials["client_secret"],
             meeting_url=self.bot_in_db.meeting_url,
-            add_video_frame_callback=self.gstreamer_pipeline.on_new_video_frame,
+            add_video_frame_callback=self.trace_adapter_callback("add_video_frame", self.gstreamer_pipeline.on_new_video_frame),
             wants_any_video_frames_callback=self.gstreamer_pipeline.wants_any_video_frames,
-            add_mixed_audio_chunk_callback=self.gstreamer_pipeline.on_mixed_audio_raw_data_received_callback,
-            upsert_chat_message_callback=self.on_new_chat_message,
-            add_participant_event_callback=self.add_participant_event,
+            add_mixed_audio_chunk_callback=self.trace_adapter_callback("add_mixed_audio_chunk", self.gstreamer_pipeline.on_mixed_audio_raw_data_received_callback),
+            upsert_chat_message_callback=self.trace_adapter_callback("upsert_chat_message", self.on_new_chat_message),
+            add_participant_event_callback=self.trace_adapter_callback("add_participant_event", self.add_participant_event),
             automatic_leave_configuration=self.automatic_leave_configuration,
             video_frame_size=self.bot_in_db.recording_dimensions(),
         )
 
+    # When media tracing is enabled, everything the adapter passes to this callback is also written to the trace
+    def trace_adapter_callback(self, callback_name, callback):
+        if self.media_trace_writer is None:
+            return callback
+        return self.media_trace_writer.wrap_callback(callback_name, callback)
+
+    def create_media_trace_writer(self):
+        media_trace_directory = os.getenv("BOT_MEDIA_TRACE_DIRECTORY")
+        if not media_trace_directory:
+            return None
+        media_trace_file_path = os.path.join(media_trace_directory, f"{self.bot_in_db.object_id}.trace")
+        logger.info(f"Writing media trace to {media_trace_file_path}")
+        return MediaTraceWriter(media_trace_file_path)
+
     def get_meeting_type(self):
         meeting_type = meeting_type_from_url(self.bot_in_db.meeting_url)
         if meeting_type is None:
@@ -215,12 +239,17 @@ class BotController:
         recording.first_buffer_timestamp_ms = self.get_first_buffer_timestamp_ms()
         recording.save()
 
+    # The default recording row is created with the bot and the fields we read from it never change, so we only fetch it once
+    def get_default_recording(self):
+        if self.default_recording is None:
+            self.default_recording = Recording.objects.get(bot=self.bot_in_db, is_default_recording=True)
+        return self.default_recording
+
     def get_recording_transcription_provider(self):
-        recording = Recording.objects.get(bot=self.bot_in_db, is_default_recording=True)
-        return recording.transcription_provider
+        return self.get_default_recording().transcription_provider
 
     def get_recording_filename(self):
-        recording = Recording.objects.get(bot=self.bot_in_db, is_default_recording=True)
+        recording = self.get_default_recording()
         return f"{self.bot_in_db.object_id}-{recording.object_id}.{self.bot_in_db.recording_format()}"
 
     def on_rtmp_connection_failed(self):
@@ -264,65 +293,112 @@ class BotController:
         termination_thread = threading.Thread(target=terminate_worker, daemon=True)
         termination_thread.start()
 
+        cleanup_step_runner = CleanupStepRunner()
+
+        if self.main_loop_scheduler:
+            self.main_loop_scheduler.stop()
+
+        if self.audio_processing_worker:
+            self.audio_processing_worker.stop()
+
+        # These steps interact with the meeting and the main loop, so they run in order, before anything else
         if self.gstreamer_pipeline:
             logger.info("Telling gstreamer pipeline to cleanup...")
-            self.gstreamer_pipeline.cleanup()
+            cleanup_step_runner.run_step_now("gstreamer_pipeline_cleanup", self.gstreamer_pipeline.cleanup)
 
         if self.rtmp_client:
             logger.info("Telling rtmp client to cleanup...")
-            self.rtmp_client.stop()
+            cleanup_step_runner.run_step_now("rtmp_client_stop", self.rtmp_client.stop)
 
         if self.adapter:
             logger.info("Telling adapter to leave meeting...")
-            self.adapter.leave()
+            cleanup_step_runner.run_step_now("adapter_leave", self.adapter.leave)
             logger.info("Telling adapter to cleanup...")
-            self.adapter.cleanup()
+            cleanup_step_runner.run_step_now("adapter_cleanup", self.adapter.cleanup)
+
+        if self.media_trace_writer:
+            self.media_trace_writer.close()
+
+        # Closing the streaming connections makes Deepgram send the final results for the audio it has
+        if self.per_participant_streaming_audio_input_manager:
+            try:
+                cleanup_step_runner.run_step_now("streaming_transcriber_pool_close", self.per_participant_streaming_audio_input_manager.close)
+            except Exception as e:
+                logger.info(f"Error closing streaming transcriber connections during cleanup: {e}")
+
+        # The scheduler is stopped, so utterances that the audio processing worker and the streaming transcribers
+        # already finished have to be saved here, once their audio has been uploaded
+        try:
+            cleanup_step_runner.run_step_now("wait_for_utterance_audio_uploads", self.wait_for_utterance_audio_uploads)
+            cleanup_step_runner.run_step_now("save_completed_audio_utterances", self.save_completed_audio_utterances)
+        except Exception as e:
+            logger.info(f"Error saving completed audio utterances during cleanup: {e}")
+
+        # Persist anything that is still waiting in the write buffer. This runs after the adapter has left, since
+        # leaving can still buffer participant events and chat messages.
+        try:
+            cleanup_step_runner.run_step_now("flush_database_writes", lambda: self.database_write_buffer.flush(final=True))
+        except Exception as e:
+            logger.info(f"Error flushing database writes during cleanup: {e}")
 
         if self.main_loop and self.main_loop.is_running():
             self.main_loop.quit()
 
+        # The rest of the steps only depend on files and database rows, so they run concurrently
+        recording_file_steps = []
         if self.screen_and_audio_recorder:
-            logger.info("Telling media recorder receiver to cleanup...")
-            self.screen_and_audio_recorder.cleanup()
+            cleanup_step_runner.add_step("screen_and_audio_recorder_cleanup", self.screen_and_audio_recorder.cleanup)
+            recording_file_steps.append("screen_and_audio_recorder_cleanup")
 
         if self.get_recording_file_location():
-            logger.info("Telling file uploader to upload recording file...")
-            file_uploader = FileUploader(
-                os.environ.get("AWS_RECORDING_STORAGE_BUCKET_NAME"),
-                self.get_recording_filename(),
-            )
-            file_uploader.upload_file(self.get_recording_file_location())
-            file_uploader.wait_for_upload()
-            logger.info("File uploader finished uploading file")
-            file_uploader.delete_file(self.get_recording_file_location())
-            logger.info("File uploader deleted file from local filesystem")
-            self.recording_file_saved(file_uploader.key)
+            cleanup_step_runner.add_step("upload_recording_file", self.upload_recording_file, depends_on=recording_file_steps)
 
         if self.bot_in_db.create_debug_recording():
-            self.save_debug_recording()
+            cleanup_step_runner.add_step("save_debug_recording", self.save_debug_recording)
+
+        should_complete_post_processing = self.bot_in_db.state == BotStates.POST_PROCESSING
+        if should_complete_post_processing:
+            cleanup_step_runner.add_step("wait_until_all_utterances_are_terminated", self.wait_until_all_utterances_are_terminated)
 
-        if self.bot_in_db.state == BotStates.POST_PROCESSING:
-            self.wait_until_all_utterances_are_terminated()
-            BotEventManager.create_event(bot=self.bot_in_db, event_type=BotEventTypes.POST_PROCESSING_COMPLETED)
+        cleanup_step_runner.run()
+
+        if should_complete_post_processing:
+            BotEventManager.create_event(
+                bot=self.bot_in_db,
+                event_type=BotEventTypes.POST_PROCESSING_COMPLETED,
+                event_metadata={
+                    "cleanup_step_durations_seconds": cleanup_step_runner.step_durations_seconds,
+                    "audio_ingest_queue_stats": self.per_participant_non_streaming_audio_input_manager.ingest_queue_stats(),
+                },
+            )
 
         normal_quitting_process_worked = True
 
+    def upload_recording_file(self):
+        logger.info("Telling file uploader to upload recording file...")
+        file_uploader = FileUploader(
+            os.environ.get("AWS_RECORDING_STORAGE_BUCKET_NAME"),
+            self.get_recording_filename(),
+        )
+        file_uploader.upload_file(self.get_recording_file_location())
+        file_uploader.wait_for_upload()
+        logger.info("File uploader finished uploading file")
+        file_uploader.delete_file(self.get_recording_file_location())
+        logger.info("File uploader deleted file from local filesystem")
+        self.recording_file_saved(file_uploader.key)
+
     # We're going to wait until all utterances are transcribed or have failed. If there are still
     # in progress utterances, after 5 minutes, then we'll consider them failed and mark them as timed out.
     def wait_until_all_utterances_are_terminated(self):
-        default_recording = self.bot_in_db.recordings.get(is_default_recording=True)
-
-        start_time = time.time()
-        wait_time_seconds = self.UTTERANCE_TERMINATION_WAIT_TIME_SECONDS
-        while time.time() - start_time < wait_time_seconds:
-            in_progress_utterances = default_recording.utterances.filter(transcription__isnull=True, failure_data__isnull=True)
-            # If no more in progress utterances, then we're done
-            if not in_progress_utterances.exists():
-                logger.info(f"All utterances are terminated for bot {self.bot_in_db.id}")
-                return
+        default_recording = self.get_default_recording()
 
-            logger.info(f"Waiting for {len(in_progress_utterances)} utterances to terminate. It has been {time.time() - start_time} seconds. We will wait {wait_time_seconds} seconds.")
-            time.sleep(5)
+        def get_outstanding_utterance_ids():
+            return default_recording.utterances.filter(transcription__isnull=True, failure_data__isnull=True).values_list("id", flat=True)
+
+        all_utterances_terminated = self.utterance_termination_tracker.wait_until_terminated(get_outstanding_utterance_ids, timeout_seconds=self.UTTERANCE_TERMINATION_WAIT_TIME_SECONDS)
+        if all_utterances_terminated:
+            logger.info(f"All utterances are terminated for bot {self.bot_in_db.id}")
+            return
 
         logger.info(f"Timed out in post-processing waiting for utterances to terminate for bot {self.bot_in_db.id}. Transcription will be marked as failed because recording terminated.")
 
@@ -330,10 +406,38 @@ class BotController:
         self.bot_in_db = Bot.objects.get(id=bot_id)
         self.cleanup_called = False
         self.run_called = False
+        self.main_loop_scheduler = None
+
+        # Bot-local identity map for rows that are read on every utterance
+        self.default_recording = None
+        self.recording_in_progress = None
+        self.recording_in_progress_bot_state = None
+        self.participants = {}
+
+        self.database_write_buffer = DatabaseWriteBuffer(
+            bot=self.bot_in_db,
+            flush_interval_seconds=int(os.getenv("BOT_DATABASE_WRITE_BUFFER_FLUSH_INTERVAL_MS", "500")) / 1000,
+            max_buffered_records=int(os.getenv("BOT_DATABASE_WRITE_BUFFER_MAX_RECORDS", "100")),
+        )
+
+        self.last_heartbeat_timestamp = None
+
+        self.audio_processing_worker = None
+        self.per_participant_streaming_audio_input_manager = None
+        # Utterances completed by the audio processing worker, waiting to be saved on the main loop
+        self.completed_audio_utterances = queue.Queue()
+        # Compresses and uploads the audio of those utterances, so the audio processing worker only has to process audio
+        self.utterance_audio_upload_executor = ThreadPoolExecutor(max_workers=int(os.getenv("UTTERANCE_AUDIO_UPLOAD_WORKERS", "2")), thread_name_prefix="utterance_audio_upload")
+
+        self.media_trace_writer = None
+
+        self.utterance_termination_tracker = UtteranceTerminationTracker(database_recheck_interval_seconds=self.UTTERANCE_TERMINATION_DATABASE_RECHECK_INTERVAL_SECONDS)
 
         self.redis_client = None
         self.pubsub = None
         self.pubsub_channel = f"bot_{self.bot_in_db.id}"
+        # Live transcript updates from streaming transcription are published here
+        self.transcript_updates_channel = f"bot_{self.bot_in_db.id}_transcript_updates"
 
         self.automatic_leave_configuration = AutomaticLeaveConfiguration(**self.bot_in_db.automatic_leave_settings())
 
@@ -383,14 +487,13 @@ class BotController:
         return not self.should_create_gstreamer_pipeline()
 
     def connect_to_redis(self):
-        # Close both pubsub and client if they exist
+        # Close the pubsub if it exists, which disconnects its connection before handing it back to the pool.
+        # The client uses the process wide connection pool, so it is never closed.
         if self.pubsub:
             self.pubsub.close()
-        if self.redis_client:
-            self.redis_client.close()
 
-        redis_url = os.getenv("REDIS_URL") + ("?ssl_cert_reqs=none" if os.getenv("DISABLE_REDIS_SSL") else "")
-        self.redis_client = redis.from_url(redis_url)
+        if self.redis_client is None:
+            self.redis_client = get_redis_client()
         self.pubsub = self.redis_client.pubsub()
         self.pubsub.subscribe(self.pubsub_channel)
         logger.info(f"Redis connection established for bot {self.bot_in_db.id}")
@@ -409,6 +512,23 @@ class BotController:
         else:
             return 3  # seconds
 
+    # Caps the audio each speaker can have waiting for the audio processing worker, so a stalled worker can't run the bot out of memory
+    def non_streaming_audio_max_queued_bytes_per_speaker(self):
+        max_queued_seconds = int(os.getenv("BOT_AUDIO_INGEST_QUEUE_SECONDS_PER_SPEAKER", "30"))
+        return max_queued_seconds * self.get_per_participant_audio_sample_rate() * 2  # 2 bytes per sample
+
+    def non_streaming_audio_drop_policy(self):
+        return os.getenv("BOT_AUDIO_INGEST_QUEUE_DROP_POLICY", PerParticipantNonStreamingAudioInputManager.DROP_OLDEST)
+
+    # Utterances are downsampled to 16kHz and have most of their trailing silence trimmed before they are stored and
+    # transcribed. A sample rate of 0 keeps the platform's sample rate.
+    def non_streaming_audio_conditioner(self):
+        return UtteranceAudioConditioner(
+            output_sample_rate=int(os.getenv("BOT_UTTERANCE_AUDIO_SAMPLE_RATE", "16000")) or None,
+            trailing_silence_to_keep_seconds=int(os.getenv("BOT_UTTERANCE_AUDIO_TRAILING_SILENCE_MS", "300")) / 1000,
+            normalize=os.getenv("BOT_UTTERANCE_AUDIO_NORMALIZE", "false") == "true",
+        )
+
     def run(self):
         if self.run_called:
             raise Exception("Run already called, exiting")
@@ -416,23 +536,42 @@ class BotController:
 
         self.connect_to_redis()
 
+        # Serves hot path metrics for the bot, if BOT_METRICS_PORT is set
+        start_metrics_server_if_configured()
+
+        self.main_loop_scheduler = MainLoopScheduler(on_task_error_callback=self.on_main_loop_task_error)
+
         # Initialize core objects
         # Only used for adapters that can provide per-participant audio
 
+        # Runs on the audio processing worker, which hands completed utterances back to the main loop. The participant
+        # is looked up on the main loop, since adapters aren't safe to call from other threads.
         self.per_participant_non_streaming_audio_input_manager = PerParticipantNonStreamingAudioInputManager(
-            save_utterance_callback=self.save_individual_audio_utterance,
-            get_participant_callback=self.get_participant,
+            save_utterance_callback=self.on_audio_utterance_completed,
+            get_participant_callback=None,
             sample_rate=self.get_per_participant_audio_sample_rate(),
             utterance_size_limit=self.non_streaming_audio_utterance_size_limit(),
             silence_duration_limit=self.non_streaming_audio_silence_duration_limit(),
+            max_queued_bytes_per_speaker=self.non_streaming_audio_max_queued_bytes_per_speaker(),
+            drop_policy=self.non_streaming_audio_drop_policy(),
+            audio_conditioner=self.non_streaming_audio_conditioner(),
+        )
+        self.audio_processing_worker = AudioProcessingWorker(
+            audio_input_manager=self.per_participant_non_streaming_audio_input_manager,
+            on_error_callback=self.on_audio_processing_worker_error,
         )
 
         self.per_participant_streaming_audio_input_manager = PerParticipantStreamingAudioInputManager(
-            save_utterance_callback=self.save_individual_audio_utterance,
+            save_utterance_callback=self.on_streaming_utterance_completed,
+            transcript_update_callback=self.publish_transcript_update,
             get_participant_callback=self.get_participant,
             sample_rate=self.get_per_participant_audio_sample_rate(),
             transcription_provider=self.get_recording_transcription_provider(),
             bot=self.bot_in_db,
+            max_connections=int(os.getenv("BOT_STREAMING_TRANSCRIPTION_MAX_CONNECTIONS", "4")),
+            idle_timeout_seconds=int(os.getenv("BOT_STREAMING_TRANSCRIPTION_IDLE_TIMEOUT_SECONDS", "60")),
+            replay_buffer_seconds=int(os.getenv("BOT_STREAMING_TRANSCRIPTION_REPLAY_BUFFER_SECONDS", "5")),
+            prewarm_connections=os.getenv("BOT_STREAMING_TRANSCRIPTION_PREWARM_CONNECTIONS", "true") == "true",
         )
 
         # Only used for adapters that can provide closed captions
@@ -466,7 +605,10 @@ class BotController:
                 audio_only=not (self.pipeline_configuration.record_video or self.pipeline_configuration.rtmp_stream_video),
             )
 
+        self.media_trace_writer = self.create_media_trace_writer()
         self.adapter = self.get_bot_adapter()
+        if self.media_trace_writer:
+            self.adapter.get_participant = self.media_trace_writer.wrap_get_participant(self.adapter.get_participant)
 
         self.audio_output_manager = AudioOutputManager(
             currently_playing_audio_media_request_finished_callback=self.currently_playing_audio_media_request_finished,
@@ -501,6 +643,9 @@ class BotController:
             while True:
                 try:
                     message = self.pubsub.get_message(timeout=1.0)
+                    # Utterance termination notifications are needed during post-processing, after the main loop has quit, so they are handled on this thread
+                    if self.utterance_termination_tracker.handle_redis_message(message):
+                        continue
                     if message:
                         # Schedule Redis message handling in the main GLib loop
                         GLib.idle_add(lambda: self.handle_redis_message(message))
@@ -518,9 +663,18 @@ class BotController:
         redis_thread = threading.Thread(target=redis_listener, daemon=True)
         redis_thread.start()
 
-        # Add timeout just for audio processing
-        self.first_timeout_call = True
-        GLib.timeout_add(100, self.on_main_loop_timeout)
+        # Each piece of periodic work is scheduled for when it is next due, instead of all of it being polled every 100ms
+        self.main_loop_scheduler.add_task("take_initial_action", self.take_initial_action)
+        self.main_loop_scheduler.add_task("set_heartbeat", self.set_bot_heartbeat_task)
+        self.main_loop_scheduler.add_task("save_completed_audio_utterances", self.save_completed_audio_utterances_task)
+        self.audio_processing_worker.start()
+        self.main_loop_scheduler.add_task("monitor_transcription", self.monitor_transcription_task)
+        self.main_loop_scheduler.add_task("process_captions", self.process_captions_task)
+        self.main_loop_scheduler.add_task("check_auto_leave_conditions", self.check_auto_leave_conditions_task)
+        self.main_loop_scheduler.add_task("monitor_audio_output", self.monitor_audio_output_task)
+        self.main_loop_scheduler.add_task("monitor_video_output", self.monitor_video_output_task)
+        self.main_loop_scheduler.add_task("join_if_staged", self.join_if_staged_task)
+        self.main_loop_scheduler.add_task("flush_database_writes", self.flush_database_writes_task)
 
         # Add signal handlers so that when we get a SIGTERM or SIGINT, we can clean up the bot
         GLib.unix_signal_add(GLib.PRIORITY_HIGH, signal.SIGTERM, self.handle_glib_shutdown)
@@ -590,6 +744,7 @@ class BotController:
         try:
             BotMediaRequestManager.set_media_request_playing(oldest_enqueued_media_request)
             self.audio_output_manager.start_playing_audio_media_request(oldest_enqueued_media_request)
+            self.main_loop_scheduler.wake("monitor_audio_output")
         except Exception as e:
             logger.info(f"Error sending raw audio: {e}")
             BotMediaRequestManager.set_media_request_failed_to_play(oldest_enqueued_media_request)
@@ -632,6 +787,7 @@ class BotController:
         try:
             BotMediaRequestManager.set_media_request_playing(oldest_enqueued_media_request)
             self.video_output_manager.start_playing_video_media_request(oldest_enqueued_media_request)
+            self.main_loop_scheduler.wake("monitor_video_output")
         except Exception as e:
             logger.info(f"Error playing video media request: {e}")
             BotMediaRequestManager.set_media_request_failed_to_play(oldest_enqueued_media_request)
@@ -671,6 +827,8 @@ class BotController:
                 logger.info(f"Syncing bot {self.bot_in_db.object_id}")
                 self.bot_in_db.refresh_from_db()
                 self.take_action_based_on_bot_in_db()
+                # The join_at time may have changed
+                self.main_loop_scheduler.reschedule("join_if_staged")
             elif command == "sync_media_requests":
                 logger.info(f"Syncing media requests for bot {self.bot_in_db.object_id}")
                 self.bot_in_db.refresh_from_db()
@@ -719,67 +877,188 @@ class BotController:
         )
 
     def set_bot_heartbeat(self):
-        if self.bot_in_db.last_heartbeat_timestamp is None or self.bot_in_db.last_heartbeat_timestamp <= int(timezone.now().timestamp()) - 60:
-            self.bot_in_db.set_heartbeat()
-
-    def on_main_loop_timeout(self):
-        try:
-            if self.first_timeout_call:
-                logger.info("First timeout call - taking initial action")
-                self.bot_in_db.refresh_from_db()
-                self.take_action_based_on_bot_in_db()
-                self.first_timeout_call = False
-
-            # Set heartbeat
-            self.set_bot_heartbeat()
-
-            # Process audio chunks
-            self.per_participant_non_streaming_audio_input_manager.process_chunks()
-
-            # Monitor transcription
-            self.per_participant_streaming_audio_input_manager.monitor_transcription()
+        current_timestamp = int(timezone.now().timestamp())
+        if self.last_heartbeat_timestamp is not None and self.last_heartbeat_timestamp > current_timestamp - 60:
+            return
 
-            # Process captions
-            self.closed_caption_manager.process_captions()
+        # The first heartbeat goes to the database, so we know the bot launched. After that, heartbeats go to redis
+        # and are synced back to the database in bulk, so we don't keep saving the whole bot row.
+        if self.bot_in_db.first_heartbeat_timestamp is None:
+            self.bot_in_db.set_heartbeat()
+        else:
+            try:
+                write_heartbeat_to_redis(self.bot_in_db.id, current_timestamp)
+            except redis.exceptions.RedisError as e:
+                logger.warning(f"Failed to write heartbeat to redis, writing it to the database instead: {e}")
+                self.bot_in_db.set_heartbeat()
+        self.last_heartbeat_timestamp = current_timestamp
+
+    def on_main_loop_task_error(self, task_name, e):
+        logger.info(f"Error in main loop task {task_name}: {e}")
+        logger.info("Traceback:")
+        logger.info(traceback.format_exc())
+        self.cleanup()
 
-            # Check if auto-leave conditions are met
-            self.adapter.check_auto_leave_conditions()
+    # The methods below are the main loop tasks. Each one returns the number of seconds until it should run again,
+    # or None if it should only run again when woken up by new input.
 
-            # Process audio output
-            self.audio_output_manager.monitor_currently_playing_audio_media_request()
+    def take_initial_action(self):
+        logger.info("First main loop call - taking initial action")
+        self.bot_in_db.refresh_from_db()
+        self.take_action_based_on_bot_in_db()
+        return None
+
+    def set_bot_heartbeat_task(self):
+        self.set_bot_heartbeat()
+        return 10
+
+    def save_completed_audio_utterances_task(self):
+        self.save_completed_audio_utterances()
+        return None
+
+    def monitor_transcription_task(self):
+        self.per_participant_streaming_audio_input_manager.monitor_transcription()
+        return 1
+
+    def process_captions_task(self):
+        # Captions are only saved once they are final or when flushed, so there is nothing to do until a caption is upserted
+        self.closed_caption_manager.process_captions()
+        return None
+
+    def check_auto_leave_conditions_task(self):
+        self.adapter.check_auto_leave_conditions()
+        return 1
+
+    def monitor_audio_output_task(self):
+        self.audio_output_manager.monitor_currently_playing_audio_media_request()
+        if self.audio_output_manager.currently_playing_audio_media_request:
+            return 0.1
+        return None
+
+    def monitor_video_output_task(self):
+        self.video_output_manager.monitor_currently_playing_video_media_request()
+        if self.video_output_manager.currently_playing_video_media_request:
+            return 1
+        return None
+
+    def join_if_staged_task(self):
+        self.join_if_staged_and_time_to_join()
+        if self.bot_in_db.state != BotStates.STAGED:
+            return None
+        seconds_until_join = (self.bot_in_db.join_at - timedelta(seconds=self.adapter.get_staged_bot_join_delay_seconds()) - timezone.now()).total_seconds()
+        # Cap the delay so that clock adjustments can't leave the bot waiting too long
+        return min(max(seconds_until_join, 0), 60)
+
+    def add_audio_chunk(self, speaker_id, chunk_time, chunk_bytes):
+        audio_input_manager = self.per_participant_audio_input_manager()
+        audio_input_manager.add_chunk(speaker_id, chunk_time, chunk_bytes)
+        # The streaming manager sends audio as it arrives, only the non-streaming manager needs the main loop to process it
+        if audio_input_manager is self.per_participant_non_streaming_audio_input_manager:
+            self.audio_processing_worker.wake()
+
+    # Called on the audio processing worker's thread. The audio is a view into the manager's buffer, so it is copied before the upload is queued.
+    def on_audio_utterance_completed(self, utterance):
+        utterance = {**utterance, "audio_data": bytes(utterance["audio_data"])}
+        try:
+            self.utterance_audio_upload_executor.submit(self.upload_completed_audio_utterance, utterance)
+        except RuntimeError:
+            # The uploads were already waited for, so there is no other thread left to upload it
+            self.upload_completed_audio_utterance(utterance)
 
-            # Process video output
-            self.video_output_manager.monitor_currently_playing_video_media_request()
+    # Called on an upload thread. The audio is compressed and uploaded here, off the main loop and the audio processing worker, so the database row only has to hold the file name.
+    def upload_completed_audio_utterance(self, utterance):
+        try:
+            audio_file = store_utterance_audio(utterance["audio_data"], sample_rate=utterance["sample_rate"], bot_object_id=self.bot_in_db.object_id)
+        except Exception as e:
+            logger.warning(f"Failed to store utterance audio, keeping it in the database instead: {e}")
+            audio_file = None
+        self.completed_audio_utterances.put({**utterance, "audio_file": audio_file})
+        self.main_loop_scheduler.wake("save_completed_audio_utterances")
+
+    # Blocks until every queued upload has finished and its utterance is waiting to be saved. Later utterances are uploaded on the calling thread.
+    def wait_for_utterance_audio_uploads(self):
+        self.utterance_audio_upload_executor.shutdown(wait=True)
+
+    def save_completed_audio_utterances(self):
+        while True:
+            try:
+                utterance = self.completed_audio_utterances.get_nowait()
+            except queue.Empty:
+                return
+            participant = self.get_participant(utterance["speaker_id"])
+            if participant is None:
+                logger.warning(f"Participant {utterance['speaker_id']} not found")
+                continue
+            if "transcription" in utterance:
+                self.save_streaming_transcription_utterance({**participant, **utterance})
+            else:
+                self.save_individual_audio_utterance({**participant, **utterance})
+
+    # Called on the streaming transcribers' receive threads, or the main loop. The utterance is saved on the main loop along with the ones from the audio processing worker.
+    def on_streaming_utterance_completed(self, utterance):
+        self.completed_audio_utterances.put(utterance)
+        self.main_loop_scheduler.wake("save_completed_audio_utterances")
+
+    # Called on the streaming transcribers' receive threads. Interim results go straight to redis, so they reach subscribers with as little delay as possible.
+    def publish_transcript_update(self, transcript_update):
+        message = {
+            "bot_id": self.bot_in_db.object_id,
+            "speaker_uuid": transcript_update["speaker_id"],
+            "timestamp_ms": transcript_update["timestamp_ms"],
+            "is_final": transcript_update["is_final"],
+            "transcript": transcript_update["transcript"],
+        }
+        try:
+            self.redis_client.publish(self.transcript_updates_channel, json.dumps(message))
+        except redis.exceptions.RedisError as e:
+            logger.warning(f"Failed to publish transcript update to redis: {e}")
 
-            # For staged bots, check if its time to join
-            self.join_if_staged_and_time_to_join()
-            return True
+    def on_audio_processing_worker_error(self, e):
+        GLib.idle_add(lambda: self.on_main_loop_task_error("audio_processing_worker", e))
 
-        except Exception as e:
-            logger.info(f"Error in timeout callback: {e}")
-            logger.info("Traceback:")
-            logger.info(traceback.format_exc())
-            self.cleanup()
-            return False
+    def upsert_caption(self, caption_data):
+        self.closed_caption_manager.upsert_caption(caption_data)
+        self.main_loop_scheduler.wake("process_captions")
 
     def get_recording_in_progress(self):
-        recordings_in_progress = Recording.objects.filter(bot=self.bot_in_db, state__in=[RecordingStates.IN_PROGRESS, RecordingStates.PAUSED])
-        if recordings_in_progress.count() == 0:
-            return None
-        if recordings_in_progress.count() > 1:
-            raise Exception(f"Expected at most one recording in progress for bot {self.bot_in_db.object_id}, but found {recordings_in_progress.count()}")
-        return recordings_in_progress.first()
+        # The recording in progress only changes when BotEventManager moves the bot to a new state. Since create_event and the sync
+        # command both refresh self.bot_in_db, we only need to look it up again when the bot's state differs from the cached one.
+        if self.recording_in_progress_bot_state == self.bot_in_db.state:
+            return self.recording_in_progress
+
+        recordings_in_progress = list(Recording.objects.filter(bot=self.bot_in_db, state__in=[RecordingStates.IN_PROGRESS, RecordingStates.PAUSED])[:2])
+        if len(recordings_in_progress) > 1:
+            raise Exception(f"Expected at most one recording in progress for bot {self.bot_in_db.object_id}, but found {len(recordings_in_progress)}")
+
+        self.recording_in_progress = recordings_in_progress[0] if recordings_in_progress else None
+        self.recording_in_progress_bot_state = self.bot_in_db.state
+        return self.recording_in_progress
+
+    def set_recording_transcription_in_progress(self, recording):
+        # RecordingManager refreshes the recording we pass it, so once the cached instance is in progress we can skip the round trip
+        if recording.transcription_state == RecordingTranscriptionStates.IN_PROGRESS:
+            return
+        RecordingManager.set_recording_transcription_in_progress(recording)
+
+    def get_or_create_participant(self, participant_info):
+        participant = self.participants.get(participant_info["participant_uuid"])
+        if participant is not None:
+            return participant
 
-    def save_closed_caption_utterance(self, message):
         participant, _ = Participant.objects.get_or_create(
             bot=self.bot_in_db,
-            uuid=message["participant_uuid"],
+            uuid=participant_info["participant_uuid"],
             defaults={
-                "user_uuid": message["participant_user_uuid"],
-                "full_name": message["participant_full_name"],
-                "is_the_bot": message["participant_is_the_bot"],
+                "user_uuid": participant_info["participant_user_uuid"],
+                "full_name": participant_info["participant_full_name"],
+                "is_the_bot": participant_info["participant_is_the_bot"],
             },
         )
+        self.participants[participant.uuid] = participant
+        return participant
+
+    def save_closed_caption_utterance(self, message):
+        participant = self.get_or_create_participant(message)
 
         # Create new utterance record
         recording_in_progress = self.get_recording_in_progress()
@@ -787,65 +1066,76 @@ class BotController:
             logger.warning(f"Warning: No recording in progress found so cannot save closed caption utterance. Message: {message}")
             return
         source_uuid = f"{recording_in_progress.object_id}-{message['source_uuid_suffix']}"
-        utterance, _ = Utterance.objects.update_or_create(
-            recording=recording_in_progress,
-            source_uuid=source_uuid,
-            defaults={
-                "source": Utterance.Sources.CLOSED_CAPTION_FROM_PLATFORM,
-                "participant": participant,
-                "transcription": {"transcript": message["text"]},
-                "timestamp_ms": message["timestamp_ms"],
-                "duration_ms": message["duration_ms"],
-                "sample_rate": None,
-            },
+        self.database_write_buffer.add_utterance(
+            Utterance(
+                recording=recording_in_progress,
+                source_uuid=source_uuid,
+                source=Utterance.Sources.CLOSED_CAPTION_FROM_PLATFORM,
+                participant=participant,
+                transcription={"transcript": message["text"]},
+                timestamp_ms=message["timestamp_ms"],
+                duration_ms=message["duration_ms"],
+                sample_rate=None,
+            )
         )
+        self.on_database_write_buffered()
 
-        # Create webhook event
-        trigger_webhook(
-            webhook_trigger_type=WebhookTriggerTypes.TRANSCRIPT_UPDATE,
-            bot=self.bot_in_db,
-            payload=utterance_webhook_payload(utterance),
+        self.set_recording_transcription_in_progress(recording_in_progress)
+
+    def save_streaming_transcription_utterance(self, message):
+        participant = self.get_or_create_participant(message)
+
+        recording_in_progress = self.get_recording_in_progress()
+        if recording_in_progress is None:
+            logger.warning("Warning: No recording in progress found so cannot save streaming transcription utterance.")
+            return
+        # The utterance already has its transcription, so it triggers a transcript update webhook when the buffer is flushed
+        self.database_write_buffer.add_utterance(
+            Utterance(
+                source=Utterance.Sources.STREAMING_TRANSCRIPTION,
+                recording=recording_in_progress,
+                participant=participant,
+                audio_blob=b"",
+                audio_format=None,
+                transcription=message["transcription"],
+                timestamp_ms=message["timestamp_ms"],
+                duration_ms=message["duration_ms"],
+                sample_rate=None,
+            )
         )
+        self.on_database_write_buffered()
 
-        RecordingManager.set_recording_transcription_in_progress(recording_in_progress)
+        self.set_recording_transcription_in_progress(recording_in_progress)
 
     def save_individual_audio_utterance(self, message):
-        from bots.tasks.process_utterance_task import process_utterance
-
         logger.info("Received message that new utterance was detected")
 
         # Create participant record if it doesn't exist
-        participant, _ = Participant.objects.get_or_create(
-            bot=self.bot_in_db,
-            uuid=message["participant_uuid"],
-            defaults={
-                "user_uuid": message["participant_user_uuid"],
-                "full_name": message["participant_full_name"],
-                "is_the_bot": message["participant_is_the_bot"],
-            },
-        )
+        participant = self.get_or_create_participant(message)
 
         # Create new utterance record
         recording_in_progress = self.get_recording_in_progress()
         if recording_in_progress is None:
             logger.warning("Warning: No recording in progress found so cannot save individual audio utterance.")
             return
-        utterance = Utterance.objects.create(
-            source=Utterance.Sources.PER_PARTICIPANT_AUDIO,
-            recording=recording_in_progress,
-            participant=participant,
-            audio_blob=message["audio_data"],
-            audio_format=Utterance.AudioFormat.PCM,
-            timestamp_ms=message["timestamp_ms"],
-            duration_ms=len(message["audio_data"]) / 64,
-            sample_rate=message["sample_rate"],
+        # The utterance is sent for transcription as soon as the buffer is flushed
+        self.database_write_buffer.add_utterance(
+            Utterance(
+                source=Utterance.Sources.PER_PARTICIPANT_AUDIO,
+                recording=recording_in_progress,
+                participant=participant,
+                audio_blob=b"" if message.get("audio_file") else message["audio_data"],
+                audio_file=message.get("audio_file"),
+                audio_format=Utterance.AudioFormat.FLAC if message.get("audio_file") else Utterance.AudioFormat.PCM,
+                timestamp_ms=message["timestamp_ms"],
+                duration_ms=len(message["audio_data"]) * 1000 // (message["sample_rate"] * 2),  # 2 bytes per sample
+                sample_rate=message["sample_rate"],
+            )
         )
+        self.on_database_write_buffered()
 
         # Set the recording transcription in progress
-        RecordingManager.set_recording_transcription_in_progress(recording_in_progress)
-
-        # Process the utterance immediately
-        process_utterance.delay(utterance.id)
+        self.set_recording_transcription_in_progress(recording_in_progress)
         return
 
     def on_new_chat_message(self, chat_message):
@@ -861,32 +1151,18 @@ class BotController:
             return
 
         # Create participant record if it doesn't exist
-        participant, _ = Participant.objects.get_or_create(
-            bot=self.bot_in_db,
-            uuid=participant["participant_uuid"],
-            defaults={
-                "user_uuid": participant["participant_user_uuid"],
-                "full_name": participant["participant_full_name"],
-                "is_the_bot": participant["participant_is_the_bot"],
-            },
-        )
-
-        participant_event = ParticipantEvent.objects.create(
-            participant=participant,
-            event_type=event["event_type"],
-            event_data=event["event_data"],
-            timestamp_ms=event["timestamp_ms"],
-        )
-
-        # Don't send webhook for the bot itself
-        if participant.is_the_bot:
-            return
-
-        trigger_webhook(
-            webhook_trigger_type=WebhookTriggerTypes.PARTICIPANT_EVENTS_JOIN_LEAVE,
-            bot=self.bot_in_db,
-            payload=participant_event_webhook_payload(participant_event),
+        participant = self.get_or_create_participant(participant)
+
+        # The webhook is sent when the buffer is flushed, unless the participant is the bot itself
+        self.database_write_buffer.add_participant_event(
+            ParticipantEvent(
+                participant=participant,
+                event_type=event["event_type"],
+                event_data=event["event_data"],
+                timestamp_ms=event["timestamp_ms"],
+            )
         )
+        self.on_database_write_buffered()
 
         return
 
@@ -899,52 +1175,63 @@ class BotController:
             logger.warning(f"Warning: No participant found for chat message: {chat_message}")
             return
 
-        participant, _ = Participant.objects.get_or_create(
-            bot=self.bot_in_db,
-            uuid=participant["participant_uuid"],
-            defaults={
-                "user_uuid": participant["participant_user_uuid"],
-                "full_name": participant["participant_full_name"],
-                "is_the_bot": participant["participant_is_the_bot"],
-            },
-        )
+        participant = self.get_or_create_participant(participant)
 
         recording_in_progress = self.get_recording_in_progress()
         if recording_in_progress is None:
             logger.warning(f"Warning: No recording in progress found so cannot save chat message. Message: {chat_message}")
             return
 
-        chat_message_in_db, _ = ChatMessage.objects.update_or_create(
-            bot=self.bot_in_db,
-            source_uuid=f"{recording_in_progress.object_id}-{chat_message['message_uuid']}",
-            defaults={
-                "timestamp": chat_message["timestamp"],
-                "to": ChatMessageToOptions.ONLY_BOT if chat_message.get("to_bot") else ChatMessageToOptions.EVERYONE,
-                "text": chat_message["text"],
-                "participant": participant,
-                "additional_data": chat_message.get("additional_data", {}),
-            },
-        )
-
-        # Create webhook event
-        trigger_webhook(
-            webhook_trigger_type=WebhookTriggerTypes.CHAT_MESSAGES_UPDATE,
-            bot=self.bot_in_db,
-            payload=chat_message_webhook_payload(chat_message_in_db),
+        self.database_write_buffer.add_chat_message(
+            ChatMessage(
+                bot=self.bot_in_db,
+                source_uuid=f"{recording_in_progress.object_id}-{chat_message['message_uuid']}",
+                timestamp=chat_message["timestamp"],
+                to=ChatMessageToOptions.ONLY_BOT if chat_message.get("to_bot") else ChatMessageToOptions.EVERYONE,
+                text=chat_message["text"],
+                participant=participant,
+                additional_data=chat_message.get("additional_data", {}),
+            )
         )
+        self.on_database_write_buffered()
 
         return
 
+    # Can be called from any thread
+    def on_database_write_buffered(self):
+        if not self.main_loop_scheduler:
+            return
+        if self.database_write_buffer.is_full():
+            self.main_loop_scheduler.reschedule("flush_database_writes")
+        else:
+            self.main_loop_scheduler.wake("flush_database_writes")
+
+    def flush_database_writes_task(self):
+        seconds_until_flush_due = self.database_write_buffer.seconds_until_flush_due()
+        if seconds_until_flush_due is None or seconds_until_flush_due > 0:
+            return seconds_until_flush_due
+        self.database_write_buffer.flush()
+        return self.database_write_buffer.seconds_until_flush_due()
+
     def on_message_from_adapter(self, message):
         GLib.idle_add(lambda: self.take_action_based_on_message_from_adapter(message))
 
     def flush_utterances(self):
         if self.per_participant_non_streaming_audio_input_manager:
             logger.info("Flushing utterances...")
+            self.audio_processing_worker.stop()
             self.per_participant_non_streaming_audio_input_manager.flush_utterances()
+            self.wait_for_utterance_audio_uploads()
+            self.save_completed_audio_utterances()
+        if self.per_participant_streaming_audio_input_manager:
+            logger.info("Closing streaming transcription connections...")
+            self.per_participant_streaming_audio_input_manager.close()
+            self.save_completed_audio_utterances()
         if self.closed_caption_manager:
             logger.info("Flushing captions...")
             self.closed_caption_manager.flush_captions()
+        logger.info("Flushing database writes...")
+        self.database_write_buffer.flush(final=True)
 
     def save_debug_recording(self):
         # Only save if the file exists
@@ -0,0 +1,93 @@
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+class CleanupStep:
+    def __init__(self, name, callback, depends_on):
+        self.name = name
+        self.callback = callback
+        self.depends_on = depends_on
+
+
+class CleanupStepRunner:
+    """
+    Runs the steps of the bot controller's cleanup as a dependency graph. A step starts as soon as all the steps
+    it depends on have finished, so independent steps (e.g. uploading the recording and waiting for utterances
+    to be transcribed) overlap. The time each step took is recorded in step_durations_seconds.
+    """
+
+    def __init__(self, max_workers=4):
+        self.max_workers = max_workers
+        self.steps = {}
+        self.step_durations_seconds = {}
+
+    # Runs a step right away on the calling thread. Used for the steps that have to happen in order, before the graph runs.
+    def run_step_now(self, name, callback):
+        start_time = time.monotonic()
+        try:
+            callback()
+        finally:
+            self.step_durations_seconds[name] = round(time.monotonic() - start_time, 3)
+
+    def add_step(self, name, callback, depends_on=()):
+        for dependency_name in depends_on:
+            if dependency_name not in self.steps:
+                raise ValueError(f"Cleanup step {name} depends on unknown step {dependency_name}")
+        self.steps[name] = CleanupStep(name, callback, tuple(depends_on))
+
+    def _run_step_in_worker(self, step):
+        start_time = time.monotonic()
+        try:
+            logger.info(f"Starting cleanup step {step.name}")
+            step.callback()
+        finally:
+            self.step_durations_seconds[step.name] = round(time.monotonic() - start_time, 3)
+            logger.info(f"Finished cleanup step {step.name} in {self.step_durations_seconds[step.name]} seconds")
+            # Worker threads get their own database connection, which would otherwise be left open
+            connection.close()
+
+    def run(self):
+        """
+        Runs every step whose dependencies succeeded. If a step fails, the steps that depend on it are skipped,
+        but unrelated steps still run. Once nothing else can run, the first failure is re-raised.
+        """
+        pending_steps = dict(self.steps)
+        succeeded_step_names = set()
+        failed_step_names = set()
+        first_exception = None
+        running_futures = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="cleanup_step") as executor:
+            while pending_steps or running_futures:
+                for step in list(pending_steps.values()):
+                    if any(dependency_name in failed_step_names for dependency_name in step.depends_on):
+                        logger.info(f"Skipping cleanup step {step.name} because a step it depends on failed")
+                        failed_step_names.add(step.name)
+                        del pending_steps[step.name]
+                    elif all(dependency_name in succeeded_step_names for dependency_name in step.depends_on):
+                        running_futures[executor.submit(self._run_step_in_worker, step)] = step
+                        del pending_steps[step.name]
+
+                if not running_futures:
+                    # Only steps that were skipped because of a failure were left
+                    continue
+
+                done_futures, _ = wait(running_futures, return_when=FIRST_COMPLETED)
+                for future in done_futures:
+                    step = running_futures.pop(future)
+                    exception = future.exception()
+                    if exception is None:
+                        succeeded_step_names.add(step.name)
+                    else:
+                        logger.error(f"Cleanup step {step.name} failed: {exception}", exc_info=exception)
+                        failed_step_names.add(step.name)
+                        if first_exception is None:
+                            first_exception = exception
+
+        if first_exception is not None:
+            raise first_exception
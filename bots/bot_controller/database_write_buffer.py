@@ -0,0 +1,175 @@
+import logging
+import random
+import string
+import threading
+import time
+from collections import Counter
+
+from django.db import transaction
+
+from bots.models import ChatMessage, ParticipantEvent, RecordingManager, Utterance, WebhookTriggerTypes
+from bots.webhook_payloads import chat_message_webhook_payload, participant_event_webhook_payload, utterance_webhook_payload
+from bots.webhook_utils import trigger_webhooks
+
+logger = logging.getLogger(__name__)
+
+
+def generate_object_id(model_class):
+    # bulk_create doesn't call save(), so we have to generate the object id ourselves
+    random_string = "".join(random.choices(string.ascii_letters + string.digits, k=16))
+    return f"{model_class.OBJECT_ID_PREFIX}{random_string}"
+
+
+class DatabaseWriteBuffer:
+    """
+    Collects utterances, participant events and chat messages written by the bot controller and persists them
+    in a single transaction, along with the webhooks they trigger.
+    """
+
+    def __init__(self, *, bot, flush_interval_seconds, max_buffered_records):
+        from bots.tasks.process_utterance_task import UtteranceBatcher
+
+        self.bot = bot
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_buffered_records = max_buffered_records
+
+        self.lock = threading.Lock()
+        # Keyed by source_uuid when there is one, so that repeated upserts of the same caption or chat message are coalesced
+        self.utterances = {}
+        self.participant_events = []
+        self.chat_messages = {}
+        self.oldest_record_buffered_at = None
+        # New per participant audio utterances are held here after they are written, so short ones from the same
+        # speaker can be transcribed together
+        self.utterance_batcher = UtteranceBatcher()
+
+    def add_utterance(self, utterance):
+        with self.lock:
+            self.utterances[utterance.source_uuid or id(utterance)] = utterance
+            self._record_buffered()
+
+    def add_participant_event(self, participant_event):
+        participant_event.object_id = generate_object_id(ParticipantEvent)
+        with self.lock:
+            self.participant_events.append(participant_event)
+            self._record_buffered()
+
+    def add_chat_message(self, chat_message):
+        chat_message.object_id = generate_object_id(ChatMessage)
+        with self.lock:
+            self.chat_messages[chat_message.source_uuid] = chat_message
+            self._record_buffered()
+
+    def _record_buffered(self):
+        if self.oldest_record_buffered_at is None:
+            self.oldest_record_buffered_at = time.monotonic()
+
+    def buffered_record_count(self):
+        return len(self.utterances) + len(self.participant_events) + len(self.chat_messages)
+
+    def is_full(self):
+        return self.buffered_record_count() >= self.max_buffered_records
+
+    # Returns None if there is nothing to flush
+    def seconds_until_flush_due(self):
+        with self.lock:
+            now = time.monotonic()
+            seconds_until_batch_due = self.utterance_batcher.seconds_until_next_batch_due(now)
+            if self.oldest_record_buffered_at is None:
+                return seconds_until_batch_due
+            if self.is_full():
+                return 0
+            seconds_until_records_due = max(0, self.oldest_record_buffered_at + self.flush_interval_seconds - now)
+            return seconds_until_records_due if seconds_until_batch_due is None else min(seconds_until_records_due, seconds_until_batch_due)
+
+    # final sends every held utterance batch for transcription, for when no more utterances are coming
+    def flush(self, final=False):
+        with self.lock:
+            buffered_utterances = self.utterances
+            buffered_chat_messages = self.chat_messages
+            utterances = list(buffered_utterances.values())
+            participant_events = self.participant_events
+            chat_messages = list(buffered_chat_messages.values())
+            oldest_record_buffered_at = self.oldest_record_buffered_at
+            self.utterances = {}
+            self.participant_events = []
+            self.chat_messages = {}
+            self.oldest_record_buffered_at = None
+
+        if not utterances and not participant_events and not chat_messages:
+            self._transcribe_utterances([], final)
+            return
+
+        logger.info(f"Flushing {len(utterances)} utterances, {len(participant_events)} participant events and {len(chat_messages)} chat messages for bot {self.bot.object_id}")
+
+        try:
+            self._write(utterances, participant_events, chat_messages)
+        except Exception:
+            logger.warning(f"Failed to flush database writes for bot {self.bot.object_id}, putting them back in the buffer")
+            self._put_back(buffered_utterances, participant_events, buffered_chat_messages, oldest_record_buffered_at)
+            raise
+
+        # Kick off transcription for the new per participant audio utterances once they are committed
+        self._transcribe_utterances([utterance for utterance in utterances if utterance.source == Utterance.Sources.PER_PARTICIPANT_AUDIO and utterance.transcription is None], final)
+
+    def _transcribe_utterances(self, new_utterances, final):
+        from bots.tasks.process_utterance_task import process_utterance, process_utterance_batch
+
+        with self.lock:
+            now = time.monotonic()
+            utterance_batches = self.utterance_batcher.add(new_utterances, now) + self.utterance_batcher.pop_due_batches(now, all=final)
+
+        for utterance_batch in utterance_batches:
+            if len(utterance_batch) == 1:
+                process_utterance.delay(utterance_batch[0].id)
+            else:
+                process_utterance_batch.delay([utterance.id for utterance in utterance_batch])
+
+    def _put_back(self, utterances, participant_events, chat_messages, oldest_record_buffered_at):
+        # The transaction was rolled back, so the primary keys that bulk_create set on the records don't exist
+        for record in [*utterances.values(), *participant_events, *chat_messages.values()]:
+            record.pk = None
+            record._state.adding = True
+
+        with self.lock:
+            # Records buffered since the flush started are newer than the ones being put back, so they win
+            self.utterances = {**utterances, **self.utterances}
+            self.participant_events = participant_events + self.participant_events
+            self.chat_messages = {**chat_messages, **self.chat_messages}
+            self.oldest_record_buffered_at = oldest_record_buffered_at
+
+    def _write(self, utterances, participant_events, chat_messages):
+        webhooks = []
+        with transaction.atomic():
+            if utterances:
+                # Captions are upserted by source_uuid. Per participant audio utterances have no source_uuid, so they are always inserted.
+                Utterance.objects.bulk_create(
+                    utterances,
+                    update_conflicts=True,
+                    unique_fields=["source_uuid"],
+                    update_fields=["participant", "transcription", "timestamp_ms", "duration_ms", "updated_at"],
+                )
+                # Utterances without a transcription are always new, since captions are the only ones that are upserted
+                pending_transcription_counts = Counter(utterance.recording_id for utterance in utterances if utterance.transcription is None)
+                for recording_id, count in pending_transcription_counts.items():
+                    RecordingManager.add_utterances_pending_transcription(recording_id, count)
+                webhooks.extend((WebhookTriggerTypes.TRANSCRIPT_UPDATE, utterance_webhook_payload(utterance)) for utterance in utterances if utterance.transcription is not None)
+
+            if participant_events:
+                ParticipantEvent.objects.bulk_create(participant_events)
+                # Don't send webhooks for the bot itself
+                webhooks.extend((WebhookTriggerTypes.PARTICIPANT_EVENTS_JOIN_LEAVE, participant_event_webhook_payload(participant_event)) for participant_event in participant_events if not participant_event.participant.is_the_bot)
+
+            if chat_messages:
+                ChatMessage.objects.bulk_create(
+                    chat_messages,
+                    update_conflicts=True,
+                    unique_fields=["source_uuid"],
+                    update_fields=["timestamp", "to", "text", "participant", "additional_data", "updated_at"],
+                )
+                # Messages that already existed keep their original object id, so read them back before building the payloads
+                chat_messages_in_db = ChatMessage.objects.filter(id__in=[chat_message.id for chat_message in chat_messages]).select_related("participant")
+                webhooks.extend((WebhookTriggerTypes.CHAT_MESSAGES_UPDATE, chat_message_webhook_payload(chat_message)) for chat_message in chat_messages_in_db)
+
+            if webhooks:
+                trigger_webhooks(bot=self.bot, webhooks=webhooks)
@@ -6,6 +6,8 @@ import time
 
 from gi.repository import GLib, Gst
 
+from bots import bot_metrics
+
 logger = logging.getLogger(__name__)
 
 
@@ -166,6 +168,7 @@ class GstreamerPipeline:
         # Initialize queue monitoring
         self.queue_drops = {}
         self.last_reported_drops = {}
+        self.queues = {}
 
         # Find all queue elements and connect drop signals
         iterator = self.pipeline.iterate_elements()
@@ -180,6 +183,7 @@ class GstreamerPipeline:
                 queue_name = element.get_name()
                 self.queue_drops[queue_name] = 0
                 self.last_reported_drops[queue_name] = 0
+                self.queues[queue_name] = element
                 element.connect("overrun", self.on_queue_overrun, queue_name)
 
         # Start statistics monitoring
@@ -210,14 +214,29 @@ class GstreamerPipeline:
                     logger.info(f"  {queue_name}: {drops} buffers dropped")
                 self.last_reported_drops[queue_name] = self.queue_drops[queue_name]
 
+            for queue_name, queue in self.queues.items():
+                self.report_queue_level(queue_name, queue)
+
         except Exception as e:
             logger.info(f"Error getting pipeline stats: {e}")
 
         return True  # Continue timer
 
+    def report_queue_level(self, queue_name, queue):
+        level_buffers = queue.get_property("current-level-buffers")
+        level_bytes = queue.get_property("current-level-bytes")
+        level_time = queue.get_property("current-level-time")
+        bot_metrics.gstreamer_queue_level_buffers.set(level_buffers, queue=queue_name)
+        bot_metrics.gstreamer_queue_level_seconds.set(level_time / Gst.SECOND, queue=queue_name)
+
+        # A limit of 0 means unlimited, so the queue is as full as its fullest non-zero limit
+        fill_ratios = [level / limit for level, limit in [(level_buffers, queue.get_property("max-size-buffers")), (level_bytes, queue.get_property("max-size-bytes")), (level_time, queue.get_property("max-size-time"))] if limit > 0]
+        bot_metrics.gstreamer_queue_fill_ratio.set(max(fill_ratios, default=0), queue=queue_name)
+
     def on_queue_overrun(self, queue, queue_name):
         """Callback for when a queue drops buffers"""
         self.queue_drops[queue_name] += 1
+        bot_metrics.gstreamer_queue_dropped_buffers_total.inc(queue=queue_name)
         return True
 
     def on_mixed_audio_raw_data_received_callback(self, data, timestamp=None, audio_appsrc_idx=0):
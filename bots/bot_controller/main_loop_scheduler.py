@@ -0,0 +1,125 @@
+import logging
+import threading
+import time
+
+import gi
+from django.db import connection
+
+gi.require_version("GLib", "2.0")
+from gi.repository import GLib
+
+from bots import bot_metrics
+
+logger = logging.getLogger(__name__)
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class MainLoopTask:
+    def __init__(self, name, callback):
+        self.name = name
+        self.callback = callback
+        # GLib source id for the next scheduled run. None means the task is idle and only runs when woken.
+        self.source_id = None
+        self.wake_pending = False
+
+
+class MainLoopScheduler:
+    """
+    Runs periodic bot controller work on the GLib main loop without a fixed polling interval.
+
+    Each task callback returns the number of seconds until it next needs to run, or None if it has nothing
+    to do until it is woken up. GLib keeps one timer per task, so the main loop sleeps until the nearest deadline.
+    """
+
+    def __init__(self, *, on_task_error_callback):
+        self.tasks = {}
+        self.on_task_error_callback = on_task_error_callback
+        self.stopped = False
+        self.lock = threading.Lock()
+
+    def add_task(self, name, callback, initial_delay_seconds=0):
+        task = MainLoopTask(name, callback)
+        self.tasks[name] = task
+        self._schedule(task, initial_delay_seconds)
+
+    # Thread safe. If the task is idle, run it as soon as possible. If it already has a run scheduled, that run
+    # will pick up the new work, so we don't preempt it. This keeps a busy task at its own cadence.
+    def wake(self, name):
+        task = self.tasks.get(name)
+        if task is None or self.stopped:
+            return
+        with self.lock:
+            if task.source_id is not None or task.wake_pending:
+                return
+            task.wake_pending = True
+        GLib.idle_add(self._on_wake, task)
+
+    # Thread safe. Replaces whatever run is scheduled for the task, even if it is further out than delay_seconds.
+    def reschedule(self, name, delay_seconds=0):
+        task = self.tasks.get(name)
+        if task is None or self.stopped:
+            return
+        GLib.idle_add(self._on_reschedule, task, delay_seconds)
+
+    def _on_reschedule(self, task, delay_seconds):
+        self._schedule(task, delay_seconds)
+        return False
+
+    def stop(self):
+        self.stopped = True
+        for task in self.tasks.values():
+            if task.source_id is not None:
+                GLib.source_remove(task.source_id)
+                task.source_id = None
+
+    def _schedule(self, task, delay_seconds):
+        with self.lock:
+            if task.source_id is not None:
+                GLib.source_remove(task.source_id)
+                task.source_id = None
+            if delay_seconds is None or self.stopped:
+                return
+            if delay_seconds <= 0:
+                task.source_id = GLib.idle_add(self._on_source_fired, task)
+            else:
+                task.source_id = GLib.timeout_add(max(1, int(delay_seconds * 1000)), self._on_source_fired, task)
+
+    def _on_wake(self, task):
+        with self.lock:
+            task.wake_pending = False
+            if task.source_id is not None:
+                return False
+        self._run(task)
+        return False
+
+    def _on_source_fired(self, task):
+        # Returning False removes the source, so forget about it before running the task
+        with self.lock:
+            task.source_id = None
+        self._run(task)
+        return False
+
+    def _run(self, task):
+        if self.stopped:
+            return
+        query_counter = QueryCounter()
+        start_time = time.monotonic()
+        try:
+            with connection.execute_wrapper(query_counter):
+                next_delay_seconds = task.callback()
+        except Exception as e:
+            self.stop()
+            self.on_task_error_callback(task.name, e)
+            return
+        finally:
+            bot_metrics.main_loop_task_duration_seconds.observe(time.monotonic() - start_time, task=task.name)
+            bot_metrics.main_loop_task_db_queries.observe(query_counter.count, task=task.name)
+        self._schedule(task, next_delay_seconds)
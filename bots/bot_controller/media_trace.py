@@ -0,0 +1,172 @@
+import datetime
+import json
+import logging
+import struct
+import threading
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MEDIA_TRACE_MAGIC = b"ATTENDEE_MEDIA_TRACE"
+MEDIA_TRACE_VERSION = 1
+
+# The adapter callbacks that can be captured. A record stores the index of its callback in this list.
+MEDIA_TRACE_CALLBACK_NAMES = [
+    "get_participant",
+    "add_audio_chunk",
+    "add_mixed_audio_chunk",
+    "add_video_frame",
+    "upsert_caption",
+    "upsert_chat_message",
+    "add_participant_event",
+]
+
+# Seconds since the trace started, callback index, length of the JSON encoded arguments, length of the binary data
+MEDIA_TRACE_RECORD_HEADER = struct.Struct("<dBII")
+# Length of the JSON encoded trace header
+MEDIA_TRACE_HEADER_LENGTH = struct.Struct("<I")
+
+
+class MediaTraceRecord:
+    def __init__(self, callback_name, time_offset_seconds, args):
+        self.callback_name = callback_name
+        self.time_offset_seconds = time_offset_seconds
+        self.args = args
+
+
+def encode_args(args):
+    """
+    Audio and video arguments are written as raw binary data after the JSON encoded arguments. Each callback
+    receives at most one of them.
+    """
+    encoded_args = []
+    data = b""
+    for arg in args:
+        if isinstance(arg, np.ndarray):
+            data = arg.tobytes()
+            encoded_args.append({"__data__": True})
+        elif isinstance(arg, (bytes, bytearray, memoryview)):
+            data = bytes(arg)
+            encoded_args.append({"__data__": True})
+        elif isinstance(arg, datetime.datetime):
+            encoded_args.append({"__datetime__": arg.isoformat()})
+        else:
+            encoded_args.append(arg)
+    return json.dumps(encoded_args).encode("utf-8"), data
+
+
+def decode_args(encoded_args, data):
+    args = []
+    for arg in json.loads(encoded_args.decode("utf-8")):
+        if isinstance(arg, dict) and arg.get("__data__"):
+            args.append(data)
+        elif isinstance(arg, dict) and "__datetime__" in arg:
+            args.append(datetime.datetime.fromisoformat(arg["__datetime__"]))
+        else:
+            args.append(arg)
+    return args
+
+
+class MediaTraceWriter:
+    """
+    Writes a timestamped binary trace of everything an adapter hands to the bot controller, so that it can be
+    replayed into a controller later with the ReplayBotAdapter. Thread safe, since adapters call back from
+    their own threads.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.lock = threading.Lock()
+        self.file = open(file_path, "wb", buffering=1024 * 1024)
+        self.start_time = time.monotonic()
+        self.closed = False
+
+        header = json.dumps({"version": MEDIA_TRACE_VERSION, "started_at": datetime.datetime.utcnow().isoformat()}).encode("utf-8")
+        self.file.write(MEDIA_TRACE_MAGIC)
+        self.file.write(MEDIA_TRACE_HEADER_LENGTH.pack(len(header)))
+        self.file.write(header)
+
+    def write(self, callback_name, args):
+        encoded_args, data = encode_args(args)
+        callback_index = MEDIA_TRACE_CALLBACK_NAMES.index(callback_name)
+        with self.lock:
+            if self.closed:
+                return
+            self.file.write(MEDIA_TRACE_RECORD_HEADER.pack(time.monotonic() - self.start_time, callback_index, len(encoded_args), len(data)))
+            self.file.write(encoded_args)
+            self.file.write(data)
+
+    # Returns a callback that records its arguments before calling the original one
+    def wrap_callback(self, callback_name, callback):
+        if callback is None:
+            return None
+
+        def traced_callback(*args):
+            try:
+                self.write(callback_name, args)
+            except Exception as e:
+                logger.warning(f"Failed to write {callback_name} to media trace: {e}")
+            return callback(*args)
+
+        return traced_callback
+
+    # The controller looks participants up through the adapter, so the trace records what the adapter returned
+    def wrap_get_participant(self, get_participant):
+        last_traced_participants = {}
+
+        def traced_get_participant(participant_id):
+            participant = get_participant(participant_id)
+            # Only record a participant when they first show up or their details change
+            if participant is not None and last_traced_participants.get(participant_id) != participant:
+                last_traced_participants[participant_id] = dict(participant)
+                try:
+                    self.write("get_participant", [participant])
+                except Exception as e:
+                    logger.warning(f"Failed to write participant to media trace: {e}")
+            return participant
+
+        return traced_get_participant
+
+    def close(self):
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+            self.file.close()
+        logger.info(f"Closed media trace at {self.file_path}")
+
+
+def read_media_trace_header(file):
+    if file.read(len(MEDIA_TRACE_MAGIC)) != MEDIA_TRACE_MAGIC:
+        raise ValueError("Not a media trace file")
+    (header_length,) = MEDIA_TRACE_HEADER_LENGTH.unpack(file.read(MEDIA_TRACE_HEADER_LENGTH.size))
+    header = json.loads(file.read(header_length).decode("utf-8"))
+    if header["version"] != MEDIA_TRACE_VERSION:
+        raise ValueError(f"Unsupported media trace version {header['version']}")
+    return header
+
+
+def read_media_trace(file_path):
+    """
+    Returns the trace header and a generator over the trace's records, in the order they were written.
+    A record that was cut off because the bot died while writing it is ignored.
+    """
+    file = open(file_path, "rb")
+    header = read_media_trace_header(file)
+
+    def records():
+        with file:
+            while True:
+                record_header = file.read(MEDIA_TRACE_RECORD_HEADER.size)
+                if len(record_header) < MEDIA_TRACE_RECORD_HEADER.size:
+                    return
+                time_offset_seconds, callback_index, encoded_args_length, data_length = MEDIA_TRACE_RECORD_HEADER.unpack(record_header)
+                encoded_args = file.read(encoded_args_length)
+                data = file.read(data_length)
+                if len(encoded_args) < encoded_args_length or len(data) < data_length:
+                    return
+                yield MediaTraceRecord(MEDIA_TRACE_CALLBACK_NAMES[callback_index], time_offset_seconds, decode_args(encoded_args, data))
+
+    return header, records()
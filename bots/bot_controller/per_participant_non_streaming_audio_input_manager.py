@@ -1,25 +1,80 @@
 import logging
-import queue
+import threading
+from collections import deque
 from datetime import datetime, timedelta
 
 import numpy as np
-import webrtcvad
+
+from bots import bot_metrics
+
+from .voice_activity_detector import VoiceActivityDetector
 
 logger = logging.getLogger(__name__)
 
 
-def calculate_normalized_rms(audio_bytes):
-    samples = np.frombuffer(audio_bytes, dtype=np.int16)
-    rms = np.sqrt(np.mean(np.square(samples)))
-    # Normalize by max possible value for 16-bit audio (32768)
-    return rms / 32768
+class UtteranceAudioBuffer:
+    """
+    Accumulates a speaker's audio for one utterance at a time. The array is reused across utterances, and only
+    grows (by doubling) when an utterance doesn't fit, so steady speech doesn't reallocate and copy the audio.
+    """
+
+    def __init__(self, initial_capacity, max_retained_capacity):
+        self.initial_capacity = initial_capacity
+        # A buffer that grew past this for a long utterance is freed when it is cleared, so it doesn't hold on to memory
+        self.max_retained_capacity = max_retained_capacity
+        self.array = np.empty(initial_capacity, dtype=np.uint8)
+        self.length = 0
+
+    def __len__(self):
+        return self.length
+
+    def append(self, chunk_bytes):
+        chunk = np.frombuffer(chunk_bytes, dtype=np.uint8)
+        new_length = self.length + len(chunk)
+        if new_length > len(self.array):
+            new_array = np.empty(max(new_length, len(self.array) * 2), dtype=np.uint8)
+            new_array[: self.length] = self.array[: self.length]
+            self.array = new_array
+        self.array[self.length : new_length] = chunk
+        self.length = new_length
+
+    # A view of the utterance's audio without copying it. It is only valid until the buffer is cleared.
+    def view(self):
+        return memoryview(self.array[: self.length])
+
+    def clear(self):
+        self.length = 0
+        if len(self.array) > self.max_retained_capacity:
+            self.array = np.empty(self.initial_capacity, dtype=np.uint8)
 
 
 class PerParticipantNonStreamingAudioInputManager:
-    def __init__(self, *, save_utterance_callback, get_participant_callback, sample_rate, utterance_size_limit, silence_duration_limit):
-        self.queue = queue.Queue()
+    # What to do with a chunk that arrives when the speaker's queue is full
+    DROP_OLDEST = "drop_oldest"
+    DROP_NEWEST = "drop_newest"
+    DROP_POLICIES = [DROP_OLDEST, DROP_NEWEST]
+
+    def __init__(self, *, save_utterance_callback, get_participant_callback, sample_rate, utterance_size_limit, silence_duration_limit, max_queued_bytes_per_speaker=None, drop_policy=DROP_OLDEST, audio_conditioner=None):
+        if drop_policy not in self.DROP_POLICIES:
+            raise ValueError(f"Invalid drop policy {drop_policy}, must be one of {self.DROP_POLICIES}")
+
+        # Chunks are added from the adapter's thread and processed on the audio processing worker. Each speaker gets their own
+        # bounded queue, so a stalled worker can't grow memory without limit and one speaker can't crowd out the rest.
+        self.queues = {}
+        self.queued_bytes = {}
+        self.queue_lock = threading.Lock()
+        self.max_queued_bytes_per_speaker = max_queued_bytes_per_speaker
+        self.drop_policy = drop_policy
+
+        self.dropped_chunks = 0
+        self.dropped_bytes = 0
+        self.high_water_mark_bytes = 0
+
+        # Guards the utterance state, so utterances can be flushed from another thread while the chunks are processed
+        self.processing_lock = threading.Lock()
 
         self.save_utterance_callback = save_utterance_callback
+        # If this is None, the participant is left for the save callback to look up from the utterance's speaker_id
         self.get_participant_callback = get_participant_callback
 
         self.utterances = {}
@@ -27,24 +82,87 @@ class PerParticipantNonStreamingAudioInputManager:
 
         self.first_nonsilent_audio_time = {}
         self.last_nonsilent_audio_time = {}
+        # Where the last chunk with speech ends in each speaker's buffer, so trailing silence can be trimmed
+        self.speech_end_offsets = {}
+        # Resamples and trims utterances before they are saved. If None, they are saved as they were received.
+        self.audio_conditioner = audio_conditioner
 
         self.UTTERANCE_SIZE_LIMIT = utterance_size_limit
         self.SILENCE_DURATION_LIMIT = silence_duration_limit
-        self.vad = webrtcvad.Vad()
+        self.voice_activity_detector = VoiceActivityDetector(sample_rate=sample_rate, rms_threshold=0.01)
 
     def add_chunk(self, speaker_id, chunk_time, chunk_bytes):
-        self.queue.put((speaker_id, chunk_time, chunk_bytes))
+        with self.queue_lock:
+            speaker_queue = self.queues.get(speaker_id)
+            if speaker_queue is None:
+                speaker_queue = self.queues[speaker_id] = deque()
+                self.queued_bytes[speaker_id] = 0
+
+            if self.max_queued_bytes_per_speaker is not None:
+                if self.drop_policy == self.DROP_NEWEST:
+                    if speaker_queue and self.queued_bytes[speaker_id] + len(chunk_bytes) > self.max_queued_bytes_per_speaker:
+                        self.record_dropped_chunk(speaker_id, chunk_bytes)
+                        return
+                else:
+                    while speaker_queue and self.queued_bytes[speaker_id] + len(chunk_bytes) > self.max_queued_bytes_per_speaker:
+                        _, dropped_chunk_bytes = speaker_queue.popleft()
+                        self.queued_bytes[speaker_id] -= len(dropped_chunk_bytes)
+                        self.record_dropped_chunk(speaker_id, dropped_chunk_bytes)
+
+            speaker_queue.append((chunk_time, chunk_bytes))
+            self.queued_bytes[speaker_id] += len(chunk_bytes)
+            self.high_water_mark_bytes = max(self.high_water_mark_bytes, self.queued_bytes[speaker_id])
+
+    # Called with queue_lock held
+    def record_dropped_chunk(self, speaker_id, chunk_bytes):
+        if self.dropped_chunks % 1000 == 0:
+            logger.warning(f"Audio queue for speaker {speaker_id} is full, dropping chunks with policy {self.drop_policy}. {self.dropped_chunks} chunks dropped so far.")
+        self.dropped_chunks += 1
+        self.dropped_bytes += len(chunk_bytes)
+        bot_metrics.per_participant_audio_dropped_chunks_total.inc()
+
+    def ingest_queue_stats(self):
+        with self.queue_lock:
+            return {
+                "max_queued_bytes_per_speaker": self.max_queued_bytes_per_speaker,
+                "drop_policy": self.drop_policy,
+                "dropped_chunks": self.dropped_chunks,
+                "dropped_bytes": self.dropped_bytes,
+                "high_water_mark_bytes": self.high_water_mark_bytes,
+            }
 
     def process_chunks(self):
-        while not self.queue.empty():
-            speaker_id, chunk_time, chunk_bytes = self.queue.get()
-            self.process_chunk(speaker_id, chunk_time, chunk_bytes)
+        with self.processing_lock:
+            self._process_chunks()
+
+    def _process_chunks(self):
+        with self.queue_lock:
+            queues = self.queues
+            self.queues = {}
+            self.queued_bytes = {}
+
+        bot_metrics.per_participant_audio_queue_depth.set(sum(len(speaker_queue) for speaker_queue in queues.values()))
+        for speaker_id, speaker_queue in queues.items():
+            # Detect speech for all of the speaker's queued chunks at once
+            speech_flags = self.voice_activity_detector.detect_speech([chunk_bytes for _, chunk_bytes in speaker_queue])
+            for (chunk_time, chunk_bytes), is_speech in zip(speaker_queue, speech_flags):
+                self.process_chunk(speaker_id, chunk_time, chunk_bytes, audio_is_silent=not is_speech)
 
         for speaker_id in list(self.first_nonsilent_audio_time.keys()):
             self.process_chunk(speaker_id, datetime.utcnow(), None)
 
-    # When the meeting ends, we need to flush all utterances. Do this by pretending that we received a chunk of silence at the end of the meeting.
+        bot_metrics.per_participant_audio_speakers_with_pending_audio.set(len(self.first_nonsilent_audio_time))
+
+    def has_pending_audio(self):
+        return len(self.queues) > 0 or len(self.first_nonsilent_audio_time) > 0
+
+    # When the meeting ends, we need to flush all utterances. Do this by processing any queued chunks and then pretending that we received a chunk of silence at the end of the meeting.
     def flush_utterances(self):
+        with self.processing_lock:
+            self._process_chunks()
+            self._flush_utterances()
+
+    def _flush_utterances(self):
         for speaker_id in list(self.first_nonsilent_audio_time.keys()):
             self.process_chunk(
                 speaker_id,
@@ -52,25 +170,31 @@ class PerParticipantNonStreamingAudioInputManager:
                 None,
             )
 
+    def create_utterance_buffer(self):
+        # Room for 10 seconds of speech up front, and keep up to a minute's worth between utterances
+        bytes_per_second = self.sample_rate * 2
+        return UtteranceAudioBuffer(initial_capacity=min(10 * bytes_per_second, self.UTTERANCE_SIZE_LIMIT), max_retained_capacity=min(60 * bytes_per_second, self.UTTERANCE_SIZE_LIMIT))
+
     def silence_detected(self, chunk_bytes):
-        if calculate_normalized_rms(chunk_bytes) < 0.01:
-            return True
-        return not self.vad.is_speech(chunk_bytes, self.sample_rate)
+        return not self.voice_activity_detector.is_speech(chunk_bytes)
 
-    def process_chunk(self, speaker_id, chunk_time, chunk_bytes):
-        audio_is_silent = self.silence_detected(chunk_bytes) if chunk_bytes else True
+    # audio_is_silent can be passed in when speech was already detected for a batch of chunks
+    def process_chunk(self, speaker_id, chunk_time, chunk_bytes, audio_is_silent=None):
+        if audio_is_silent is None:
+            audio_is_silent = self.silence_detected(chunk_bytes) if chunk_bytes else True
 
         # Initialize buffer and timing for new speaker
         if speaker_id not in self.utterances or len(self.utterances[speaker_id]) == 0:
             if audio_is_silent:
                 return
-            self.utterances[speaker_id] = bytearray()
+            if speaker_id not in self.utterances:
+                self.utterances[speaker_id] = self.create_utterance_buffer()
             self.first_nonsilent_audio_time[speaker_id] = chunk_time
             self.last_nonsilent_audio_time[speaker_id] = chunk_time
 
         # Add new audio data to buffer
         if chunk_bytes:
-            self.utterances[speaker_id].extend(chunk_bytes)
+            self.utterances[speaker_id].append(chunk_bytes)
 
         should_flush = False
         reason = None
@@ -88,25 +212,34 @@ class PerParticipantNonStreamingAudioInputManager:
                 reason = "silence_limit"
         else:
             self.last_nonsilent_audio_time[speaker_id] = chunk_time
+            self.speech_end_offsets[speaker_id] = len(self.utterances[speaker_id])
 
             logger.debug(f"Speaker {speaker_id} is speaking")
 
         # Flush buffer if needed
         if should_flush and len(self.utterances[speaker_id]) > 0:
-            participant = self.get_participant_callback(speaker_id)
-            if participant:
+            participant = self.get_participant_callback(speaker_id) if self.get_participant_callback else {}
+            if participant is not None:
+                # The audio may be a view into the speaker's buffer, so the callback must copy it if it keeps it
+                audio_data = self.utterances[speaker_id].view()
+                sample_rate = self.sample_rate
+                if self.audio_conditioner:
+                    conditioned_samples, sample_rate = self.audio_conditioner.condition(audio_data, sample_rate, self.speech_end_offsets.get(speaker_id))
+                    audio_data = memoryview(conditioned_samples).cast("B")
                 self.save_utterance_callback(
                     {
                         **participant,
-                        "audio_data": bytes(self.utterances[speaker_id]),
+                        "speaker_id": speaker_id,
+                        "audio_data": audio_data,
                         "timestamp_ms": int(self.first_nonsilent_audio_time[speaker_id].timestamp() * 1000),
                         "flush_reason": reason,
-                        "sample_rate": self.sample_rate,
+                        "sample_rate": sample_rate,
                     }
                 )
             else:
                 logger.warning(f"Participant {speaker_id} not found")
             # Clear the buffer
-            self.utterances[speaker_id] = bytearray()
+            self.utterances[speaker_id].clear()
             del self.first_nonsilent_audio_time[speaker_id]
             del self.last_nonsilent_audio_time[speaker_id]
+            self.speech_end_offsets.pop(speaker_id, None)
@@ -1,60 +1,77 @@
 import logging
 import queue
+import threading
 import time
 
-import numpy as np
-import webrtcvad
-
+from bots.credentials_utils import get_cached_credentials
 from bots.models import Credentials, TranscriptionProviders
 from bots.transcription_providers.deepgram.deepgram_streaming_transcriber import DeepgramStreamingTranscriber
 
+from .streaming_transcriber_pool import StreamingTranscriberPool
+from .voice_activity_detector import VoiceActivityDetector
+
 logger = logging.getLogger(__name__)
 
 
-def calculate_normalized_rms(audio_bytes):
-    samples = np.frombuffer(audio_bytes, dtype=np.int16)
-    rms = np.sqrt(np.mean(np.square(samples)))
-    # Normalize by max possible value for 16-bit audio (32768)
-    return rms / 32768
+class PerParticipantStreamingAudioInputManager:
+    """
+    Streams each speaker's audio to the transcription provider and turns the results into utterances. Final
+    results are collected per speaker until the provider detects the end of speech, then saved as one utterance
+    through save_utterance_callback. Every result, interim or final, is also passed to transcript_update_callback
+    as soon as it arrives. Both callbacks are called on the transcribers' receive threads.
+    """
 
+    # Final results that haven't been ended by the provider detecting the end of speech are saved after this long
+    PENDING_FINAL_RESULTS_TIMEOUT_SECONDS = 5
 
-class PerParticipantStreamingAudioInputManager:
-    def __init__(self, *, save_utterance_callback, get_participant_callback, sample_rate, transcription_provider, bot):
+    def __init__(self, *, save_utterance_callback, get_participant_callback, sample_rate, transcription_provider, bot, transcript_update_callback=None, max_connections=4, idle_timeout_seconds=60, replay_buffer_seconds=5, prewarm_connections=True):
         self.queue = queue.Queue()
 
         self.save_utterance_callback = save_utterance_callback
         self.get_participant_callback = get_participant_callback
+        self.transcript_update_callback = transcript_update_callback
+
+        # Final results for each speaker that haven't been saved as an utterance yet
+        self.pending_final_results = {}
+        self.pending_final_results_updated_at = {}
+        self.results_lock = threading.Lock()
 
         self.utterances = {}
         self.sample_rate = sample_rate
 
         self.last_nonsilent_audio_time = {}
 
+        # After this much silence, audio stops being sent. The speaker's connection is kept open until the pool's idle timeout.
         self.SILENCE_DURATION_LIMIT = 10  # seconds
 
-        self.vad = webrtcvad.Vad()
+        self.voice_activity_detector = VoiceActivityDetector(sample_rate=sample_rate, rms_threshold=0.0025)
         self.transcription_provider = transcription_provider
-        self.streaming_transcribers = {}
-        self.last_nonsilent_audio_time = {}
+        self.transcriber_pool = StreamingTranscriberPool(
+            create_transcriber=self.create_streaming_transcriber_for_speaker,
+            on_result=self.on_transcription_result,
+            bytes_per_second=sample_rate * 2,  # 2 bytes per sample
+            max_connections=max_connections,
+            idle_timeout_seconds=idle_timeout_seconds,
+            replay_buffer_max_bytes=int(replay_buffer_seconds * sample_rate * 2),  # 2 bytes per sample
+        )
+        # Open connections for participants whose audio we are receiving before they start talking
+        self.prewarm_connections = prewarm_connections
 
         self.project = bot.project
         self.bot = bot
         self.deepgram_api_key = self.get_deepgram_api_key()
 
     def silence_detected(self, chunk_bytes):
-        if calculate_normalized_rms(chunk_bytes) < 0.0025:
-            return True
-        return not self.vad.is_speech(chunk_bytes, self.sample_rate)
+        return not self.voice_activity_detector.is_speech(chunk_bytes)
 
     def get_deepgram_api_key(self):
-        deepgram_credentials_record = self.project.credentials.filter(credential_type=Credentials.CredentialTypes.DEEPGRAM).first()
-        if not deepgram_credentials_record:
+        deepgram_credentials = get_cached_credentials(self.project, Credentials.CredentialTypes.DEEPGRAM)
+        if not deepgram_credentials:
             return None
 
-        deepgram_credentials = deepgram_credentials_record.get_credentials()
         return deepgram_credentials["api_key"]
 
-    def create_streaming_transcriber(self, speaker_id, metadata):
+    def create_streaming_transcriber(self, speaker_id, metadata, on_result):
         logger.info(f"Creating streaming transcriber for speaker {speaker_id}")
         if self.transcription_provider == TranscriptionProviders.DEEPGRAM:
             metadata_list = [f"{key}:{value}" for key, value in metadata.items()] if metadata else None
@@ -66,15 +83,14 @@ class PerParticipantStreamingAudioInputManager:
                 callback=self.bot.deepgram_callback(),
                 sample_rate=self.sample_rate,
                 metadata=metadata_list,
+                on_result=on_result,
             )
         else:
             raise Exception(f"Unsupported transcription provider: {self.transcription_provider}")
 
-    def find_or_create_streaming_transcriber_for_speaker(self, speaker_id):
-        if speaker_id not in self.streaming_transcribers:
-            metadata = {"bot_id": self.bot.object_id, **(self.bot.metadata or {}), **self.get_participant_callback(speaker_id)}
-            self.streaming_transcribers[speaker_id] = self.create_streaming_transcriber(speaker_id, metadata)
-        return self.streaming_transcribers[speaker_id]
+    def create_streaming_transcriber_for_speaker(self, speaker_id, on_result):
+        metadata = {"bot_id": self.bot.object_id, **(self.bot.metadata or {}), **(self.get_participant_callback(speaker_id) or {})}
+        return self.create_streaming_transcriber(speaker_id, metadata, on_result)
 
     def add_chunk(self, speaker_id, chunk_time, chunk_bytes):
         if not self.deepgram_api_key:
@@ -83,28 +99,78 @@ class PerParticipantStreamingAudioInputManager:
         audio_is_silent = self.silence_detected(chunk_bytes)
 
         if not audio_is_silent:
-            self.last_nonsilent_audio_time[speaker_id] = time.time()
-
-        if audio_is_silent and speaker_id not in self.streaming_transcribers:
+            self.last_nonsilent_audio_time[speaker_id] = time.monotonic()
+        elif speaker_id not in self.last_nonsilent_audio_time or time.monotonic() - self.last_nonsilent_audio_time[speaker_id] > self.SILENCE_DURATION_LIMIT:
+            # Nothing to transcribe, so no audio is sent. Deepgram keepalives hold the connection open in the meantime.
+            if self.prewarm_connections:
+                self.transcriber_pool.prewarm(speaker_id)
             return
 
-        streaming_transcriber = self.find_or_create_streaming_transcriber_for_speaker(speaker_id)
-        streaming_transcriber.send(chunk_bytes)
+        self.transcriber_pool.send(speaker_id, chunk_bytes, int(chunk_time.timestamp() * 1000))
+
+    def on_transcription_result(self, speaker_id, result):
+        utterance = None
+        with self.results_lock:
+            pending_final_results = self.pending_final_results.get(speaker_id, [])
+            # Results can have an empty transcript, e.g. a final result that only marks the end of speech
+            has_transcript = bool(result["transcription"]["transcript"])
+            if result["is_final"]:
+                if has_transcript:
+                    pending_final_results = pending_final_results + [result]
+                    self.pending_final_results[speaker_id] = pending_final_results
+                    self.pending_final_results_updated_at[speaker_id] = time.monotonic()
+                if result["speech_final"]:
+                    utterance = self.pop_pending_utterance(speaker_id)
+
+            # Interim results only cover the audio since the last final result, so they are appended to the finals collected so far
+            transcript_results = pending_final_results + ([result] if has_transcript and not result["is_final"] else [])
+            transcript_update = None
+            if transcript_results:
+                transcript_update = {
+                    "speaker_id": speaker_id,
+                    "is_final": result["is_final"],
+                    "timestamp_ms": transcript_results[0]["timestamp_ms"],
+                    "transcript": " ".join(transcript_result["transcription"]["transcript"] for transcript_result in transcript_results),
+                }
+
+        if self.transcript_update_callback and transcript_update:
+            self.transcript_update_callback(transcript_update)
+        if utterance:
+            self.save_utterance_callback(utterance)
+
+    # Called with the results lock held
+    def pop_pending_utterance(self, speaker_id):
+        results = self.pending_final_results.pop(speaker_id, None)
+        self.pending_final_results_updated_at.pop(speaker_id, None)
+        if not results:
+            return None
+
+        first_result_start = results[0]["start"]
+        # Word timings are made relative to the start of the utterance, like the ones from non-streaming transcription
+        words = [{**word, "start": word["start"] - first_result_start, "end": word["end"] - first_result_start} for result in results for word in result["transcription"].get("words", [])]
+        return {
+            "speaker_id": speaker_id,
+            "timestamp_ms": results[0]["timestamp_ms"],
+            "duration_ms": int((results[-1]["start"] + results[-1]["duration"] - first_result_start) * 1000),
+            "transcription": {"transcript": " ".join(result["transcription"]["transcript"] for result in results), "words": words},
+        }
+
+    def save_pending_utterances(self, only_stale=False):
+        utterances = []
+        with self.results_lock:
+            for speaker_id in list(self.pending_final_results):
+                if only_stale and time.monotonic() - self.pending_final_results_updated_at[speaker_id] < self.PENDING_FINAL_RESULTS_TIMEOUT_SECONDS:
+                    continue
+                utterances.append(self.pop_pending_utterance(speaker_id))
+
+        for utterance in utterances:
+            self.save_utterance_callback(utterance)
 
     def monitor_transcription(self):
-        speakers_to_remove = []
-        for speaker_id, streaming_transcriber in self.streaming_transcribers.items():
-            if time.time() - self.last_nonsilent_audio_time[speaker_id] > self.SILENCE_DURATION_LIMIT:
-                streaming_transcriber.finish()
-                speakers_to_remove.append(speaker_id)
-                logger.info(f"Speaker {speaker_id} has been silent for too long, stopping streaming transcriber")
-
-        for speaker_id in speakers_to_remove:
-            del self.streaming_transcribers[speaker_id]
-
-        # If Number of streaming transcibers is greater than 4, then stop the oldest one
-        if len(self.streaming_transcribers) > 4:
-            oldest_transcriber = min(self.streaming_transcribers.values(), key=lambda x: x.last_send_time)
-            oldest_transcriber.finish()
-            del self.streaming_transcribers[oldest_transcriber.speaker_id]
-            logger.info(f"Stopped oldest streaming transcriber for speaker {oldest_transcriber.speaker_id}")
+        self.transcriber_pool.monitor()
+        self.save_pending_utterances(only_stale=True)
+
+    # Closing the connections makes the provider send its last results, so they are saved after the pool is closed
+    def close(self):
+        self.transcriber_pool.close()
+        self.save_pending_utterances()
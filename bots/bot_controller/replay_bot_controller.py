@@ -0,0 +1,140 @@
+import logging
+import os
+import queue
+import statistics
+import time
+
+from bots.models import TranscriptionProviders
+from bots.replay_bot_adapter import ReplayBotAdapter
+
+from .bot_controller import BotController
+
+logger = logging.getLogger(__name__)
+
+
+class InMemoryPubSub:
+    def __init__(self, in_memory_redis):
+        self.in_memory_redis = in_memory_redis
+        self.messages = queue.Queue()
+
+    def subscribe(self, channel):
+        self.in_memory_redis.subscribers.setdefault(channel, []).append(self)
+
+    def unsubscribe(self, channel):
+        subscribers = self.in_memory_redis.subscribers.get(channel, [])
+        if self in subscribers:
+            subscribers.remove(self)
+
+    def get_message(self, timeout=0.0):
+        try:
+            return self.messages.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        for channel in list(self.in_memory_redis.subscribers.keys()):
+            self.unsubscribe(channel)
+
+
+class InMemoryRedis:
+    """
+    Stands in for redis on the bot's command channel during a replay, so commands can be sent to the controller
+    without a redis server.
+    """
+
+    def __init__(self):
+        self.subscribers = {}
+
+    def pubsub(self):
+        return InMemoryPubSub(self)
+
+    def publish(self, channel, message):
+        data = message.encode("utf-8") if isinstance(message, str) else message
+        subscribers = list(self.subscribers.get(channel, []))
+        for subscriber in subscribers:
+            subscriber.messages.put({"type": "message", "channel": channel.encode("utf-8"), "data": data})
+        return len(subscribers)
+
+
+def summarize_durations_ms(durations_seconds):
+    durations_ms = sorted(duration_seconds * 1000 for duration_seconds in durations_seconds)
+    return {
+        "count": len(durations_ms),
+        "mean": round(statistics.mean(durations_ms), 3),
+        "p50": round(durations_ms[len(durations_ms) // 2], 3),
+        "p99": round(durations_ms[min(len(durations_ms) - 1, int(len(durations_ms) * 0.99))], 3),
+        "max": round(durations_ms[-1], 3),
+    }
+
+
+class ReplayBotController(BotController):
+    """
+    A bot controller that joins a replayed media trace instead of a real meeting. Used to benchmark the audio, caption and
+    video paths of the controller. The command channel uses an in-memory stand-in for redis, heartbeats only go to the
+    database and the recording file is deleted instead of being uploaded.
+    """
+
+    def __init__(self, bot_id, *, trace_file_path, speed):
+        super().__init__(bot_id)
+        self.trace_file_path = trace_file_path
+        self.speed = speed
+        self.run_finished_at = None
+
+    def get_bot_adapter(self):
+        callbacks = {
+            "upsert_caption": self.upsert_caption,
+            "upsert_chat_message": self.on_new_chat_message,
+            "add_participant_event": self.add_participant_event,
+        }
+        if self.get_recording_transcription_provider() != TranscriptionProviders.CLOSED_CAPTION_FROM_PLATFORM:
+            callbacks["add_audio_chunk"] = self.add_audio_chunk
+        if self.gstreamer_pipeline:
+            callbacks["add_video_frame"] = self.gstreamer_pipeline.on_new_video_frame
+            callbacks["add_mixed_audio_chunk"] = self.gstreamer_pipeline.on_mixed_audio_raw_data_received_callback
+
+        return ReplayBotAdapter(
+            trace_file_path=self.trace_file_path,
+            speed=self.speed,
+            send_message_callback=self.on_message_from_adapter,
+            callbacks=callbacks,
+        )
+
+    def connect_to_redis(self):
+        if self.pubsub:
+            self.pubsub.close()
+        if self.redis_client is None:
+            self.redis_client = InMemoryRedis()
+        self.pubsub = self.redis_client.pubsub()
+        self.pubsub.subscribe(self.pubsub_channel)
+
+    def set_bot_heartbeat(self):
+        if self.bot_in_db.first_heartbeat_timestamp is None:
+            self.bot_in_db.set_heartbeat()
+
+    def upload_recording_file(self):
+        recording_file_location = self.get_recording_file_location()
+        if os.path.exists(recording_file_location):
+            os.remove(recording_file_location)
+
+    def run(self):
+        try:
+            super().run()
+        finally:
+            self.run_finished_at = time.monotonic()
+
+    def replay_stats(self):
+        """
+        Returns throughput and latency numbers for the replay. callback_latency_ms is the time the controller took to
+        accept each record, and teardown_seconds is the time from the end of the trace until the bot finished cleaning up.
+        """
+        adapter = self.adapter
+        records_replayed = sum(adapter.records_replayed.values())
+        replay_duration_seconds = adapter.replay_duration_seconds or 0
+        return {
+            "records_replayed": adapter.records_replayed,
+            "replay_duration_seconds": round(replay_duration_seconds, 3),
+            "records_per_second": round(records_replayed / replay_duration_seconds, 1) if replay_duration_seconds else None,
+            "max_lag_seconds": round(adapter.max_lag_seconds, 3),
+            "callback_latency_ms": {callback_name: summarize_durations_ms(durations_seconds) for callback_name, durations_seconds in adapter.callback_durations_seconds.items()},
+            "teardown_seconds": round(self.run_finished_at - adapter.replay_finished_at, 3) if self.run_finished_at and adapter.replay_finished_at else None,
+        }
@@ -0,0 +1,226 @@
+import bisect
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+
+logger = logging.getLogger(__name__)
+
+
+class PooledStreamingConnection:
+    """
+    A streaming transcriber whose connection is opened on a background thread. Audio sent while it is connecting
+    is held in a replay buffer and sent as soon as the connection is up, so the start of what someone says isn't
+    lost to the connection setup.
+
+    Results are timed from the start of the audio sent on the connection. Audio isn't sent while the speaker is
+    silent, so the connection keeps anchors mapping offsets in the sent audio back to when that audio was captured.
+    """
+
+    CONNECTING = "connecting"
+    OPEN = "open"
+    CLOSED = "closed"
+
+    # A chunk captured this much later than the audio sent before it implies a gap, so it starts a new anchor
+    TIMING_ANCHOR_GAP_MS = 1000
+
+    def __init__(self, *, speaker_id, create_transcriber, on_result, bytes_per_second, replay_buffer_max_bytes):
+        self.speaker_id = speaker_id
+        self.on_result = on_result
+        self.bytes_per_second = bytes_per_second
+        self.transcriber = create_transcriber(speaker_id, self.on_transcriber_result)
+        self.replay_buffer_max_bytes = replay_buffer_max_bytes
+        self.replay_buffer = deque()
+        self.replay_buffer_bytes = 0
+        self.dropped_replay_bytes = 0
+        self.state = self.CONNECTING
+        self.connection_failed = False
+        self.lock = threading.Lock()
+
+        self.created_time = time.monotonic()
+        self.closed_time = None
+        # None until audio has been sent, so connections that were only warmed up are evicted first
+        self.last_send_time = None
+
+        self.bytes_transmitted = 0
+        # Offsets into the transmitted audio, and the capture timestamp of the audio at each offset
+        self.timing_anchor_offsets = []
+        self.timing_anchor_timestamps_ms = []
+
+    def start(self):
+        threading.Thread(target=self.connect, name=f"streaming_transcriber_connect_{self.speaker_id}", daemon=True).start()
+
+    def connect(self):
+        try:
+            self.transcriber.start()
+        except Exception as e:
+            logger.warning(f"Failed to open streaming transcriber connection for speaker {self.speaker_id}: {e}")
+            with self.lock:
+                self.state = self.CLOSED
+                self.connection_failed = True
+                self.closed_time = time.monotonic()
+                self.replay_buffer.clear()
+                self.replay_buffer_bytes = 0
+            return
+
+        with self.lock:
+            # The connection was closed while it was being opened
+            if self.state == self.CLOSED:
+                self.transcriber.finish()
+                return
+
+            while self.replay_buffer:
+                self.transmit(*self.replay_buffer.popleft())
+            self.replay_buffer_bytes = 0
+            self.state = self.OPEN
+
+        if self.dropped_replay_bytes:
+            logger.warning(f"Replay buffer for speaker {self.speaker_id} overflowed while connecting, dropped {self.dropped_replay_bytes} bytes of audio")
+
+    # Called with the lock held
+    def transmit(self, chunk_bytes, timestamp_ms):
+        if self.timing_anchor_offsets:
+            expected_timestamp_ms = self.stream_offset_to_timestamp_ms(self.bytes_transmitted)
+            start_new_anchor = timestamp_ms - expected_timestamp_ms > self.TIMING_ANCHOR_GAP_MS
+        else:
+            start_new_anchor = True
+        if start_new_anchor:
+            self.timing_anchor_offsets.append(self.bytes_transmitted)
+            self.timing_anchor_timestamps_ms.append(timestamp_ms)
+
+        self.transcriber.send(chunk_bytes)
+        self.bytes_transmitted += len(chunk_bytes)
+
+    # Called with the lock held
+    def stream_offset_to_timestamp_ms(self, offset):
+        anchor_index = max(bisect.bisect_right(self.timing_anchor_offsets, offset) - 1, 0)
+        return self.timing_anchor_timestamps_ms[anchor_index] + (offset - self.timing_anchor_offsets[anchor_index]) * 1000 / self.bytes_per_second
+
+    def send(self, chunk_bytes, timestamp_ms):
+        with self.lock:
+            self.last_send_time = time.monotonic()
+            if self.state == self.OPEN:
+                self.transmit(chunk_bytes, timestamp_ms)
+            elif self.state == self.CONNECTING:
+                self.replay_buffer.append((chunk_bytes, timestamp_ms))
+                self.replay_buffer_bytes += len(chunk_bytes)
+                while self.replay_buffer_bytes > self.replay_buffer_max_bytes:
+                    dropped_chunk, _ = self.replay_buffer.popleft()
+                    self.replay_buffer_bytes -= len(dropped_chunk)
+                    self.dropped_replay_bytes += len(dropped_chunk)
+
+    # Called on the transcriber's receive thread
+    def on_transcriber_result(self, result):
+        with self.lock:
+            if not self.timing_anchor_offsets:
+                return
+            timestamp_ms = int(self.stream_offset_to_timestamp_ms(result["start"] * self.bytes_per_second))
+        self.on_result(self.speaker_id, {**result, "timestamp_ms": timestamp_ms})
+
+    def last_used_time(self):
+        return self.last_send_time or self.created_time
+
+    def finish(self):
+        with self.lock:
+            was_open = self.state == self.OPEN
+            self.state = self.CLOSED
+            self.closed_time = time.monotonic()
+            self.replay_buffer.clear()
+            self.replay_buffer_bytes = 0
+        if was_open:
+            self.transcriber.finish()
+
+
+class StreamingTranscriberPool:
+    """
+    Keeps one streaming transcriber connection per speaker and reuses it across that speaker's utterances, instead
+    of reconnecting every time they start talking again. Connections stay open through silences until they have
+    been idle for idle_timeout_seconds. When the pool is full, the least recently used connection is closed.
+
+    Connections can be warmed up for speakers who haven't said anything yet, but only with spare capacity, so warming
+    never closes a connection that is in use.
+
+    send and prewarm are called from the adapter's audio thread, and monitor from the main loop. on_result is called
+    on the transcribers' receive threads, with the capture timestamp of the start of each result added.
+    """
+
+    # How long to wait before retrying a speaker whose connection failed to open
+    RECONNECT_DELAY_SECONDS = 1
+
+    def __init__(self, *, create_transcriber, on_result, bytes_per_second, max_connections, idle_timeout_seconds, replay_buffer_max_bytes):
+        self.create_transcriber = create_transcriber
+        self.on_result = on_result
+        self.bytes_per_second = bytes_per_second
+        self.max_connections = max_connections
+        self.idle_timeout_seconds = idle_timeout_seconds
+        self.replay_buffer_max_bytes = replay_buffer_max_bytes
+
+        # Ordered from least to most recently used
+        self.connections = OrderedDict()
+        # Speakers are only warmed up once, so a silent participant doesn't get a new connection every time theirs times out
+        self.prewarmed_speaker_ids = set()
+        self.lock = threading.Lock()
+
+    def open_connection(self, speaker_id):
+        connection = PooledStreamingConnection(
+            speaker_id=speaker_id,
+            create_transcriber=self.create_transcriber,
+            on_result=self.on_result,
+            bytes_per_second=self.bytes_per_second,
+            replay_buffer_max_bytes=self.replay_buffer_max_bytes,
+        )
+        connection.start()
+        self.connections[speaker_id] = connection
+        return connection
+
+    def make_room_for_connection(self):
+        while len(self.connections) >= self.max_connections:
+            # Prefer connections that were only warmed up, then the least recently used
+            evicted_speaker_id, evicted_connection = min(self.connections.items(), key=lambda item: (item[1].last_send_time is not None, item[1].last_used_time()))
+            del self.connections[evicted_speaker_id]
+            evicted_connection.finish()
+            logger.info(f"Streaming transcriber pool is full, closed the connection for speaker {evicted_speaker_id}")
+
+    def send(self, speaker_id, chunk_bytes, timestamp_ms):
+        with self.lock:
+            connection = self.connections.get(speaker_id)
+            if connection and connection.state == PooledStreamingConnection.CLOSED:
+                if connection.connection_failed and time.monotonic() - connection.closed_time < self.RECONNECT_DELAY_SECONDS:
+                    return
+                del self.connections[speaker_id]
+                connection = None
+
+            if connection is None:
+                self.make_room_for_connection()
+                logger.info(f"Opening streaming transcriber connection for speaker {speaker_id}")
+                connection = self.open_connection(speaker_id)
+            self.connections.move_to_end(speaker_id)
+
+        connection.send(chunk_bytes, timestamp_ms)
+
+    def prewarm(self, speaker_id):
+        with self.lock:
+            if speaker_id in self.prewarmed_speaker_ids or speaker_id in self.connections or len(self.connections) >= self.max_connections:
+                return
+            self.prewarmed_speaker_ids.add(speaker_id)
+            logger.info(f"Warming up streaming transcriber connection for speaker {speaker_id}")
+            self.open_connection(speaker_id)
+
+    def monitor(self):
+        with self.lock:
+            now = time.monotonic()
+            for speaker_id, connection in list(self.connections.items()):
+                if connection.state == PooledStreamingConnection.CLOSED:
+                    if not connection.connection_failed or now - connection.closed_time >= self.RECONNECT_DELAY_SECONDS:
+                        del self.connections[speaker_id]
+                elif now - connection.last_used_time() > self.idle_timeout_seconds:
+                    del self.connections[speaker_id]
+                    connection.finish()
+                    logger.info(f"Streaming transcriber connection for speaker {speaker_id} has been idle for too long, closing it")
+
+    def close(self):
+        with self.lock:
+            connections = list(self.connections.values())
+            self.connections.clear()
+        for connection in connections:
+            connection.finish()
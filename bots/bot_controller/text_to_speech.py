@@ -2,9 +2,14 @@ import json
 
 from google.cloud import texttospeech
 
+from bots.credentials_utils import get_cached_credentials_client
 from bots.models import Credentials
 
 
+def build_text_to_speech_client(google_tts_credentials):
+    return texttospeech.TextToSpeechClient.from_service_account_info(json.loads(google_tts_credentials.get("service_account_json", {})))
+
+
 def generate_audio_from_text(bot, text, settings, sample_rate):
     """
     Generate audio from text using text-to-speech settings.
@@ -24,19 +29,17 @@ def generate_audio_from_text(bot, text, settings, sample_rate):
     """
 
     # Additional providers will be added, for now we only support Google TTS
-    google_tts_credentials = bot.project.credentials.filter(credential_type=Credentials.CredentialTypes.GOOGLE_TTS).first()
-
-    if not google_tts_credentials:
-        raise ValueError("Could not find Google Text-to-Speech credentials.")
-
     try:
-        # Create client with credentials
-        client = texttospeech.TextToSpeechClient.from_service_account_info(json.loads(google_tts_credentials.get_credentials().get("service_account_json", {})))
+        # The client is reused across requests until the credentials change
+        client = get_cached_credentials_client(bot.project, Credentials.CredentialTypes.GOOGLE_TTS, "text_to_speech_client", build_text_to_speech_client)
     except (ValueError, json.JSONDecodeError) as e:
         raise ValueError("Invalid Google Text-to-Speech credentials format: " + str(e)) from e
     except Exception as e:
         raise ValueError("Failed to initialize Google Text-to-Speech client: " + str(e)) from e
 
+    if client is None:
+        raise ValueError("Could not find Google Text-to-Speech credentials.")
+
     # Set up text input
     synthesis_input = texttospeech.SynthesisInput(text=text)
 
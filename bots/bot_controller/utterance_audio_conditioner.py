@@ -0,0 +1,77 @@
+import math
+
+import numpy as np
+
+# Number of taps in the low pass filter applied before downsampling
+RESAMPLING_FILTER_TAPS = 63
+# Largest gain applied when normalizing, so quiet background noise isn't blown up to full volume
+MAX_NORMALIZATION_GAIN = 10
+NORMALIZATION_TARGET_PEAK = 0.9 * 32767
+
+
+def low_pass_filter(cutoff):
+    """
+    Windowed sinc filter with its cutoff in cycles per sample, normalized to unit gain.
+    """
+    n = np.arange(RESAMPLING_FILTER_TAPS) - (RESAMPLING_FILTER_TAPS - 1) / 2
+    taps = 2 * cutoff * np.sinc(2 * cutoff * n) * np.hamming(RESAMPLING_FILTER_TAPS)
+    return taps / np.sum(taps)
+
+
+def resample(samples, input_sample_rate, output_sample_rate):
+    """
+    Resamples float samples. Downsampling filters out the frequencies the output rate can't represent first, so
+    they don't alias. Integer ratios, like 48kHz or 32kHz to 16kHz, just keep every nth filtered sample.
+    """
+    if input_sample_rate == output_sample_rate or len(samples) == 0:
+        return samples
+
+    if output_sample_rate < input_sample_rate:
+        samples = np.convolve(samples, low_pass_filter(0.5 * output_sample_rate / input_sample_rate), mode="same")
+
+    divisor = math.gcd(input_sample_rate, output_sample_rate)
+    if output_sample_rate // divisor == 1:
+        return samples[:: input_sample_rate // divisor]
+
+    output_length = int(len(samples) * output_sample_rate / input_sample_rate)
+    output_positions = np.arange(output_length) * (input_sample_rate / output_sample_rate)
+    return np.interp(output_positions, np.arange(len(samples)), samples)
+
+
+class UtteranceAudioConditioner:
+    """
+    Prepares a completed utterance's 16 bit PCM audio for storage and transcription. Trailing silence after the
+    last chunk with speech is trimmed, the audio is resampled to the rate transcription providers use, and the
+    level can optionally be normalized. Leading silence never makes it into an utterance in the first place.
+    """
+
+    def __init__(self, *, output_sample_rate=None, trailing_silence_to_keep_seconds=None, normalize=False):
+        # None keeps the platform's sample rate
+        self.output_sample_rate = output_sample_rate
+        # None keeps all of the trailing silence. A little is kept by default so the end of the last word isn't clipped.
+        self.trailing_silence_to_keep_seconds = trailing_silence_to_keep_seconds
+        self.normalize = normalize
+
+    def condition(self, audio_data, sample_rate, speech_end_offset):
+        """
+        Takes the utterance's audio and the byte offset where its last speech ended, and returns the conditioned
+        audio as int16 samples along with their sample rate.
+        """
+        samples = np.frombuffer(audio_data, dtype=np.int16)
+
+        if self.trailing_silence_to_keep_seconds is not None and speech_end_offset is not None:
+            end_sample = speech_end_offset // 2 + int(self.trailing_silence_to_keep_seconds * sample_rate)
+            samples = samples[:end_sample]
+
+        output_sample_rate = self.output_sample_rate or sample_rate
+        if output_sample_rate == sample_rate and not self.normalize:
+            return samples, sample_rate
+
+        conditioned_samples = resample(samples.astype(np.float32), sample_rate, output_sample_rate)
+
+        if self.normalize and len(conditioned_samples):
+            peak = np.max(np.abs(conditioned_samples))
+            if peak > 0:
+                conditioned_samples = conditioned_samples * min(NORMALIZATION_TARGET_PEAK / peak, MAX_NORMALIZATION_GAIN)
+
+        return np.clip(np.round(conditioned_samples), -32768, 32767).astype(np.int16), output_sample_rate
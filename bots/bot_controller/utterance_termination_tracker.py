@@ -0,0 +1,67 @@
+import json
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class UtteranceTerminationTracker:
+    """
+    Keeps track of the utterances that the transcription workers have finished with, as announced on the bot's redis
+    channel. Post-processing blocks on these notifications instead of polling the database, so it finishes as soon
+    as the last utterance is terminated.
+
+    The notifications arrive on the redis listener thread, not the main loop, because the main loop has already quit
+    by the time post-processing runs.
+    """
+
+    def __init__(self, *, database_recheck_interval_seconds):
+        self.database_recheck_interval_seconds = database_recheck_interval_seconds
+        self.condition = threading.Condition()
+        self.terminated_utterance_ids = set()
+
+    # Returns True if the message was an utterance termination notification
+    def handle_redis_message(self, message):
+        if not message or message["type"] != "message":
+            return False
+        data = json.loads(message["data"].decode("utf-8"))
+        if data.get("command") != "utterance_terminated":
+            return False
+        self.on_utterance_terminated(data["utterance_id"])
+        return True
+
+    def on_utterance_terminated(self, utterance_id):
+        with self.condition:
+            self.terminated_utterance_ids.add(utterance_id)
+            self.condition.notify_all()
+
+    def wait_until_terminated(self, get_outstanding_utterance_ids, timeout_seconds):
+        """
+        Waits until every utterance returned by get_outstanding_utterance_ids has been terminated. The database is
+        only queried again every database_recheck_interval_seconds, to pick up a notification that was missed, for
+        example while the redis connection was being re-established. Returns False if it timed out.
+        """
+        start_time = time.monotonic()
+        deadline = start_time + timeout_seconds
+        outstanding_utterance_ids = set(get_outstanding_utterance_ids())
+        last_database_check_time = start_time
+
+        while True:
+            with self.condition:
+                outstanding_utterance_ids -= self.terminated_utterance_ids
+                if not outstanding_utterance_ids:
+                    return True
+
+                now = time.monotonic()
+                if now >= deadline:
+                    return False
+
+                logger.info(f"Waiting for {len(outstanding_utterance_ids)} utterances to terminate. It has been {now - start_time:.1f} seconds. We will wait {timeout_seconds} seconds.")
+                next_database_check_time = last_database_check_time + self.database_recheck_interval_seconds
+                self.condition.wait(max(0, min(deadline, next_database_check_time) - now))
+
+            now = time.monotonic()
+            if now >= last_database_check_time + self.database_recheck_interval_seconds:
+                outstanding_utterance_ids = set(get_outstanding_utterance_ids())
+                last_database_check_time = now
@@ -0,0 +1,75 @@
+import numpy as np
+import webrtcvad
+
+# webrtcvad only accepts frames of exactly these durations
+VAD_FRAME_DURATIONS_MS = [30, 20, 10]
+
+
+class VoiceActivityDetector:
+    """
+    Decides which chunks of a speaker's 16 bit PCM audio contain speech. Chunks are whatever size the platform
+    delivered, so they are concatenated and re-framed into frames that webrtcvad accepts. The energy of every
+    frame is computed in one vectorized pass, and only frames loud enough to be speech are passed to webrtcvad.
+    """
+
+    def __init__(self, *, sample_rate, rms_threshold):
+        self.sample_rate = sample_rate
+        # Frames with a normalized RMS below this are treated as silence without asking webrtcvad
+        self.rms_threshold = rms_threshold
+        self.vad = webrtcvad.Vad()
+
+    def frame_size_in_samples(self, total_samples):
+        # Use the longest frame that fits in the audio, so short batches still get a valid frame
+        for frame_duration_ms in VAD_FRAME_DURATIONS_MS:
+            frame_size = self.sample_rate * frame_duration_ms // 1000
+            if frame_size <= total_samples:
+                return frame_size
+        return self.sample_rate * VAD_FRAME_DURATIONS_MS[-1] // 1000
+
+    def detect_speech_in_frames(self, samples):
+        """
+        Splits the samples into VAD frames and returns the frame size and a speech flag per frame. If the samples
+        don't divide evenly, the last frame is the final frame_size samples, so it overlaps the one before it.
+        """
+        frame_size = self.frame_size_in_samples(len(samples))
+        if len(samples) < frame_size:
+            samples = np.concatenate([samples, np.zeros(frame_size - len(samples), dtype=np.int16)])
+
+        full_frame_count = len(samples) // frame_size
+        frames = samples[: full_frame_count * frame_size].reshape(full_frame_count, frame_size)
+        if len(samples) % frame_size:
+            frames = np.vstack([frames, samples[-frame_size:]])
+
+        # Normalize by max possible value for 16-bit audio (32768)
+        frame_rms = np.sqrt(np.mean(np.square(frames, dtype=np.float64), axis=1)) / 32768
+        speech_flags = np.zeros(len(frames), dtype=bool)
+        for frame_index in np.flatnonzero(frame_rms >= self.rms_threshold):
+            speech_flags[frame_index] = self.vad.is_speech(frames[frame_index].tobytes(), self.sample_rate)
+        return frame_size, speech_flags
+
+    def detect_speech(self, chunks):
+        """
+        Takes a list of consecutive audio chunks from one speaker and returns a list with True for each chunk
+        that overlaps a frame containing speech.
+        """
+        if not chunks:
+            return []
+
+        samples = np.frombuffer(b"".join(chunks), dtype=np.int16)
+        frame_size, speech_flags = self.detect_speech_in_frames(samples)
+        full_frame_count = len(samples) // frame_size
+
+        chunk_sample_counts = np.array([len(chunk) // 2 for chunk in chunks])
+        chunk_ends = np.cumsum(chunk_sample_counts)
+        chunk_starts = chunk_ends - chunk_sample_counts
+        # Chunks past the last full frame only overlap the trailing frame. Chunks that reach past it overlap it too.
+        last_full_frame = max(full_frame_count - 1, 0)
+        trailing_frame = len(speech_flags) - 1
+        first_frames = np.where(chunk_starts >= full_frame_count * frame_size, trailing_frame, np.minimum(chunk_starts // frame_size, last_full_frame))
+        last_frames = np.where(chunk_ends > full_frame_count * frame_size, trailing_frame, np.minimum(np.maximum(chunk_ends - 1, 0) // frame_size, last_full_frame))
+
+        speech_frame_counts = np.concatenate([[0], np.cumsum(speech_flags)])
+        return (speech_frame_counts[last_frames + 1] - speech_frame_counts[first_frames] > 0).tolist()
+
+    def is_speech(self, chunk_bytes):
+        return self.detect_speech([chunk_bytes])[0]
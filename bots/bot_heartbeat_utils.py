@@ -0,0 +1,84 @@
+import logging
+
+import redis
+from django.db.models import Case, F, IntegerField, Value, When
+from django.db.models.functions import Greatest
+
+from bots.redis_utils import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT_KEY_PREFIX = "bot_heartbeat:"
+# Long enough to outlive the heartbeat timeout used by the clean up command, so an expired key means the bot is gone
+HEARTBEAT_KEY_TTL_SECONDS = 900
+SYNC_BATCH_SIZE = 1000
+
+
+def heartbeat_key(bot_id):
+    return f"{HEARTBEAT_KEY_PREFIX}{bot_id}"
+
+
+def write_heartbeat_to_redis(bot_id, timestamp):
+    get_redis_client().set(heartbeat_key(bot_id), timestamp, ex=HEARTBEAT_KEY_TTL_SECONDS)
+
+
+def get_heartbeat_timestamps_from_redis(bot_ids):
+    """
+    Returns a dict mapping bot id to the last heartbeat timestamp stored in redis. Bots without a live key are omitted.
+    """
+    bot_ids = list(bot_ids)
+    if not bot_ids:
+        return {}
+    values = get_redis_client().mget([heartbeat_key(bot_id) for bot_id in bot_ids])
+    return {bot_id: int(value) for bot_id, value in zip(bot_ids, values) if value is not None}
+
+
+def update_database_heartbeats(heartbeat_timestamps):
+    """
+    Copies heartbeat timestamps into the bots table. Heartbeats only ever move forward, so a value from redis never
+    overwrites a newer one in the database. This uses a queryset update, which doesn't bump the bot's version field,
+    so it never conflicts with the bot pod's own writes.
+    """
+    from bots.models import Bot, BotEventManager
+
+    bot_ids = list(heartbeat_timestamps.keys())
+    updated_count = 0
+    for i in range(0, len(bot_ids), SYNC_BATCH_SIZE):
+        batch = bot_ids[i : i + SYNC_BATCH_SIZE]
+        new_last_heartbeat_timestamp = Case(*[When(id=bot_id, then=Value(heartbeat_timestamps[bot_id])) for bot_id in batch], output_field=IntegerField())
+        updated_count += Bot.objects.filter(~BotEventManager.get_post_meeting_states_q_filter(), id__in=batch).update(last_heartbeat_timestamp=Greatest(F("last_heartbeat_timestamp"), new_last_heartbeat_timestamp))
+    return updated_count
+
+
+def sync_bot_heartbeats_to_database():
+    """
+    Copies every live heartbeat in redis into the bots table. Returns the number of bots updated.
+    """
+    redis_client = get_redis_client()
+    bot_ids = [int(key.decode("utf-8").removeprefix(HEARTBEAT_KEY_PREFIX)) for key in redis_client.scan_iter(match=f"{HEARTBEAT_KEY_PREFIX}*", count=SYNC_BATCH_SIZE)]
+    heartbeat_timestamps = get_heartbeat_timestamps_from_redis(bot_ids)
+    if not heartbeat_timestamps:
+        return 0
+    return update_database_heartbeats(heartbeat_timestamps)
+
+
+def sync_bot_heartbeat_from_redis(bot):
+    """
+    Pulls the latest heartbeat for a single bot out of redis and into the bot instance, so that the bot's duration
+    is accurate when it leaves the meeting. Fails open: if redis is unavailable, the database value is used as is.
+    """
+    try:
+        redis_heartbeat_timestamp = get_heartbeat_timestamps_from_redis([bot.id]).get(bot.id)
+    except redis.exceptions.RedisError as e:
+        logger.warning(f"Failed to read heartbeat from redis for bot {bot.object_id}: {e}")
+        return
+
+    if redis_heartbeat_timestamp is None:
+        return
+    if bot.last_heartbeat_timestamp is not None and bot.last_heartbeat_timestamp >= redis_heartbeat_timestamp:
+        return
+
+    from bots.models import Bot
+
+    bot.last_heartbeat_timestamp = redis_heartbeat_timestamp
+    Bot.objects.filter(id=bot.id).update(last_heartbeat_timestamp=redis_heartbeat_timestamp)
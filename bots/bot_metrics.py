@@ -0,0 +1,207 @@
+import bisect
+import logging
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DURATION_BUCKETS_SECONDS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def format_labels(label_names, label_values, extra_labels=()):
+    labels = list(zip(label_names, label_values)) + list(extra_labels)
+    if not labels:
+        return ""
+    escaped_labels = [(name, str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')) for name, value in labels]
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped_labels) + "}"
+
+
+def format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    metric_type = None
+
+    def __init__(self, name, documentation, label_names):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def label_values(self, labels):
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"Metric {self.name} expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[label_name]) for label_name in self.label_names)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        with self.lock:
+            values = list(self.values.items())
+        for label_values, value in values:
+            lines.extend(self.render_sample(label_values, value))
+        return lines
+
+    def render_sample(self, label_values, value):
+        return [f"{self.name}{format_labels(self.label_names, label_values)} {format_value(value)}"]
+
+
+class Counter(Metric):
+    metric_type = "counter"
+
+    def inc(self, amount=1, **labels):
+        label_values = self.label_values(labels)
+        with self.lock:
+            self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def get(self, **labels):
+        return self.values.get(self.label_values(labels), 0)
+
+
+class Gauge(Metric):
+    metric_type = "gauge"
+
+    def set(self, value, **labels):
+        label_values = self.label_values(labels)
+        with self.lock:
+            self.values[label_values] = value
+
+    def get(self, **labels):
+        return self.values.get(self.label_values(labels))
+
+
+class HistogramValue:
+    def __init__(self, bucket_count):
+        # One count per bucket, plus one for +Inf
+        self.bucket_counts = [0] * (bucket_count + 1)
+        self.sum = 0
+        self.count = 0
+
+
+class Histogram(Metric):
+    metric_type = "histogram"
+
+    def __init__(self, name, documentation, label_names, buckets):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        label_values = self.label_values(labels)
+        bucket_index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            histogram_value = self.values.get(label_values)
+            if histogram_value is None:
+                histogram_value = self.values[label_values] = HistogramValue(len(self.buckets))
+            histogram_value.bucket_counts[bucket_index] += 1
+            histogram_value.sum += value
+            histogram_value.count += 1
+
+    def get(self, **labels):
+        return self.values.get(self.label_values(labels))
+
+    def render_sample(self, label_values, histogram_value):
+        lines = []
+        cumulative_count = 0
+        for upper_bound, bucket_count in zip(self.buckets + (float("inf"),), histogram_value.bucket_counts):
+            cumulative_count += bucket_count
+            lines.append(f"{self.name}_bucket{format_labels(self.label_names, label_values, [('le', format_value(upper_bound))])} {cumulative_count}")
+        lines.append(f"{self.name}_sum{format_labels(self.label_names, label_values)} {format_value(histogram_value.sum)}")
+        lines.append(f"{self.name}_count{format_labels(self.label_names, label_values)} {histogram_value.count}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    A small in-process registry of counters, gauges and histograms that renders in the Prometheus text format.
+    Updates take a lock per metric, so they are cheap enough to call for every audio chunk and video frame.
+    """
+
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def register(self, metric):
+        with self.lock:
+            if metric.name in self.metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, label_names=()):
+        return self.register(Counter(name, documentation, label_names))
+
+    def gauge(self, name, documentation, label_names=()):
+        return self.register(Gauge(name, documentation, label_names))
+
+    def histogram(self, name, documentation, label_names=(), buckets=DEFAULT_DURATION_BUCKETS_SECONDS):
+        return self.register(Histogram(name, documentation, label_names, buckets))
+
+    def render_prometheus_text(self):
+        with self.lock:
+            metrics = list(self.metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+main_loop_task_duration_seconds = registry.histogram("bot_main_loop_task_duration_seconds", "Time spent running a main loop task", ["task"])
+main_loop_task_db_queries = registry.histogram("bot_main_loop_task_db_queries", "Database queries made by one run of a main loop task", ["task"], buckets=(0, 1, 2, 5, 10, 25, 50, 100))
+per_participant_audio_queue_depth = registry.gauge("bot_per_participant_audio_queue_depth", "Per participant audio chunks waiting to be processed")
+per_participant_audio_dropped_chunks_total = registry.counter("bot_per_participant_audio_dropped_chunks_total", "Per participant audio chunks dropped because a speaker's queue was full")
+per_participant_audio_speakers_with_pending_audio = registry.gauge("bot_per_participant_audio_speakers_with_pending_audio", "Speakers with an utterance that hasn't been saved yet")
+websocket_messages_total = registry.counter("bot_websocket_messages_total", "Messages received from the browser over the websocket", ["type"])
+websocket_message_bytes_total = registry.counter("bot_websocket_message_bytes_total", "Bytes received from the browser over the websocket", ["type"])
+video_frame_scale_duration_seconds = registry.histogram("bot_video_frame_scale_duration_seconds", "Time spent scaling an incoming video frame to the recording dimensions", buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1))
+gstreamer_queue_level_buffers = registry.gauge("bot_gstreamer_queue_level_buffers", "Buffers in a GStreamer queue", ["queue"])
+gstreamer_queue_level_seconds = registry.gauge("bot_gstreamer_queue_level_seconds", "Seconds of media in a GStreamer queue", ["queue"])
+gstreamer_queue_fill_ratio = registry.gauge("bot_gstreamer_queue_fill_ratio", "Fill level of a GStreamer queue relative to its tightest limit", ["queue"])
+gstreamer_queue_dropped_buffers_total = registry.counter("bot_gstreamer_queue_dropped_buffers_total", "Buffers dropped because a GStreamer queue was full", ["queue"])
+webhook_enqueue_latency_seconds = registry.histogram("bot_webhook_enqueue_latency_seconds", "Time from triggering a webhook until its delivery task is enqueued")
+
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        body = registry.render_prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", PROMETHEUS_CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    # Scrapes would otherwise be written to stderr
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port):
+    server = ThreadingHTTPServer(("0.0.0.0", port), MetricsRequestHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logger.info(f"Serving bot metrics on port {server.server_address[1]}")
+    return server
+
+
+def start_metrics_server_if_configured():
+    """
+    Serves the registry at /metrics if BOT_METRICS_PORT is set. Returns the server, or None if metrics are disabled
+    or the server couldn't be started. Metrics are best effort, so failing to start never stops the bot.
+    """
+    port = os.getenv("BOT_METRICS_PORT")
+    if not port:
+        return None
+    try:
+        return start_metrics_server(int(port))
+    except (OSError, ValueError) as e:
+        logger.warning(f"Failed to start bot metrics server on port {port}: {e}")
+        return None
@@ -3,7 +3,6 @@ import logging
 import os
 from enum import Enum
 
-import redis
 from django.core.exceptions import ValidationError
 from django.db import transaction
 from django.urls import reverse
@@ -23,6 +22,7 @@ from .models import (
     Recording,
     TranscriptionTypes,
 )
+from .redis_utils import get_redis_client
 from .serializers import (
     CreateBotSerializer,
 )
@@ -32,13 +32,23 @@ logger = logging.getLogger(__name__)
 
 
 def send_sync_command(bot, command="sync"):
-    redis_url = os.getenv("REDIS_URL") + ("?ssl_cert_reqs=none" if os.getenv("DISABLE_REDIS_SSL") else "")
-    redis_client = redis.from_url(redis_url)
+    redis_client = get_redis_client()
     channel = f"bot_{bot.id}"
     message = {"command": command}
     redis_client.publish(channel, json.dumps(message))
 
 
+def send_sync_commands(bots, command="sync"):
+    """
+    Sends the same command to many bots, with all the publishes pipelined into a single round trip.
+    """
+    message = json.dumps({"command": command})
+    pipeline = get_redis_client().pipeline(transaction=False)
+    for bot in bots:
+        pipeline.publish(f"bot_{bot.id}", message)
+    pipeline.execute()
+
+
 def create_bot_chat_message_request(bot, chat_message_data):
     """
     Creates a BotChatMessageRequest for the given bot with the provided data.
@@ -0,0 +1,87 @@
+import os
+import threading
+import time
+
+# Decrypted credentials are cached per process, so transcribing an utterance or generating speech doesn't need a
+# query and a decrypt every time. Credentials saved in this process are invalidated right away. Other processes
+# pick up the change when their entry expires.
+_cache = {}
+_cache_pid = None
+_cache_lock = threading.Lock()
+
+
+def credentials_cache_ttl_seconds():
+    return int(os.getenv("CREDENTIALS_CACHE_TTL_SECONDS", "60"))
+
+
+class CachedCredentials:
+    def __init__(self, credentials, expires_at):
+        self.credentials = credentials
+        self.expires_at = expires_at
+        # Clients built from these credentials, keyed by name. They are only rebuilt if the credentials change.
+        self.clients = {}
+
+
+def _get_entry(project, credential_type):
+    global _cache_pid
+    key = (project.id, credential_type)
+    now = time.monotonic()
+    with _cache_lock:
+        # Clients can hold sockets, which can't be shared with a forked process
+        if _cache_pid != os.getpid():
+            _cache.clear()
+            _cache_pid = os.getpid()
+        entry = _cache.get(key)
+        if entry and entry.expires_at > now:
+            return entry
+
+    credentials_record = project.credentials.filter(credential_type=credential_type).first()
+    credentials = credentials_record.get_credentials() if credentials_record else None
+    if not credentials:
+        # Missing credentials aren't cached, so they are picked up as soon as they are added
+        return None
+
+    with _cache_lock:
+        current_entry = _cache.get(key)
+        new_entry = CachedCredentials(credentials, now + credentials_cache_ttl_seconds())
+        if current_entry and current_entry.credentials == credentials:
+            new_entry.clients = current_entry.clients
+        _cache[key] = new_entry
+        return new_entry
+
+
+def get_cached_credentials(project, credential_type):
+    """
+    Returns the project's decrypted credentials of the given type, or None if it doesn't have any.
+    """
+    entry = _get_entry(project, credential_type)
+    return entry.credentials if entry else None
+
+
+def get_cached_credentials_client(project, credential_type, client_name, build_client):
+    """
+    Returns a client built from the project's credentials by build_client(credentials), reusing it for as long as
+    the credentials don't change. Returns None if the project doesn't have credentials of the given type.
+    """
+    entry = _get_entry(project, credential_type)
+    if entry is None:
+        return None
+
+    with _cache_lock:
+        client = entry.clients.get(client_name)
+    if client is None:
+        # Built outside the lock, since it can be slow. If two threads race, one of the clients is dropped.
+        client = build_client(entry.credentials)
+        with _cache_lock:
+            client = entry.clients.setdefault(client_name, client)
+    return client
+
+
+def invalidate_cached_credentials(project_id, credential_type):
+    with _cache_lock:
+        _cache.pop((project_id, credential_type), None)
+
+
+def clear_credentials_cache():
+    with _cache_lock:
+        _cache.clear()
@@ -747,7 +747,8 @@ class WebSocketClient {
       VIDEO: 2,
       AUDIO: 3,
       ENCODED_MP4_CHUNK: 4,
-      PER_PARTICIPANT_AUDIO: 5
+      PER_PARTICIPANT_AUDIO: 5,
+      PER_PARTICIPANT_AUDIO_INT16: 6
   };
 
   constructor() {
@@ -773,6 +774,10 @@ class WebSocketClient {
       };
 
       this.mediaSendingEnabled = false;
+
+      // Per participant audio is tagged with a small integer instead of the participant id, which is only sent
+      // once, in a PerParticipantAudioStreamAssignment message
+      this.perParticipantAudioStreamIds = new Map();
       
       /*
       We no longer need this because we're not using MediaStreamTrackProcessor's
@@ -936,6 +941,21 @@ class WebSocketClient {
     }
   }
 
+  getPerParticipantAudioStreamId(participantId) {
+    let streamId = this.perParticipantAudioStreamIds.get(participantId);
+    if (streamId === undefined) {
+        streamId = this.perParticipantAudioStreamIds.size;
+        this.perParticipantAudioStreamIds.set(participantId, streamId);
+        // Messages on the websocket arrive in order, so the assignment always arrives before the participant's audio
+        this.sendJson({
+            type: 'PerParticipantAudioStreamAssignment',
+            streamId: streamId,
+            participantId: participantId
+        });
+    }
+    return streamId;
+  }
+
   sendPerParticipantAudio(participantId, audioData) {
     if (this.ws.readyState !== WebSocket.OPEN) {
       console.error('WebSocket is not connected for per participant audio send', this.ws.readyState);
@@ -947,28 +967,27 @@ class WebSocketClient {
     }
 
     try {
-        // Convert participantId to UTF-8 bytes
-        const participantIdBytes = new TextEncoder().encode(participantId);
-        
-        // Create final message: type (4 bytes) + participantId length (1 byte) + 
-        // participantId bytes + audio data
-        const message = new Uint8Array(4 + 1 + participantIdBytes.length + audioData.buffer.byteLength);
-        const dataView = new DataView(message.buffer);
-        
-        // Set message type (5 for PER_PARTICIPANT_AUDIO)
-        dataView.setInt32(0, WebSocketClient.MESSAGE_TYPES.PER_PARTICIPANT_AUDIO, true);
+        const streamId = this.getPerParticipantAudioStreamId(participantId);
+
+        // Create final message: type (4 bytes) + stream id (2 bytes) + 16 bit PCM audio data
+        const message = new ArrayBuffer(4 + 2 + audioData.length * 2);
+        const dataView = new DataView(message);
         
-        // Set participantId length as uint8 (1 byte)
-        dataView.setUint8(4, participantIdBytes.length);
+        // Set message type (6 for PER_PARTICIPANT_AUDIO_INT16)
+        dataView.setInt32(0, WebSocketClient.MESSAGE_TYPES.PER_PARTICIPANT_AUDIO_INT16, true);
         
-        // Copy participantId bytes
-        message.set(participantIdBytes, 5);
+        // Set stream id as uint16 (2 bytes)
+        dataView.setUint16(4, streamId, true);
         
-        // Copy audio data after type, length and participantId
-        message.set(new Uint8Array(audioData.buffer), 5 + participantIdBytes.length);
+        // Convert the float samples to 16 bit PCM straight into the message, clipping anything out of range.
+        // Int16Array uses the platform's byte order, which is little-endian on every platform Chrome runs the bot on.
+        const pcmData = new Int16Array(message, 6, audioData.length);
+        for (let i = 0; i < audioData.length; i++) {
+            pcmData[i] = Math.max(-32768, Math.min(32767, Math.round(audioData[i] * 32768)));
+        }
         
         // Send the binary message
-        this.ws.send(message.buffer);
+        this.ws.send(message);
     } catch (error) {
         console.error('Error sending WebSocket audio message:', error);
     }
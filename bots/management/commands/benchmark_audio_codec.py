@@ -0,0 +1,82 @@
+import io
+import json
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from bots.audio_codec import audio_duration_ms, decode_to_pcm, encode_pcm
+
+
+class Command(BaseCommand):
+    help = "Times the in-process audio codec against pydub, which spawns an ffmpeg process for every conversion, on utterance sized audio"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--duration-seconds", type=float, default=5, help="Length of the test audio (default: 5)")
+        parser.add_argument("--sample-rate", type=int, default=32000, help="Sample rate of the test audio (default: 32000)")
+        parser.add_argument("--iterations", type=int, default=20, help="How many times to run each conversion (default: 20)")
+
+    def handle(self, *args, **options):
+        try:
+            from pydub import AudioSegment
+        except ImportError:
+            raise CommandError("pydub is needed to benchmark against")
+
+        sample_rate = options["sample_rate"]
+        # A tone with some noise, so the encoders have something to do
+        t = np.arange(int(options["duration_seconds"] * sample_rate)) / sample_rate
+        samples = 8000 * np.sin(2 * np.pi * 220 * t) + np.random.default_rng(0).normal(0, 500, len(t))
+        pcm_data = samples.astype(np.int16).tobytes()
+        mp3_data = encode_pcm(pcm_data, format="mp3", sample_rate=sample_rate, bitrate="128k")
+        flac_data = encode_pcm(pcm_data, format="flac", sample_rate=sample_rate)
+
+        def pydub_segment():
+            return AudioSegment(data=pcm_data, sample_width=2, frame_rate=sample_rate, channels=1)
+
+        def pydub_export(segment, format, parameters=None):
+            buffer = io.BytesIO()
+            segment.export(buffer, format=format, parameters=parameters)
+            return buffer.getvalue()
+
+        conversions = {
+            "pcm_to_mp3": (
+                lambda: pydub_export(pydub_segment(), "mp3", ["-b:a", "128k"]),
+                lambda: encode_pcm(pcm_data, format="mp3", sample_rate=sample_rate, bitrate="128k"),
+            ),
+            "pcm_to_mp3_16khz": (
+                lambda: pydub_export(pydub_segment().set_frame_rate(16000), "mp3", ["-b:a", "128k"]),
+                lambda: encode_pcm(pcm_data, format="mp3", sample_rate=sample_rate, output_sample_rate=16000, bitrate="128k"),
+            ),
+            "mp3_to_pcm": (
+                lambda: AudioSegment.from_mp3(io.BytesIO(mp3_data)).set_frame_rate(sample_rate).raw_data,
+                lambda: decode_to_pcm(mp3_data, format="mp3", sample_rate=sample_rate, channels=1),
+            ),
+            "pcm_to_flac": (
+                lambda: pydub_export(pydub_segment(), "flac"),
+                lambda: encode_pcm(pcm_data, format="flac", sample_rate=sample_rate),
+            ),
+            "flac_to_pcm": (
+                lambda: AudioSegment.from_file(io.BytesIO(flac_data), format="flac").raw_data,
+                lambda: decode_to_pcm(flac_data, format="flac"),
+            ),
+            "mp3_duration": (
+                lambda: len(AudioSegment.from_mp3(io.BytesIO(mp3_data))),
+                lambda: audio_duration_ms(mp3_data, format="mp3"),
+            ),
+        }
+
+        results = {}
+        for name, (pydub_conversion, in_process_conversion) in conversions.items():
+            pydub_ms = self.time_ms(pydub_conversion, options["iterations"])
+            in_process_ms = self.time_ms(in_process_conversion, options["iterations"])
+            results[name] = {"pydub_ms": pydub_ms, "in_process_ms": in_process_ms, "speedup": round(pydub_ms / in_process_ms, 1) if in_process_ms else None}
+
+        self.stdout.write(json.dumps(results, indent=2))
+
+    def time_ms(self, conversion, iterations):
+        # The first run is left out, since it pays for one time setup
+        conversion()
+        start = time.perf_counter()
+        for _ in range(iterations):
+            conversion()
+        return round((time.perf_counter() - start) * 1000 / iterations, 2)
@@ -0,0 +1,53 @@
+import json
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+
+from bots.models import Bot, BotEventManager, BotEventTypes, Project, Recording, TranscriptionProviders, TranscriptionTypes
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Replays a media trace recorded with BOT_MEDIA_TRACE_DIRECTORY into a bot controller and prints throughput and latency numbers"
+
+    def add_arguments(self, parser):
+        parser.add_argument("trace_file_path", type=str, help="Path to the media trace")
+        parser.add_argument("--project", type=str, required=True, help="Object ID of the project to create the benchmark bot in")
+        parser.add_argument("--meeting-url", type=str, default="https://meet.google.com/abc-defg-hij", help="Meeting URL for the benchmark bot. This picks the meeting type, so use the same type the trace was recorded with.")
+        parser.add_argument(
+            "--transcription-provider",
+            type=str,
+            default="closed_caption_from_platform",
+            choices=[provider.name.lower() for provider in TranscriptionProviders],
+            help="Transcription provider for the benchmark bot's recording. Per participant audio is only replayed when this isn't closed_caption_from_platform.",
+        )
+        parser.add_argument("--speed", type=float, default=0, help="Replay speed relative to the original trace. 0 replays as fast as possible (default: 0)")
+
+    def handle(self, *args, **options):
+        # Imported here, since it needs GStreamer, which the web containers don't have
+        from bots.bot_controller.replay_bot_controller import ReplayBotController
+
+        project = Project.objects.filter(object_id=options["project"]).first()
+        if project is None:
+            raise CommandError(f"Project {options['project']} not found")
+
+        bot = Bot.objects.create(project=project, name="Media trace benchmark bot", meeting_url=options["meeting_url"])
+        Recording.objects.create(
+            bot=bot,
+            recording_type=bot.recording_type(),
+            transcription_type=TranscriptionTypes.NON_REALTIME,
+            transcription_provider=TranscriptionProviders[options["transcription_provider"].upper()],
+            is_default_recording=True,
+        )
+        BotEventManager.create_event(bot=bot, event_type=BotEventTypes.JOIN_REQUESTED)
+
+        controller = ReplayBotController(bot.id, trace_file_path=options["trace_file_path"], speed=options["speed"])
+        controller.run()
+
+        bot.refresh_from_db()
+        stats = controller.replay_stats()
+        stats["bot_id"] = bot.object_id
+        stats["bot_state"] = bot.get_state_display()
+        stats["utterances_created"] = bot.recordings.get(is_default_recording=True).utterances.count()
+        self.stdout.write(json.dumps(stats, indent=2))
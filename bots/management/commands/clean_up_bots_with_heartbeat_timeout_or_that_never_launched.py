@@ -1,11 +1,13 @@
 import logging
 import os
 
+import redis
 from django.core.management.base import BaseCommand
 from django.db import models
 from django.utils import timezone
 from kubernetes import client, config
 
+from bots.bot_heartbeat_utils import get_heartbeat_timestamps_from_redis, update_database_heartbeats
 from bots.models import Bot, BotEventManager, BotEventSubTypes, BotEventTypes
 
 logger = logging.getLogger(__name__)
@@ -66,9 +68,12 @@ class Command(BaseCommand):
 
             # Find non post-meeting bots where the last heartbeat is over 10 minutes ago
             heartbeat_timeout_q_filter = models.Q(last_heartbeat_timestamp__isnull=False) & models.Q(last_heartbeat_timestamp__lt=ten_minutes_ago_timestamp)
-            problem_bots = Bot.objects.filter(~BotEventManager.get_post_meeting_states_q_filter() & heartbeat_timeout_q_filter)
+            problem_bots = list(Bot.objects.filter(~BotEventManager.get_post_meeting_states_q_filter() & heartbeat_timeout_q_filter))
 
-            logger.info(f"Found {problem_bots.count()} bots with heartbeat timeout")
+            # The database only has the heartbeats as of the last sync, so check redis for the latest ones
+            problem_bots = self.exclude_bots_with_recent_redis_heartbeat(problem_bots, ten_minutes_ago_timestamp)
+
+            logger.info(f"Found {len(problem_bots)} bots with heartbeat timeout")
 
             # Create fatal error events for each bot
             for bot in problem_bots:
@@ -84,6 +89,20 @@ class Command(BaseCommand):
         except client.ApiException as e:
             logger.error(f"Failed to terminate bots with heartbeat timeout: {str(e)}")
 
+    def exclude_bots_with_recent_redis_heartbeat(self, bots, heartbeat_timeout_timestamp):
+        try:
+            redis_heartbeat_timestamps = get_heartbeat_timestamps_from_redis(bot.id for bot in bots)
+        except redis.exceptions.RedisError as e:
+            # Bots fall back to writing heartbeats to the database when redis is down, so the database values are good enough
+            logger.warning(f"Failed to read heartbeats from redis, using the database heartbeats only: {str(e)}")
+            return bots
+
+        recent_redis_heartbeat_timestamps = {bot_id: timestamp for bot_id, timestamp in redis_heartbeat_timestamps.items() if timestamp >= heartbeat_timeout_timestamp}
+        if recent_redis_heartbeat_timestamps:
+            update_database_heartbeats(recent_redis_heartbeat_timestamps)
+
+        return [bot for bot in bots if bot.id not in recent_redis_heartbeat_timestamps]
+
     def terminate_bots_that_never_launched(self):
         logger.info("Terminating bots that never launched...")
 
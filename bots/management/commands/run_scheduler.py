@@ -6,6 +6,7 @@ from django.core.management.base import BaseCommand
 from django.db import connection, transaction
 from django.utils import timezone
 
+from bots.bot_heartbeat_utils import sync_bot_heartbeats_to_database
 from bots.models import Bot, BotStates
 from bots.tasks.launch_scheduled_bot_task import launch_scheduled_bot
 
@@ -41,9 +42,15 @@ class Command(BaseCommand):
         while self._keep_running:
             began = time.monotonic()
             try:
-                self._run_scheduled_bots()
-            except Exception:
-                log.exception("Scheduler cycle failed")
+                try:
+                    self._run_scheduled_bots()
+                except Exception:
+                    log.exception("Scheduler cycle failed")
+
+                try:
+                    self._sync_bot_heartbeats()
+                except Exception:
+                    log.exception("Bot heartbeat sync failed")
             finally:
                 # Close stale connections so the loop never inherits a dead socket
                 connection.close()
@@ -87,3 +94,11 @@ class Command(BaseCommand):
                 launch_scheduled_bot.delay(bot.id, bot.join_at.isoformat())
 
             log.info("Launched %s bots", len(bots_to_launch))
+
+    def _sync_bot_heartbeats(self):
+        """
+        Bots write their heartbeats to redis. Copy them into the bots table in bulk, so the database stays
+        close to current for the API and for billing.
+        """
+        synced_count = sync_bot_heartbeats_to_database()
+        log.info("Synced heartbeats for %s bots", synced_count)
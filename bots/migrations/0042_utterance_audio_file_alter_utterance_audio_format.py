@@ -0,0 +1,24 @@
+# Generated by Django 5.1.2 on 2025-07-01 12:00
+
+import bots.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bots', '0041_participant_is_the_bot_participant_object_id_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='utterance',
+            name='audio_file',
+            field=models.FileField(blank=True, max_length=255, null=True, storage=bots.models.utterance_audio_storage, upload_to=''),
+        ),
+        migrations.AlterField(
+            model_name='utterance',
+            name='audio_format',
+            field=models.IntegerField(choices=[(1, 'PCM'), (2, 'MP3'), (3, 'FLAC')], default=1, null=True),
+        ),
+    ]
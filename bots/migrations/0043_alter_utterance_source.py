@@ -0,0 +1,18 @@
+# Generated by Django 5.1.2 on 2025-07-02 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bots', '0042_utterance_audio_file_alter_utterance_audio_format'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='utterance',
+            name='source',
+            field=models.IntegerField(choices=[(1, 'Per Participant Audio'), (2, 'Closed Caption From Platform'), (3, 'Streaming Transcription')], default=1),
+        ),
+    ]
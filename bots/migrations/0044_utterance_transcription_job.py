@@ -0,0 +1,18 @@
+# Generated by Django 5.1.2 on 2025-07-03 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bots', '0043_alter_utterance_source'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='utterance',
+            name='transcription_job',
+            field=models.JSONField(default=None, null=True),
+        ),
+    ]
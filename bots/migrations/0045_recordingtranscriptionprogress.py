@@ -0,0 +1,49 @@
+# Generated by Django 5.1.2 on 2025-07-10 12:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def count_utterances_of_recordings_being_transcribed(apps, schema_editor):
+    # Recordings that are done transcribing don't need their counts
+    Recording = apps.get_model('bots', 'Recording')
+    RecordingTranscriptionProgress = apps.get_model('bots', 'RecordingTranscriptionProgress')
+
+    recordings = Recording.objects.filter(transcription_state=2).annotate(
+        pending_utterance_count=Count('utterances', filter=Q(utterances__transcription__isnull=True, utterances__failure_data__isnull=True)),
+        transcribed_utterance_count=Count('utterances', filter=Q(utterances__transcription__isnull=False, utterances__source=1)),
+        failed_utterance_count=Count('utterances', filter=Q(utterances__failure_data__isnull=False)),
+    )
+    RecordingTranscriptionProgress.objects.bulk_create(
+        [
+            RecordingTranscriptionProgress(
+                recording_id=recording.id,
+                pending_utterance_count=recording.pending_utterance_count,
+                transcribed_utterance_count=recording.transcribed_utterance_count,
+                failed_utterance_count=recording.failed_utterance_count,
+            )
+            for recording in recordings.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bots', '0044_utterance_transcription_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecordingTranscriptionProgress',
+            fields=[
+                ('recording', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='transcription_progress', serialize=False, to='bots.recording')),
+                ('pending_utterance_count', models.IntegerField(default=0)),
+                ('transcribed_utterance_count', models.IntegerField(default=0)),
+                ('failed_utterance_count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(count_utterances_of_recordings_being_transcribed, migrations.RunPython.noop),
+    ]
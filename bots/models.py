@@ -18,6 +18,8 @@ from django.utils import timezone
 from django.utils.crypto import get_random_string
 
 from accounts.models import Organization
+from bots.bot_heartbeat_utils import sync_bot_heartbeat_from_redis
+from bots.credentials_utils import invalidate_cached_credentials
 from bots.webhook_utils import trigger_webhook
 
 # Create your models here.
@@ -170,7 +172,9 @@ class Bot(models.Model):
 
             # Delete all utterances and recording files for each recording
             for recording in self.recordings.all():
-                # Delete all utterances first
+                # Delete all utterances first, along with any audio they stored in a file
+                for utterance in recording.utterances.exclude(audio_file="").exclude(audio_file__isnull=True):
+                    utterance.audio_file.delete(save=False)
                 recording.utterances.all().delete()
 
                 # Delete the actual recording file if it exists
@@ -839,6 +843,9 @@ class BotEventManager:
     # It returns a dictionary of additional event metadata that should be added to the event
     @classmethod
     def after_transition_to_post_meeting_state(cls, bot: Bot, event_type: BotEventTypes, new_state: BotStates) -> dict:
+        # Heartbeats after the first one are written to redis, so pull in the latest one before computing the duration
+        sync_bot_heartbeat_from_redis(bot)
+
         additional_event_metadata = {}
         additional_event_metadata["bot_duration_seconds"] = bot.bot_duration_seconds()
 
@@ -1117,6 +1124,7 @@ class TranscriptionProviders(models.IntegerChoices):
     SARVAM = 6, "Sarvam"
 
 
+from django.core.files.storage import FileSystemStorage
 from storages.backends.s3boto3 import S3Boto3Storage
 
 
@@ -1124,6 +1132,18 @@ class RecordingStorage(S3Boto3Storage):
     bucket_name = settings.AWS_RECORDING_STORAGE_BUCKET_NAME
 
 
+class UtteranceAudioStorage(S3Boto3Storage):
+    bucket_name = settings.AWS_RECORDING_STORAGE_BUCKET_NAME
+    location = "utterance_audio"
+
+
+def utterance_audio_storage():
+    # Local filesystem stand in for S3, used in development and tests
+    if settings.UTTERANCE_AUDIO_STORAGE_DIRECTORY:
+        return FileSystemStorage(location=settings.UTTERANCE_AUDIO_STORAGE_DIRECTORY)
+    return UtteranceAudioStorage()
+
+
 class Recording(models.Model):
     bot = models.ForeignKey(Bot, on_delete=models.CASCADE, related_name="recordings")
 
@@ -1179,6 +1199,18 @@ class Recording(models.Model):
         super().save(*args, **kwargs)
 
 
+class RecordingTranscriptionProgress(models.Model):
+    # Counts of the recording's utterances that need transcribing, kept up to date as they are created and
+    # transcribed, so checking whether the recording's transcription is done doesn't need to count its utterances.
+    # These are kept out of the Recording row because it is saved whole whenever its state changes, which would
+    # overwrite concurrent updates to them.
+    recording = models.OneToOneField(Recording, on_delete=models.CASCADE, primary_key=True, related_name="transcription_progress")
+    # Utterances that have neither a transcription nor failure data yet
+    pending_utterance_count = models.IntegerField(default=0)
+    transcribed_utterance_count = models.IntegerField(default=0)
+    failed_utterance_count = models.IntegerField(default=0)
+
+
 class RecordingManager:
     # Moves the recording into a terminal state.
     # If the recording failed, then mark it as failed.
@@ -1247,7 +1279,7 @@ class RecordingManager:
 
         # If there is an in progress transcription recording
         # that has no utterances left to transcribe, set it to complete
-        if recording.transcription_state == RecordingTranscriptionStates.IN_PROGRESS and Utterance.objects.filter(recording=recording, transcription__isnull=True).count() == 0:
+        if recording.transcription_state == RecordingTranscriptionStates.IN_PROGRESS and RecordingManager.all_utterances_transcribed(recording):
             RecordingManager.set_recording_transcription_complete(recording)
 
     @classmethod
@@ -1311,6 +1343,48 @@ class RecordingManager:
     def is_terminal_state(cls, state: int):
         return state == RecordingStates.COMPLETE or state == RecordingStates.FAILED
 
+    @classmethod
+    def add_utterances_pending_transcription(cls, recording_id: int, count: int):
+        # Must be called in the transaction that creates the utterances
+        progress, _ = RecordingTranscriptionProgress.objects.get_or_create(recording_id=recording_id)
+        RecordingTranscriptionProgress.objects.filter(pk=progress.pk).update(pending_utterance_count=models.F("pending_utterance_count") + count)
+
+    @classmethod
+    def save_utterance_transcription_outcome(cls, utterance):
+        """
+        Saves an utterance that has just been given its transcription or failure data, and moves it out of the
+        recording's pending count. Returns False without saving if another run of the task already finished the
+        utterance, in which case the utterance is reloaded, so a task that is retried or runs twice neither
+        overwrites the outcome nor counts it twice.
+        """
+        outcome_field, count_field = ("transcription", "transcribed_utterance_count") if utterance.transcription is not None else ("failure_data", "failed_utterance_count")
+        with transaction.atomic():
+            # Locks the utterance, so a concurrent save of the same utterance waits and then finds it finished
+            finished_now = Utterance.objects.filter(id=utterance.id, transcription__isnull=True, failure_data__isnull=True).update(**{outcome_field: getattr(utterance, outcome_field)})
+            if not finished_now:
+                utterance.refresh_from_db()
+                return False
+            utterance.save()
+            RecordingTranscriptionProgress.objects.filter(recording_id=utterance.recording_id).update(
+                pending_utterance_count=models.F("pending_utterance_count") - 1,
+                **{count_field: models.F(count_field) + 1},
+            )
+        return True
+
+    @classmethod
+    def save_unfinished_utterance(cls, utterance, fields):
+        """
+        Saves the given fields of an utterance that is still waiting for its transcription. Returns False without
+        saving if another run of the task already finished the utterance, so its outcome isn't overwritten.
+        """
+        return Utterance.objects.filter(id=utterance.id, transcription__isnull=True, failure_data__isnull=True).update(**{field: getattr(utterance, field) for field in fields}, updated_at=timezone.now()) > 0
+
+    @classmethod
+    def all_utterances_transcribed(cls, recording: Recording):
+        # Failed utterances were never transcribed, so they keep the recording's transcription from completing
+        progress = RecordingTranscriptionProgress.objects.filter(recording=recording).first()
+        return progress is None or (progress.pending_utterance_count == 0 and progress.failed_utterance_count == 0)
+
 
 class TranscriptionFailureReasons(models.TextChoices):
     CREDENTIALS_NOT_FOUND = "credentials_not_found"
@@ -1332,14 +1406,19 @@ class Utterance(models.Model):
     class Sources(models.IntegerChoices):
         PER_PARTICIPANT_AUDIO = 1, "Per Participant Audio"
         CLOSED_CAPTION_FROM_PLATFORM = 2, "Closed Caption From Platform"
+        STREAMING_TRANSCRIPTION = 3, "Streaming Transcription"
 
     class AudioFormat(models.IntegerChoices):
         PCM = 1, "PCM"
         MP3 = 2, "MP3"
+        FLAC = 3, "FLAC"
 
     recording = models.ForeignKey(Recording, on_delete=models.CASCADE, related_name="utterances")
     participant = models.ForeignKey(Participant, on_delete=models.PROTECT, related_name="utterances")
+    # Audio is either stored inline in audio_blob, or in audio_file with audio_blob left empty. Per participant
+    # audio goes to audio_file, so large utterances don't bloat the database.
     audio_blob = models.BinaryField()
+    audio_file = models.FileField(storage=utterance_audio_storage, max_length=255, null=True, blank=True)
     audio_format = models.IntegerField(choices=AudioFormat.choices, default=AudioFormat.PCM, null=True)
     timestamp_ms = models.BigIntegerField()
     duration_ms = models.IntegerField()
@@ -1347,6 +1426,8 @@ class Utterance(models.Model):
     # To keep track of how many retries we've done for this utterance
     transcription_attempt_count = models.IntegerField(default=0)
     failure_data = models.JSONField(null=True, default=None)
+    # The provider's job while an asynchronous transcription is in progress, e.g. {"transcript_id": ..., "check_count": 3}
+    transcription_job = models.JSONField(null=True, default=None)
     source_uuid = models.CharField(max_length=255, null=True, unique=True)
     sample_rate = models.IntegerField(null=True, default=None)
 
@@ -1390,6 +1471,7 @@ class Credentials(models.Model):
         json_data = json.dumps(credentials_dict)
         self._encrypted_data = f.encrypt(json_data.encode())
         self.save()
+        invalidate_cached_credentials(self.project_id, self.credential_type)
 
     def get_credentials(self):
         """Decrypt and return credentials"""
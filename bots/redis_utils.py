@@ -0,0 +1,41 @@
+import os
+import threading
+
+import redis
+
+_connection_pool = None
+_connection_pool_pid = None
+_connection_pool_lock = threading.Lock()
+
+
+def get_redis_url():
+    return os.getenv("REDIS_URL") + ("?ssl_cert_reqs=none" if os.getenv("DISABLE_REDIS_SSL") else "")
+
+
+def get_redis_connection_pool():
+    """
+    Returns the connection pool shared by everything in this process. Connections (and their TLS sessions) are reused
+    across requests instead of being opened for every command. The pool is recreated after a fork, because sockets
+    can't be shared between processes.
+    """
+    global _connection_pool, _connection_pool_pid
+    pid = os.getpid()
+    if _connection_pool is not None and _connection_pool_pid == pid:
+        return _connection_pool
+
+    with _connection_pool_lock:
+        if _connection_pool is None or _connection_pool_pid != pid:
+            _connection_pool = redis.BlockingConnectionPool.from_url(
+                get_redis_url(),
+                max_connections=int(os.getenv("REDIS_MAX_CONNECTIONS", "50")),
+                # How long to wait for a free connection when they are all in use
+                timeout=int(os.getenv("REDIS_CONNECTION_POOL_TIMEOUT_SECONDS", "5")),
+                health_check_interval=30,
+                socket_keepalive=True,
+            )
+            _connection_pool_pid = pid
+    return _connection_pool
+
+
+def get_redis_client():
+    return redis.Redis(connection_pool=get_redis_connection_pool())
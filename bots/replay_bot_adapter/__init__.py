@@ -0,0 +1,3 @@
+from .replay_bot_adapter import ReplayBotAdapter
+
+__all__ = ["ReplayBotAdapter"]
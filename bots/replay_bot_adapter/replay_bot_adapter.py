@@ -0,0 +1,134 @@
+import datetime
+import logging
+import threading
+import time
+
+from bots.bot_adapter import BotAdapter
+from bots.bot_controller.media_trace import read_media_trace
+
+logger = logging.getLogger(__name__)
+
+
+class ReplayBotAdapter(BotAdapter):
+    """
+    Plays a media trace recorded with BOT_MEDIA_TRACE_DIRECTORY back into the bot controller, in place of a real meeting.
+    Each record is handed to the controller callback it was captured from, at the same offset from the start of the trace
+    divided by speed. A speed of 0 replays the trace as fast as the controller can take it.
+    """
+
+    def __init__(self, *, trace_file_path, speed, send_message_callback, callbacks):
+        self.trace_file_path = trace_file_path
+        self.speed = speed
+        self.send_message_callback = send_message_callback
+        # Maps the callback names in the trace to the controller's callbacks. Records for missing callbacks are skipped.
+        self.callbacks = callbacks
+
+        self.participants = {}
+        self.first_buffer_timestamp_ms = None
+        self.replay_thread = None
+        self.stop_requested = threading.Event()
+        self.meeting_ended_sent = False
+        self.meeting_ended_lock = threading.Lock()
+
+        # Stats for the benchmark
+        self.records_replayed = {}
+        self.callback_durations_seconds = {}
+        self.max_lag_seconds = 0
+        self.replay_duration_seconds = None
+        self.replay_finished_at = None
+
+    def init(self):
+        self.replay_thread = threading.Thread(target=self.replay, daemon=True)
+        self.replay_thread.start()
+
+    def replay(self):
+        self.send_message_callback({"message": self.Messages.BOT_JOINED_MEETING})
+        self.send_message_callback({"message": self.Messages.BOT_RECORDING_PERMISSION_GRANTED})
+
+        header, records = read_media_trace(self.trace_file_path)
+        replay_start_time = time.monotonic()
+        self.first_buffer_timestamp_ms = int(time.time() * 1000)
+        # Datetimes in the trace are shifted so they look like they happened during the replay
+        datetime_shift = datetime.datetime.utcnow() - datetime.datetime.fromisoformat(header["started_at"])
+
+        for record in records:
+            if self.stop_requested.is_set():
+                break
+
+            if self.speed > 0:
+                lag_seconds = time.monotonic() - replay_start_time - record.time_offset_seconds / self.speed
+                if lag_seconds < 0:
+                    time.sleep(-lag_seconds)
+                self.max_lag_seconds = max(self.max_lag_seconds, lag_seconds)
+
+            if record.callback_name == "get_participant":
+                participant = record.args[0]
+                self.participants[participant["participant_uuid"]] = participant
+                continue
+
+            callback = self.callbacks.get(record.callback_name)
+            if callback is None:
+                continue
+
+            args = [arg + datetime_shift if isinstance(arg, datetime.datetime) else arg for arg in record.args]
+            callback_start_time = time.monotonic()
+            callback(*args)
+            self.callback_durations_seconds.setdefault(record.callback_name, []).append(time.monotonic() - callback_start_time)
+            self.records_replayed[record.callback_name] = self.records_replayed.get(record.callback_name, 0) + 1
+
+        self.replay_finished_at = time.monotonic()
+        self.replay_duration_seconds = self.replay_finished_at - replay_start_time
+        logger.info(f"Finished replaying media trace {self.trace_file_path} in {self.replay_duration_seconds:.2f} seconds: {self.records_replayed}")
+        self.send_meeting_ended()
+
+    def send_meeting_ended(self):
+        with self.meeting_ended_lock:
+            if self.meeting_ended_sent:
+                return
+            self.meeting_ended_sent = True
+        self.send_message_callback({"message": self.Messages.MEETING_ENDED})
+
+    def get_participant(self, participant_id):
+        return self.participants.get(participant_id)
+
+    def leave(self):
+        self.stop_requested.set()
+        self.send_meeting_ended()
+
+    def cleanup(self):
+        self.stop_requested.set()
+        if self.replay_thread and self.replay_thread is not threading.current_thread():
+            self.replay_thread.join()
+
+    def check_auto_leave_conditions(self):
+        pass
+
+    def get_first_buffer_timestamp_ms(self):
+        return self.first_buffer_timestamp_ms
+
+    def get_first_buffer_timestamp_ms_offset(self):
+        return 0
+
+    def get_staged_bot_join_delay_seconds(self):
+        return 0
+
+    def send_raw_audio(self, bytes, sample_rate):
+        pass
+
+    def send_raw_image(self, image_bytes):
+        pass
+
+    def send_video(self, video_url):
+        pass
+
+    def is_sent_video_still_playing(self):
+        return False
+
+    def send_chat_message(self, text):
+        pass
+
+    def pause_recording(self):
+        pass
+
+    def resume_recording(self):
+        pass
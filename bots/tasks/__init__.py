@@ -1,12 +1,14 @@
 from .deliver_webhook_task import deliver_webhook
 from .launch_scheduled_bot_task import launch_scheduled_bot
-from .process_utterance_task import process_utterance
+from .process_utterance_task import check_utterance_transcription_job, process_utterance, process_utterance_batch
 from .restart_bot_pod_task import restart_bot_pod
 from .run_bot_task import run_bot
 
 # Expose the tasks and any necessary utilities at the module level
 __all__ = [
     "process_utterance",
+    "check_utterance_transcription_job",
+    "process_utterance_batch",
     "run_bot",
     "deliver_webhook",
     "restart_bot_pod",
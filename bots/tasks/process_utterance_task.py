@@ -1,15 +1,21 @@
+import bisect
 import json
 import logging
 import os
 import time
 
+import redis
 import requests
 from celery import shared_task
 
 logger = logging.getLogger(__name__)
 
+from bots.credentials_utils import get_cached_credentials
 from bots.models import Credentials, RecordingManager, TranscriptionFailureReasons, TranscriptionProviders, Utterance, WebhookTriggerTypes
+from bots.redis_utils import get_redis_client
+from bots.transcription_http_utils import get_deepgram_client, get_transcription_session, transcription_request_limit
 from bots.utils import pcm_to_mp3
+from bots.utterance_audio_utils import delete_utterance_audio, get_utterance_pcm_audio
 from bots.webhook_payloads import utterance_webhook_payload
 from bots.webhook_utils import trigger_webhook
 
@@ -24,7 +30,23 @@ def is_retryable_failure(failure_data):
     ]
 
 
-def get_transcription(utterance, recording):
+def notify_bot_utterance_terminated(utterance):
+    """
+    Lets the bot know that this utterance won't be transcribed again, so post-processing doesn't have to poll for it.
+    The bot also rechecks the database periodically, so a failure to publish only delays it.
+    """
+    try:
+        message = {"command": "utterance_terminated", "utterance_id": utterance.id}
+        get_redis_client().publish(f"bot_{utterance.recording.bot_id}", json.dumps(message))
+    except redis.exceptions.RedisError as e:
+        logger.warning(f"Failed to notify bot that utterance {utterance.id} terminated: {e}")
+
+
+def get_transcription(utterance, recording, with_timings=False):
+    """
+    with_timings asks providers that only time the transcript on request to include the timings, for splitting up a
+    batch of utterances.
+    """
     try:
         if recording.transcription_provider == TranscriptionProviders.DEEPGRAM:
             transcription, failure_data = get_transcription_via_deepgram(utterance)
@@ -35,7 +57,7 @@ def get_transcription(utterance, recording):
         elif recording.transcription_provider == TranscriptionProviders.ASSEMBLY_AI:
             transcription, failure_data = get_transcription_via_assemblyai(utterance)
         elif recording.transcription_provider == TranscriptionProviders.SARVAM:
-            transcription, failure_data = get_transcription_via_sarvam(utterance)
+            transcription, failure_data = get_transcription_via_sarvam(utterance, with_timestamps=with_timings)
         else:
             raise Exception(f"Unknown transcription provider: {recording.transcription_provider}")
 
@@ -44,6 +66,82 @@ def get_transcription(utterance, recording):
         return None, {"reason": TranscriptionFailureReasons.INTERNAL_ERROR, "error": str(e)}
 
 
+# Gladia and AssemblyAI transcribe asynchronously. Instead of a worker waiting for each job, the job is stored on the
+# utterance and checked on by short tasks scheduled with a countdown, so the worker is free in between.
+ASYNC_TRANSCRIPTION_JOBS_ENABLED = os.getenv("ASYNC_TRANSCRIPTION_JOBS_ENABLED", "true") == "true"
+# Jobs that are still running after this many checks time out, like the polling loops in the synchronous path
+TRANSCRIPTION_JOB_MAX_CHECKS = 120
+
+
+def transcription_job_functions(recording):
+    """
+    Returns the functions that submit and check a transcription job for the recording's provider, or None if it
+    doesn't transcribe with jobs. This doesn't depend on ASYNC_TRANSCRIPTION_JOBS_ENABLED, so jobs that were
+    submitted before it was turned off can still be checked on.
+    """
+    if recording.transcription_provider == TranscriptionProviders.GLADIA:
+        return submit_transcription_job_via_gladia, check_transcription_job_via_gladia
+    if recording.transcription_provider == TranscriptionProviders.ASSEMBLY_AI:
+        return submit_transcription_job_via_assemblyai, check_transcription_job_via_assemblyai
+    return None
+
+
+def transcription_job_check_countdown(check_count):
+    # Most utterances are transcribed within a few seconds, so check often at first and back off after that
+    return 1 if check_count < 10 else 5
+
+
+def save_transcription_result(utterance, transcription, failure_data):
+    """
+    Saves the outcome of transcribing the utterance. Returns False if the failure is retryable and the utterance
+    should be transcribed again.
+    """
+    if failure_data:
+        if utterance.transcription_attempt_count < 5 and is_retryable_failure(failure_data):
+            if not RecordingManager.save_unfinished_utterance(utterance, ["transcription_attempt_count", "transcription_job"]):
+                logger.info(f"Utterance {utterance.id} was already finished by another run of its task, not retrying it")
+                return True
+            return False
+        else:
+            # Keep the audio blob around if it fails
+            utterance.failure_data = failure_data
+            if not RecordingManager.save_utterance_transcription_outcome(utterance):
+                logger.info(f"Utterance {utterance.id} was already finished by another run of its task, not saving the failure")
+                return True
+            logger.info(f"Transcription failed for utterance {utterance.id}, failure data: {failure_data}")
+            notify_bot_utterance_terminated(utterance)
+            return True
+
+    utterance.transcription = transcription
+    if not RecordingManager.save_utterance_transcription_outcome(utterance):
+        logger.info(f"Utterance {utterance.id} was already finished by another run of its task, not saving the transcription")
+        return True
+
+    # The audio is only kept around if transcription fails. It is dropped after the transcription is saved, in case
+    # another run of the task saved a failure first.
+    delete_utterance_audio(utterance)
+    utterance.save(update_fields=["audio_blob", "audio_file", "updated_at"])
+
+    logger.info(f"Transcription complete for utterance {utterance.id}")
+    notify_bot_utterance_terminated(utterance)
+
+    # Don't send webhook for empty transcript
+    if utterance.transcription.get("transcript"):
+        trigger_webhook(
+            webhook_trigger_type=WebhookTriggerTypes.TRANSCRIPT_UPDATE,
+            bot=utterance.recording.bot,
+            payload=utterance_webhook_payload(utterance),
+        )
+    return True
+
+
+def set_recording_transcription_complete_if_done(recording):
+    # If the recording is in a terminal state and there are no more utterances to transcribe, set the recording's transcription state to complete
+    recording.refresh_from_db(fields=["state"])
+    if RecordingManager.is_terminal_state(recording.state) and RecordingManager.all_utterances_transcribed(recording):
+        RecordingManager.set_recording_transcription_complete(recording)
+
+
 @shared_task(
     bind=True,
     soft_time_limit=3600,
@@ -62,58 +160,276 @@ def process_utterance(self, utterance_id):
         return
 
     if utterance.transcription is None:
+        job_functions = transcription_job_functions(recording)
+        if job_functions and utterance.transcription_job:
+            logger.info(f"process_utterance was called for utterance {utterance_id} but its transcription job was already submitted, checking on it")
+            check_utterance_transcription_job.apply_async(args=[utterance_id], countdown=transcription_job_check_countdown(0))
+            return
+
         utterance.transcription_attempt_count += 1
 
-        transcription, failure_data = get_transcription(utterance, recording)
-
-        if failure_data:
-            if utterance.transcription_attempt_count < 5 and is_retryable_failure(failure_data):
-                utterance.save()
-                raise Exception(f"Retryable failure when transcribing utterance {utterance_id}: {failure_data}")
-            else:
-                # Keep the audio blob around if it fails
-                utterance.failure_data = failure_data
-                utterance.save()
-                logger.info(f"Transcription failed for utterance {utterance_id}, failure data: {failure_data}")
+        if job_functions and ASYNC_TRANSCRIPTION_JOBS_ENABLED:
+            submit_transcription_job, _ = job_functions
+            try:
+                transcription_job, failure_data = submit_transcription_job(utterance)
+            except Exception as e:
+                transcription_job, failure_data = None, {"reason": TranscriptionFailureReasons.INTERNAL_ERROR, "error": str(e)}
+
+            if not failure_data:
+                utterance.transcription_job = {**transcription_job, "check_count": 0}
+                if not RecordingManager.save_unfinished_utterance(utterance, ["transcription_attempt_count", "transcription_job"]):
+                    logger.info(f"Utterance {utterance_id} was already finished by another run of its task, not checking on its transcription job")
+                    return
+                logger.info(f"Submitted transcription job for utterance {utterance_id}")
+                check_utterance_transcription_job.apply_async(args=[utterance_id], countdown=transcription_job_check_countdown(0))
                 return
+            transcription = None
+        else:
+            transcription, failure_data = get_transcription(utterance, recording)
 
-        utterance.audio_blob = b""  # set the audio blob binary field to empty byte string
-        utterance.transcription = transcription
-        utterance.save()
+        if not save_transcription_result(utterance, transcription, failure_data):
+            raise Exception(f"Retryable failure when transcribing utterance {utterance_id}: {failure_data}")
 
-        logger.info(f"Transcription complete for utterance {utterance_id}")
+    set_recording_transcription_complete_if_done(utterance.recording)
 
-        # Don't send webhook for empty transcript
-        if utterance.transcription.get("transcript"):
-            trigger_webhook(
-                webhook_trigger_type=WebhookTriggerTypes.TRANSCRIPT_UPDATE,
-                bot=recording.bot,
-                payload=utterance_webhook_payload(utterance),
-            )
 
-    # If the recording is in a terminal state and there are no more utterances to transcribe, set the recording's transcription state to complete
-    if RecordingManager.is_terminal_state(utterance.recording.state) and Utterance.objects.filter(recording=utterance.recording, transcription__isnull=True).count() == 0:
-        RecordingManager.set_recording_transcription_complete(utterance.recording)
+@shared_task(
+    bind=True,
+    soft_time_limit=120,
+    autoretry_for=(Exception,),
+    retry_backoff=True,
+    max_retries=5,
+)
+def check_utterance_transcription_job(self, utterance_id):
+    utterance = Utterance.objects.get(id=utterance_id)
+    if utterance.transcription is not None or utterance.failure_data or not utterance.transcription_job:
+        return
 
+    _, check_transcription_job = transcription_job_functions(utterance.recording)
+    try:
+        transcription, failure_data = check_transcription_job(utterance, utterance.transcription_job)
+    except Exception as e:
+        transcription, failure_data = None, {"reason": TranscriptionFailureReasons.INTERNAL_ERROR, "error": str(e)}
 
-def get_transcription_via_gladia(utterance):
-    recording = utterance.recording
-    gladia_credentials_record = recording.bot.project.credentials.filter(credential_type=Credentials.CredentialTypes.GLADIA).first()
-    if not gladia_credentials_record:
-        return None, {"reason": TranscriptionFailureReasons.CREDENTIALS_NOT_FOUND}
+    check_count = utterance.transcription_job["check_count"] + 1
+    if transcription is None and failure_data is None:
+        if check_count < TRANSCRIPTION_JOB_MAX_CHECKS:
+            utterance.transcription_job = {**utterance.transcription_job, "check_count": check_count}
+            if not RecordingManager.save_unfinished_utterance(utterance, ["transcription_job"]):
+                return
+            check_utterance_transcription_job.apply_async(args=[utterance_id], countdown=transcription_job_check_countdown(check_count))
+            return
+        failure_data = {"reason": TranscriptionFailureReasons.TIMED_OUT, "step": "transcribe_result_poll"}
+
+    # The job is finished either way. A retry submits a new one.
+    utterance.transcription_job = None
+    if not save_transcription_result(utterance, transcription, failure_data):
+        logger.info(f"Retryable failure when transcribing utterance {utterance_id}, submitting it again: {failure_data}")
+        process_utterance.apply_async(args=[utterance_id], countdown=2**utterance.transcription_attempt_count)
+        return
 
-    gladia_credentials = gladia_credentials_record.get_credentials()
+    set_recording_transcription_complete_if_done(utterance.recording)
+
+
+# Short utterances from the same speaker can be transcribed together in one provider request, with a little silence
+# between them, and the words split back onto each utterance by their offsets. Only providers that return word
+# timings in the response are batched, up to the longest audio they take in one request.
+UTTERANCE_BATCHING_ENABLED = os.getenv("UTTERANCE_BATCHING_ENABLED", "false") == "true"
+UTTERANCE_BATCH_MAX_DURATION_MS = {
+    TranscriptionProviders.DEEPGRAM: int(os.getenv("UTTERANCE_BATCH_MAX_DURATION_SECONDS", "60")) * 1000,
+    TranscriptionProviders.SARVAM: 30000,
+}
+UTTERANCE_BATCH_MAX_UTTERANCES = int(os.getenv("UTTERANCE_BATCH_MAX_UTTERANCES", "20"))
+# A speaker's batch is sent after its first utterance has waited this long, even if more would fit
+UTTERANCE_BATCH_MAX_DELAY_SECONDS = float(os.getenv("UTTERANCE_BATCH_MAX_DELAY_SECONDS", "15"))
+UTTERANCE_BATCH_SILENCE_GAP_MS = 500
+
+
+class UtteranceBatch:
+    def __init__(self, send_at):
+        self.utterances = []
+        self.send_at = send_at
+
+    def duration_ms_with(self, utterance):
+        return sum(batched_utterance.duration_ms + UTTERANCE_BATCH_SILENCE_GAP_MS for batched_utterance in self.utterances) + utterance.duration_ms
+
+
+class UtteranceBatcher:
+    """
+    Groups new utterances that are waiting to be transcribed into batches of consecutive utterances from the same
+    speaker. A speaker's utterances are seconds apart, so each speaker's open batch is held across calls until the
+    next utterance wouldn't fit in it, it has UTTERANCE_BATCH_MAX_UTTERANCES, or it has waited
+    UTTERANCE_BATCH_MAX_DELAY_SECONDS. Utterances that can't be batched are sent on their own right away.
+
+    Not thread safe. Times are in seconds from time.monotonic.
+    """
+
+    def __init__(self):
+        self.open_batches = {}
+
+    def add(self, utterances, now):
+        """
+        Adds new utterances. Returns the batches that are ready to be transcribed.
+        """
+        ready_batches = []
+        for utterance in sorted(utterances, key=lambda utterance: utterance.timestamp_ms):
+            max_duration_ms = UTTERANCE_BATCH_MAX_DURATION_MS.get(utterance.recording.transcription_provider) if UTTERANCE_BATCHING_ENABLED else None
+            if max_duration_ms is None or utterance.duration_ms >= max_duration_ms:
+                ready_batches.append([utterance])
+                continue
+
+            key = (utterance.recording_id, utterance.participant_id, utterance.sample_rate)
+            batch = self.open_batches.get(key)
+            if batch is not None and batch.duration_ms_with(utterance) > max_duration_ms:
+                ready_batches.append(self.open_batches.pop(key).utterances)
+                batch = None
+            if batch is None:
+                batch = UtteranceBatch(send_at=now + UTTERANCE_BATCH_MAX_DELAY_SECONDS)
+                self.open_batches[key] = batch
+            batch.utterances.append(utterance)
+            if len(batch.utterances) >= UTTERANCE_BATCH_MAX_UTTERANCES:
+                ready_batches.append(self.open_batches.pop(key).utterances)
+        return ready_batches
+
+    def pop_due_batches(self, now, all=False):
+        """
+        Returns the open batches that have waited long enough, or all of them.
+        """
+        due_keys = [key for key, batch in self.open_batches.items() if all or batch.send_at <= now]
+        return [self.open_batches.pop(key).utterances for key in due_keys]
+
+    def seconds_until_next_batch_due(self, now):
+        """
+        Returns None if no batches are open.
+        """
+        if not self.open_batches:
+            return None
+        return max(0, min(batch.send_at for batch in self.open_batches.values()) - now)
+
+
+def split_batch_transcription(transcription, utterance_offsets):
+    """
+    Splits the transcription of a batch back into one for each utterance, with word timings relative to the start of
+    the utterance. Words are assigned to the utterance whose audio they are closest to. Sarvam's timed chunks of a few
+    words are split the same way, but they aren't word timings, so they aren't kept. Returns None if the
+    transcription doesn't have the timings needed to split it.
+    """
+    keep_timings = "words" in transcription
+    timed_parts = transcription["words"] if keep_timings else transcription.get("chunks")
+    if timed_parts is None or (not timed_parts and transcription.get("transcript")):
+        return None
+
+    # Words starting in the first half of the silence before an utterance still belong to the previous one
+    boundaries = [offset - UTTERANCE_BATCH_SILENCE_GAP_MS / 2000 for offset in utterance_offsets[1:]]
+    utterance_parts = [[] for _ in utterance_offsets]
+    for part in timed_parts:
+        index = bisect.bisect_right(boundaries, part["start"])
+        offset = utterance_offsets[index]
+        utterance_parts[index].append({**part, "start": max(part["start"] - offset, 0), "end": max(part["end"] - offset, 0)})
+
+    if not keep_timings:
+        return [{"transcript": " ".join(chunk["text"] for chunk in chunks)} for chunks in utterance_parts]
+    return [{"transcript": " ".join(word.get("punctuated_word", word["word"]) for word in words), "words": words} for words in utterance_parts]
+
+
+def transcribe_utterance_batch(utterances, recording):
+    """
+    Transcribes the utterances' audio in a single provider request. Returns a transcription for each utterance, or
+    None if the batch couldn't be transcribed.
+    """
+    sample_rate = utterances[0].sample_rate
+    silence_gap = b"\x00\x00" * (sample_rate * UTTERANCE_BATCH_SILENCE_GAP_MS // 1000)
+
+    audio_chunks = []
+    utterance_offsets = []
+    position = 0
+    for utterance in utterances:
+        if audio_chunks:
+            audio_chunks.append(silence_gap)
+            position += len(silence_gap)
+        utterance_offsets.append(position / (sample_rate * 2))
+        pcm_data = get_utterance_pcm_audio(utterance)
+        audio_chunks.append(pcm_data)
+        position += len(pcm_data)
+
+    # Stands in for the batch when calling the provider. It is never saved.
+    batch_utterance = Utterance(
+        recording=recording,
+        participant_id=utterances[0].participant_id,
+        audio_blob=b"".join(audio_chunks),
+        sample_rate=sample_rate,
+        timestamp_ms=utterances[0].timestamp_ms,
+        duration_ms=position * 1000 // (sample_rate * 2),
+    )
+    transcription, failure_data = get_transcription(batch_utterance, recording, with_timings=True)
+    if failure_data:
+        logger.info(f"Transcription failed for a batch of {len(utterances)} utterances, failure data: {failure_data}")
+        return None
+
+    return split_batch_transcription(transcription, utterance_offsets)
+
+
+@shared_task(
+    bind=True,
+    soft_time_limit=3600,
+)
+def process_utterance_batch(self, utterance_ids):
+    utterances = list(Utterance.objects.filter(id__in=utterance_ids, transcription__isnull=True, failure_data__isnull=True).select_related("recording").order_by("timestamp_ms"))
+    if not utterances:
+        return
+    logger.info(f"Processing a batch of {len(utterances)} utterances")
+
+    recording = utterances[0].recording
+    transcriptions = transcribe_utterance_batch(utterances, recording) if len(utterances) > 1 else None
+    if transcriptions is None:
+        # Transcribed one at a time instead, which takes care of retries and failures
+        for utterance in utterances:
+            process_utterance.delay(utterance.id)
+        return
+
+    for utterance, transcription in zip(utterances, transcriptions):
+        utterance.transcription_attempt_count += 1
+        save_transcription_result(utterance, transcription, None)
+
+    set_recording_transcription_complete_if_done(recording)
+
+
+def wait_for_transcription_job(utterance, transcription_job, check_transcription_job):
+    """
+    Checks on a transcription job until it finishes. Only used when asynchronous transcription jobs are disabled.
+    """
+    for _ in range(TRANSCRIPTION_JOB_MAX_CHECKS):
+        transcription, failure_data = check_transcription_job(utterance, transcription_job)
+        if transcription is not None or failure_data is not None:
+            return transcription, failure_data
+        time.sleep(1)
+
+    # If we've reached here, we've timed out
+    return None, {"reason": TranscriptionFailureReasons.TIMED_OUT, "step": "transcribe_result_poll"}
+
+
+def get_gladia_headers(recording):
+    gladia_credentials = get_cached_credentials(recording.bot.project, Credentials.CredentialTypes.GLADIA)
     if not gladia_credentials:
         return None, {"reason": TranscriptionFailureReasons.CREDENTIALS_NOT_FOUND}
 
+    return {"x-gladia-key": gladia_credentials["api_key"]}, None
+
+
+def submit_transcription_job_via_gladia(utterance):
+    recording = utterance.recording
+    headers, failure_data = get_gladia_headers(recording)
+    if failure_data:
+        return None, failure_data
+
     upload_url = "https://api.gladia.io/v2/upload"
 
-    payload_mp3 = pcm_to_mp3(utterance.audio_blob.tobytes(), sample_rate=utterance.sample_rate)
-    headers = {
-        "x-gladia-key": gladia_credentials["api_key"],
-    }
+    payload_mp3 = pcm_to_mp3(get_utterance_pcm_audio(utterance), sample_rate=utterance.sample_rate)
     files = {"audio": ("file.mp3", payload_mp3, "audio/mpeg")}
-    upload_response = requests.request("POST", upload_url, headers=headers, files=files)
+    session = get_transcription_session(TranscriptionProviders.GLADIA)
+    with transcription_request_limit(TranscriptionProviders.GLADIA, headers["x-gladia-key"]) as request:
+        upload_response = session.request("POST", upload_url, headers=headers, files=files)
+        request.record_response(upload_response.status_code)
 
     if upload_response.status_code == 401:
         return None, {"reason": TranscriptionFailureReasons.CREDENTIALS_INVALID}
@@ -131,83 +447,93 @@ def get_transcription_via_gladia(utterance):
         transcribe_request_body["code_switching_config"] = {
             "languages": recording.bot.gladia_code_switching_languages(),
         }
-    transcribe_response = requests.request("POST", transcribe_url, headers=headers, json=transcribe_request_body)
+    with transcription_request_limit(TranscriptionProviders.GLADIA, headers["x-gladia-key"]) as request:
+        transcribe_response = session.request("POST", transcribe_url, headers=headers, json=transcribe_request_body)
+        request.record_response(transcribe_response.status_code)
 
     if transcribe_response.status_code != 200 and transcribe_response.status_code != 201:
         return None, {"reason": TranscriptionFailureReasons.TRANSCRIPTION_REQUEST_FAILED, "step": "transcribe_request", "status_code": transcribe_response.status_code}
 
     transcribe_response_json = transcribe_response.json()
-    result_url = transcribe_response_json["result_url"]
-
-    # Poll the result_url until we get a completed transcription
-    max_retries = 120  # Maximum number of retries (2 minutes with 1s sleep)
-    retry_count = 0
-
-    while retry_count < max_retries:
-        result_response = requests.get(result_url, headers=headers)
-
-        if result_response.status_code != 200:
-            logger.error(f"Gladia result fetch failed with status code {result_response.status_code}")
-            time.sleep(10)
-            retry_count += 1
-            continue
-
-        result_data = result_response.json()
-        status = result_data.get("status")
-
-        if status == "done":
-            # Transcription is complete
-            transcription = result_data.get("result", {}).get("transcription", "")
-            logger.info("Gladia transcription completed successfully, now deleting audio file from Gladia")
-            # Delete the audio file from Gladia
-            delete_response = requests.request("DELETE", result_url, headers=headers)
-            if delete_response.status_code != 200 and delete_response.status_code != 202:
-                logger.error(f"Gladia delete failed with status code {delete_response.status_code}")
-            else:
-                logger.info("Gladia delete successful")
-
-            transcription["transcript"] = transcription["full_transcript"]
-            del transcription["full_transcript"]
-
-            # Extract all words from all utterances into a flat list
-            all_words = []
-            for utterance in transcription["utterances"]:
-                if "words" in utterance:
-                    all_words.extend(utterance["words"])
-            transcription["words"] = all_words
-            del transcription["utterances"]
-
-            return transcription, None
-
-        elif status == "error":
-            error_code = result_data.get("error_code")
-            return None, {"reason": TranscriptionFailureReasons.TRANSCRIPTION_REQUEST_FAILED, "step": "transcribe_result_poll", "error_code": error_code}
-
-        elif status in ["queued", "processing"]:
-            # Still processing, wait and retry
-            logger.info(f"Gladia transcription status: {status}, waiting...")
-            time.sleep(1)
-            retry_count += 1
-
+    return {"result_url": transcribe_response_json["result_url"]}, None
+
+
+def check_transcription_job_via_gladia(utterance, transcription_job):
+    """
+    Returns the transcription or the failure data if the job has finished, and None, None if it is still running.
+    """
+    headers, failure_data = get_gladia_headers(utterance.recording)
+    if failure_data:
+        return None, failure_data
+
+    result_url = transcription_job["result_url"]
+    session = get_transcription_session(TranscriptionProviders.GLADIA)
+    with transcription_request_limit(TranscriptionProviders.GLADIA, headers["x-gladia-key"]) as request:
+        result_response = session.get(result_url, headers=headers)
+        request.record_response(result_response.status_code)
+
+    if result_response.status_code != 200:
+        logger.error(f"Gladia result fetch failed with status code {result_response.status_code}")
+        return None, None
+
+    result_data = result_response.json()
+    status = result_data.get("status")
+
+    if status == "done":
+        # Transcription is complete
+        transcription = result_data.get("result", {}).get("transcription", "")
+        logger.info("Gladia transcription completed successfully, now deleting audio file from Gladia")
+        # Delete the audio file from Gladia
+        delete_response = session.request("DELETE", result_url, headers=headers)
+        if delete_response.status_code != 200 and delete_response.status_code != 202:
+            logger.error(f"Gladia delete failed with status code {delete_response.status_code}")
         else:
-            # Unknown status
-            return None, {"reason": TranscriptionFailureReasons.TRANSCRIPTION_REQUEST_FAILED, "step": "transcribe_result_poll", "status": status}
+            logger.info("Gladia delete successful")
 
-    # If we've reached here, we've timed out
-    return None, {"reason": TranscriptionFailureReasons.TIMED_OUT, "step": "transcribe_result_poll"}
+        transcription["transcript"] = transcription["full_transcript"]
+        del transcription["full_transcript"]
+
+        # Extract all words from all utterances into a flat list
+        all_words = []
+        for utterance in transcription["utterances"]:
+            if "words" in utterance:
+                all_words.extend(utterance["words"])
+        transcription["words"] = all_words
+        del transcription["utterances"]
+
+        return transcription, None
+
+    elif status == "error":
+        error_code = result_data.get("error_code")
+        return None, {"reason": TranscriptionFailureReasons.TRANSCRIPTION_REQUEST_FAILED, "step": "transcribe_result_poll", "error_code": error_code}
+
+    elif status in ["queued", "processing"]:
+        # Still processing
+        logger.info(f"Gladia transcription status: {status}, waiting...")
+        return None, None
+
+    else:
+        # Unknown status
+        return None, {"reason": TranscriptionFailureReasons.TRANSCRIPTION_REQUEST_FAILED, "step": "transcribe_result_poll", "status": status}
+
+
+def get_transcription_via_gladia(utterance):
+    transcription_job, failure_data = submit_transcription_job_via_gladia(utterance)
+    if failure_data:
+        return None, failure_data
+    return wait_for_transcription_job(utterance, transcription_job, check_transcription_job_via_gladia)
 
 
 def get_transcription_via_deepgram(utterance):
     from deepgram import (
         DeepgramApiError,
-        DeepgramClient,
         FileSource,
         PrerecordedOptions,
     )
 
     recording = utterance.recording
     payload: FileSource = {
-        "buffer": utterance.audio_blob.tobytes(),
+        "buffer": get_utterance_pcm_audio(utterance),
     }
 
     deepgram_model = recording.bot.deepgram_model()
@@ -223,18 +549,21 @@ def get_transcription_via_deepgram(utterance):
         sample_rate=utterance.sample_rate,
     )
 
-    deepgram_credentials_record = recording.bot.project.credentials.filter(credential_type=Credentials.CredentialTypes.DEEPGRAM).first()
-    if not deepgram_credentials_record:
-        return None, {"reason": TranscriptionFailureReasons.CREDENTIALS_NOT_FOUND}
-
-    deepgram_credentials = deepgram_credentials_record.get_credentials()
+    deepgram_credentials = get_cached_credentials(recording.bot.project, Credentials.CredentialTypes.DEEPGRAM)
     if not deepgram_credentials:
         return None, {"reason": TranscriptionFailureReasons.CREDENTIALS_NOT_FOUND}
 
-    deepgram = DeepgramClient(deepgram_credentials["api_key"])
+    deepgram = get_deepgram_client(deepgram_credentials["api_key"])
 
     try:
-        response = deepgram.listen.rest.v("1").transcribe_file(payload, options)
+        with transcription_request_limit(TranscriptionProviders.DEEPGRAM, deepgram_credentials["api_key"]) as request:
+            try:
+                response = deepgram.listen.rest.v("1").transcribe_file(payload, options)
+            except DeepgramApiError as e:
+                # The SDK raises for error responses, with the status code as a string
+                request.record_response(int(e.status) if str(e.status).isdigit() else None)
+                raise
+            request.record_response(200)
     except DeepgramApiError as e:
         original_error_json = json.loads(e.original_error)
         if original_error_json.get("err_code") == "INVALID_AUTH":
@@ -251,16 +580,12 @@ def get_transcription_via_deepgram(utterance):
 
 def get_transcription_via_openai(utterance):
     recording = utterance.recording
-    openai_credentials_record = recording.bot.project.credentials.filter(credential_type=Credentials.CredentialTypes.OPENAI).first()
-    if not openai_credentials_record:
-        return None, {"reason": TranscriptionFailureReasons.CREDENTIALS_NOT_FOUND}
-
-    openai_credentials = openai_credentials_record.get_credentials()
+    openai_credentials = get_cached_credentials(recording.bot.project, Credentials.CredentialTypes.OPENAI)
     if not openai_credentials:
         return None, {"reason": TranscriptionFailureReasons.CREDENTIALS_NOT_FOUND}
 
     # Convert PCM audio to MP3
-    payload_mp3 = pcm_to_mp3(utterance.audio_blob.tobytes(), sample_rate=utterance.sample_rate)
+    payload_mp3 = pcm_to_mp3(get_utterance_pcm_audio(utterance), sample_rate=utterance.sample_rate)
 
     # Prepare the request for OpenAI's transcription API
     base_url = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
@@ -273,7 +598,9 @@ def get_transcription_via_openai(utterance):
         files["prompt"] = (None, recording.bot.openai_transcription_prompt())
     if recording.bot.openai_transcription_language():
         files["language"] = (None, recording.bot.openai_transcription_language())
-    response = requests.post(url, headers=headers, files=files)
+    with transcription_request_limit(TranscriptionProviders.OPENAI, openai_credentials["api_key"]) as request:
+        response = get_transcription_session(TranscriptionProviders.OPENAI).post(url, headers=headers, files=files)
+        request.record_response(response.status_code)
 
     if response.status_code == 401:
         return None, {"reason": TranscriptionFailureReasons.CREDENTIALS_INVALID}
@@ -291,13 +618,8 @@ def get_transcription_via_openai(utterance):
     return transcription, None
 
 
-def get_transcription_via_assemblyai(utterance):
-    recording = utterance.recording
-    assemblyai_credentials_record = recording.bot.project.credentials.filter(credential_type=Credentials.CredentialTypes.ASSEMBLY_AI).first()
-    if not assemblyai_credentials_record:
-        return None, {"reason": TranscriptionFailureReasons.CREDENTIALS_NOT_FOUND}
-
-    assemblyai_credentials = assemblyai_credentials_record.get_credentials()
+def get_assemblyai_headers(recording):
+    assemblyai_credentials = get_cached_credentials(recording.bot.project, Credentials.CredentialTypes.ASSEMBLY_AI)
     if not assemblyai_credentials:
         return None, {"reason": TranscriptionFailureReasons.CREDENTIALS_NOT_FOUND}
 
@@ -305,12 +627,26 @@ def get_transcription_via_assemblyai(utterance):
     if not api_key:
         return None, {"reason": TranscriptionFailureReasons.CREDENTIALS_NOT_FOUND, "error": "api_key not in credentials"}
 
-    headers = {"authorization": api_key}
-    base_url = "https://api.assemblyai.com/v2"
+    return {"authorization": api_key}, None
+
 
-    payload_mp3 = pcm_to_mp3(utterance.audio_blob.tobytes(), sample_rate=utterance.sample_rate)
+ASSEMBLYAI_BASE_URL = "https://api.assemblyai.com/v2"
 
-    upload_response = requests.post(f"{base_url}/upload", headers=headers, data=payload_mp3)
+
+def submit_transcription_job_via_assemblyai(utterance):
+    recording = utterance.recording
+    headers, failure_data = get_assemblyai_headers(recording)
+    if failure_data:
+        return None, failure_data
+
+    base_url = ASSEMBLYAI_BASE_URL
+
+    payload_mp3 = pcm_to_mp3(get_utterance_pcm_audio(utterance), sample_rate=utterance.sample_rate)
+
+    session = get_transcription_session(TranscriptionProviders.ASSEMBLY_AI)
+    with transcription_request_limit(TranscriptionProviders.ASSEMBLY_AI, headers["authorization"]) as request:
+        upload_response = session.post(f"{base_url}/upload", headers=headers, data=payload_mp3)
+        request.record_response(upload_response.status_code)
 
     if upload_response.status_code == 401:
         return None, {"reason": TranscriptionFailureReasons.CREDENTIALS_INVALID}
@@ -339,77 +675,83 @@ def get_transcription_via_assemblyai(utterance):
         data["speech_model"] = speech_model
 
     url = f"{base_url}/transcript"
-    response = requests.post(url, json=data, headers=headers)
+    with transcription_request_limit(TranscriptionProviders.ASSEMBLY_AI, headers["authorization"]) as request:
+        response = session.post(url, json=data, headers=headers)
+        request.record_response(response.status_code)
 
     if response.status_code != 200:
         return None, {"reason": TranscriptionFailureReasons.TRANSCRIPTION_REQUEST_FAILED, "status_code": response.status_code, "text": response.text}
 
-    transcript_id = response.json()["id"]
-    polling_endpoint = f"{base_url}/transcript/{transcript_id}"
-
-    # Poll the result_url until we get a completed transcription
-    max_retries = 120  # Maximum number of retries (2 minutes with 1s sleep)
-    retry_count = 0
-
-    while retry_count < max_retries:
-        polling_response = requests.get(polling_endpoint, headers=headers)
-
-        if polling_response.status_code != 200:
-            logger.error(f"AssemblyAI result fetch failed with status code {polling_response.status_code}")
-            time.sleep(10)
-            retry_count += 10
-            continue
-
-        transcription_result = polling_response.json()
-
-        if transcription_result["status"] == "completed":
-            logger.info("AssemblyAI transcription completed successfully, now deleting from AssemblyAI.")
-
-            # Delete the transcript from AssemblyAI
-            delete_response = requests.delete(polling_endpoint, headers=headers)
-            if delete_response.status_code != 200:
-                logger.error(f"AssemblyAI delete failed with status code {delete_response.status_code}: {delete_response.text}")
-            else:
-                logger.info("AssemblyAI delete successful")
-
-            transcript_text = transcription_result.get("text", "")
-            words = transcription_result.get("words", [])
-
-            formatted_words = []
-            if words:
-                for word in words:
-                    formatted_words.append(
-                        {
-                            "word": word["text"],
-                            "start": word["start"] / 1000.0,
-                            "end": word["end"] / 1000.0,
-                            "confidence": word["confidence"],
-                        }
-                    )
-
-            transcription = {"transcript": transcript_text, "words": formatted_words}
-            return transcription, None
-
-        elif transcription_result["status"] == "error":
-            error = transcription_result.get("error")
-            return None, {"reason": TranscriptionFailureReasons.TRANSCRIPTION_REQUEST_FAILED, "step": "transcribe_result_poll", "error": error}
-
-        else:  # queued, processing
-            logger.info(f"AssemblyAI transcription status: {transcription_result['status']}, waiting...")
-            time.sleep(1)
-            retry_count += 1
+    return {"transcript_id": response.json()["id"]}, None
 
-    # If we've reached here, we've timed out
-    return None, {"reason": TranscriptionFailureReasons.TIMED_OUT, "step": "transcribe_result_poll"}
 
+def check_transcription_job_via_assemblyai(utterance, transcription_job):
+    """
+    Returns the transcription or the failure data if the job has finished, and None, None if it is still running.
+    """
+    headers, failure_data = get_assemblyai_headers(utterance.recording)
+    if failure_data:
+        return None, failure_data
 
-def get_transcription_via_sarvam(utterance):
-    recording = utterance.recording
-    sarvam_credentials_record = recording.bot.project.credentials.filter(credential_type=Credentials.CredentialTypes.SARVAM).first()
-    if not sarvam_credentials_record:
-        return None, {"reason": TranscriptionFailureReasons.CREDENTIALS_NOT_FOUND}
+    polling_endpoint = f"{ASSEMBLYAI_BASE_URL}/transcript/{transcription_job['transcript_id']}"
+    session = get_transcription_session(TranscriptionProviders.ASSEMBLY_AI)
+    with transcription_request_limit(TranscriptionProviders.ASSEMBLY_AI, headers["authorization"]) as request:
+        polling_response = session.get(polling_endpoint, headers=headers)
+        request.record_response(polling_response.status_code)
+
+    if polling_response.status_code != 200:
+        logger.error(f"AssemblyAI result fetch failed with status code {polling_response.status_code}")
+        return None, None
+
+    transcription_result = polling_response.json()
+
+    if transcription_result["status"] == "completed":
+        logger.info("AssemblyAI transcription completed successfully, now deleting from AssemblyAI.")
 
-    sarvam_credentials = sarvam_credentials_record.get_credentials()
+        # Delete the transcript from AssemblyAI
+        delete_response = session.delete(polling_endpoint, headers=headers)
+        if delete_response.status_code != 200:
+            logger.error(f"AssemblyAI delete failed with status code {delete_response.status_code}: {delete_response.text}")
+        else:
+            logger.info("AssemblyAI delete successful")
+
+        transcript_text = transcription_result.get("text", "")
+        words = transcription_result.get("words", [])
+
+        formatted_words = []
+        if words:
+            for word in words:
+                formatted_words.append(
+                    {
+                        "word": word["text"],
+                        "start": word["start"] / 1000.0,
+                        "end": word["end"] / 1000.0,
+                        "confidence": word["confidence"],
+                    }
+                )
+
+        transcription = {"transcript": transcript_text, "words": formatted_words}
+        return transcription, None
+
+    elif transcription_result["status"] == "error":
+        error = transcription_result.get("error")
+        return None, {"reason": TranscriptionFailureReasons.TRANSCRIPTION_REQUEST_FAILED, "step": "transcribe_result_poll", "error": error}
+
+    else:  # queued, processing
+        logger.info(f"AssemblyAI transcription status: {transcription_result['status']}, waiting...")
+        return None, None
+
+
+def get_transcription_via_assemblyai(utterance):
+    transcription_job, failure_data = submit_transcription_job_via_assemblyai(utterance)
+    if failure_data:
+        return None, failure_data
+    return wait_for_transcription_job(utterance, transcription_job, check_transcription_job_via_assemblyai)
+
+
+def get_transcription_via_sarvam(utterance, with_timestamps=False):
+    recording = utterance.recording
+    sarvam_credentials = get_cached_credentials(recording.bot.project, Credentials.CredentialTypes.SARVAM)
     if not sarvam_credentials:
         return None, {"reason": TranscriptionFailureReasons.CREDENTIALS_NOT_FOUND}
 
@@ -421,19 +763,23 @@ def get_transcription_via_sarvam(utterance):
     base_url = "https://api.sarvam.ai/speech-to-text"
 
     # Sarvam says 16kHz sample rate works best
-    payload_mp3 = pcm_to_mp3(utterance.audio_blob.tobytes(), sample_rate=utterance.sample_rate, output_sample_rate=16000)
+    payload_mp3 = pcm_to_mp3(get_utterance_pcm_audio(utterance), sample_rate=utterance.sample_rate, output_sample_rate=16000)
 
     files = {"file": ("audio.mp3", payload_mp3, "audio/mpeg")}
 
     # Add optional parameters if configured
     data = {}
+    if with_timestamps:
+        data["with_timestamps"] = "true"
     if recording.bot.sarvam_language_code():
         data["language_code"] = recording.bot.sarvam_language_code()
     if recording.bot.sarvam_model():
         data["model"] = recording.bot.sarvam_model()
 
     try:
-        response = requests.post(base_url, headers=headers, files=files, data=data if data else None)
+        with transcription_request_limit(TranscriptionProviders.SARVAM, api_key) as request:
+            response = get_transcription_session(TranscriptionProviders.SARVAM).post(base_url, headers=headers, files=files, data=data if data else None)
+            request.record_response(response.status_code)
 
         if response.status_code == 403:
             return None, {"reason": TranscriptionFailureReasons.CREDENTIALS_INVALID}
@@ -454,6 +800,11 @@ def get_transcription_via_sarvam(utterance):
         # Format the response to match our expected schema
         transcription = {"transcript": transcript_text}
 
+        # Sarvam times chunks of a few words rather than each word, so they are only used to split up batches
+        timestamps = result.get("timestamps")
+        if with_timestamps and timestamps:
+            transcription["chunks"] = [{"text": text, "start": start, "end": end} for text, start, end in zip(timestamps["words"], timestamps["start_time_seconds"], timestamps["end_time_seconds"])]
+
         return transcription, None
 
     except requests.exceptions.RequestException as e:
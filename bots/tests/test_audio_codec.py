@@ -0,0 +1,42 @@
+import io
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from bots.audio_codec import audio_duration_ms, decode_to_pcm, encode_pcm
+
+
+def tone_pcm(sample_rate, duration_seconds, frequency=440):
+    t = np.arange(int(sample_rate * duration_seconds)) / sample_rate
+    return (8000 * np.sin(2 * np.pi * frequency * t)).astype(np.int16).tobytes()
+
+
+class AudioCodecTest(SimpleTestCase):
+    def test_flac_round_trip_is_lossless(self):
+        pcm_data = tone_pcm(32000, 1)
+
+        flac_data = encode_pcm(pcm_data, format="flac", sample_rate=32000)
+
+        self.assertEqual(flac_data[:4], b"fLaC")
+        self.assertEqual(decode_to_pcm(io.BytesIO(flac_data), format="flac"), pcm_data)
+
+    def test_mp3_is_resampled_while_encoding(self):
+        mp3_data = encode_pcm(tone_pcm(32000, 2), format="mp3", sample_rate=32000, output_sample_rate=16000, bitrate="64k")
+
+        self.assertEqual(audio_duration_ms(mp3_data, format="mp3"), 2000)
+        # Decoded at its own rate, two seconds of 16kHz audio
+        self.assertEqual(len(decode_to_pcm(mp3_data, format="mp3")), 2 * 16000 * 2)
+
+    def test_mp3_is_resampled_while_decoding(self):
+        mp3_data = encode_pcm(tone_pcm(16000, 1), format="mp3", sample_rate=16000)
+
+        pcm_data = decode_to_pcm(mp3_data, format="mp3", sample_rate=48000, channels=2)
+
+        # One second of 48kHz stereo audio, give or take the resampler's delay
+        self.assertAlmostEqual(len(pcm_data) / (48000 * 2 * 2), 1, delta=0.01)
+
+    def test_opus_is_encoded_in_ogg(self):
+        opus_data = encode_pcm(tone_pcm(48000, 1), format="opus", sample_rate=48000)
+
+        self.assertEqual(opus_data[:4], b"OggS")
+        self.assertAlmostEqual(audio_duration_ms(opus_data, format="ogg"), 1000, delta=30)
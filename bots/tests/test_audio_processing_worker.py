@@ -0,0 +1,66 @@
+import threading
+from unittest.mock import MagicMock
+
+from django.test import SimpleTestCase
+
+from bots.bot_controller.audio_processing_worker import AudioProcessingWorker
+
+
+class FakeAudioInputManager:
+    def __init__(self):
+        self.pending_audio = False
+        self.process_chunks_calls = 0
+        self.processed = threading.Event()
+        self.process_chunks_error = None
+
+    def has_pending_audio(self):
+        return self.pending_audio
+
+    def process_chunks(self):
+        self.process_chunks_calls += 1
+        self.processed.set()
+        if self.process_chunks_error:
+            raise self.process_chunks_error
+
+
+class AudioProcessingWorkerTest(SimpleTestCase):
+    def setUp(self):
+        self.audio_input_manager = FakeAudioInputManager()
+        self.on_error_callback = MagicMock()
+        self.worker = AudioProcessingWorker(audio_input_manager=self.audio_input_manager, on_error_callback=self.on_error_callback)
+        self.addCleanup(self.worker.stop)
+
+    def test_chunks_are_processed_when_woken(self):
+        self.worker.start()
+        self.assertFalse(self.audio_input_manager.processed.wait(timeout=0.3))
+
+        self.worker.wake()
+
+        self.assertTrue(self.audio_input_manager.processed.wait(timeout=5))
+        self.assertEqual(self.on_error_callback.call_count, 0)
+
+    def test_pending_audio_is_rechecked_without_being_woken(self):
+        self.audio_input_manager.pending_audio = True
+        self.worker.start()
+
+        # Someone is mid utterance, so the worker keeps checking for the silence that ends it
+        self.assertTrue(self.audio_input_manager.processed.wait(timeout=5))
+
+    def test_stop_ends_the_thread(self):
+        self.worker.start()
+
+        self.worker.stop()
+
+        self.assertFalse(self.worker.thread.is_alive())
+        self.assertEqual(self.audio_input_manager.process_chunks_calls, 0)
+
+    def test_error_is_reported_and_stops_the_worker(self):
+        error = Exception("VAD failed")
+        self.audio_input_manager.process_chunks_error = error
+        self.worker.start()
+
+        self.worker.wake()
+        self.worker.thread.join(timeout=5)
+
+        self.assertFalse(self.worker.thread.is_alive())
+        self.on_error_callback.assert_called_once_with(error)
@@ -0,0 +1,132 @@
+import threading
+from unittest.mock import MagicMock, patch
+
+from django.db import connection
+from django.test.testcases import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+
+from bots.bot_controller import BotController
+from bots.models import (
+    Bot,
+    BotEventManager,
+    BotEventTypes,
+    Organization,
+    Participant,
+    Project,
+    Recording,
+    RecordingStates,
+    RecordingTranscriptionStates,
+    RecordingTypes,
+    TranscriptionProviders,
+    TranscriptionTypes,
+    Utterance,
+)
+
+
+class BotControllerIdentityMapTest(TransactionTestCase):
+    def setUp(self):
+        self.organization = Organization.objects.create(name="Test Org")
+        self.project = Project.objects.create(name="Test Project", organization=self.organization)
+        self.bot = Bot.objects.create(
+            project=self.project,
+            name="Test Bot",
+            meeting_url="https://meet.google.com/abc-defg-hij",
+        )
+        self.recording = Recording.objects.create(
+            bot=self.bot,
+            recording_type=RecordingTypes.AUDIO_AND_VIDEO,
+            transcription_type=TranscriptionTypes.NON_REALTIME,
+            transcription_provider=TranscriptionProviders.CLOSED_CAPTION_FROM_PLATFORM,
+            is_default_recording=True,
+        )
+
+        BotEventManager.create_event(self.bot, BotEventTypes.JOIN_REQUESTED)
+        BotEventManager.create_event(self.bot, BotEventTypes.BOT_JOINED_MEETING)
+
+        self.controller = BotController(self.bot.id)
+
+        self.participant_info = {
+            "participant_uuid": "participant_1",
+            "participant_user_uuid": "user_1",
+            "participant_full_name": "Test User",
+            "participant_is_the_bot": False,
+        }
+
+    def caption_message(self, suffix):
+        return {
+            **self.participant_info,
+            "timestamp_ms": 1000,
+            "duration_ms": 500,
+            "text": f"Caption {suffix}",
+            "source_uuid_suffix": suffix,
+            "sample_rate": None,
+        }
+
+    def test_default_recording_is_only_fetched_once(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.controller.get_recording_transcription_provider(), TranscriptionProviders.CLOSED_CAPTION_FROM_PLATFORM)
+            self.controller.get_recording_filename()
+            self.controller.get_recording_transcription_provider()
+
+    def test_recording_in_progress_is_refetched_after_state_transition(self):
+        # Bot is joined but not recording yet
+        self.assertIsNone(self.controller.get_recording_in_progress())
+        with self.assertNumQueries(0):
+            self.assertIsNone(self.controller.get_recording_in_progress())
+
+        BotEventManager.create_event(self.controller.bot_in_db, BotEventTypes.BOT_RECORDING_PERMISSION_GRANTED)
+
+        recording_in_progress = self.controller.get_recording_in_progress()
+        self.assertEqual(recording_in_progress.id, self.recording.id)
+        self.assertEqual(recording_in_progress.state, RecordingStates.IN_PROGRESS)
+        with self.assertNumQueries(0):
+            self.controller.get_recording_in_progress()
+
+    @patch("bots.bot_controller.database_write_buffer.trigger_webhooks")
+    def test_repeated_captions_only_write_the_utterance(self, mock_trigger_webhooks):
+        BotEventManager.create_event(self.controller.bot_in_db, BotEventTypes.BOT_RECORDING_PERMISSION_GRANTED)
+
+        self.controller.save_closed_caption_utterance(self.caption_message("1"))
+        self.controller.database_write_buffer.flush()
+
+        self.recording.refresh_from_db()
+        self.assertEqual(self.recording.transcription_state, RecordingTranscriptionStates.IN_PROGRESS)
+        self.assertEqual(Participant.objects.filter(bot=self.bot).count(), 1)
+
+        # The participant, recording and transcription state are all cached, so only the utterance upsert hits the database
+        with CaptureQueriesContext(connection) as queries:
+            self.controller.save_closed_caption_utterance(self.caption_message("2"))
+            self.controller.database_write_buffer.flush()
+        for query in queries.captured_queries:
+            self.assertNotIn('"bots_participant"', query["sql"])
+            self.assertNotIn('"bots_recording"', query["sql"])
+
+        self.assertEqual(Utterance.objects.filter(recording=self.recording).count(), 2)
+        self.assertEqual(mock_trigger_webhooks.call_count, 2)
+
+    def test_participant_is_cached_across_callers(self):
+        self.controller.adapter = MagicMock()
+        self.controller.adapter.get_participant.return_value = self.participant_info
+
+        participant = self.controller.get_or_create_participant(self.participant_info)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.controller.get_or_create_participant(self.participant_info), participant)
+
+    @patch("bots.bot_controller.bot_controller.store_utterance_audio", return_value="audio.flac")
+    def test_utterance_audio_is_uploaded_off_the_audio_processing_worker(self, mock_store_utterance_audio):
+        upload_thread_names = []
+        mock_store_utterance_audio.side_effect = lambda *args, **kwargs: upload_thread_names.append(threading.current_thread().name) or "audio.flac"
+        self.controller.main_loop_scheduler = MagicMock()
+
+        self.controller.on_audio_utterance_completed({"speaker_id": "participant_1", "audio_data": memoryview(b"\x01\x02"), "sample_rate": 16000, "timestamp_ms": 1000})
+        self.controller.wait_for_utterance_audio_uploads()
+
+        self.assertTrue(upload_thread_names[0].startswith("utterance_audio_upload"))
+        utterance = self.controller.completed_audio_utterances.get_nowait()
+        self.assertEqual((utterance["audio_data"], utterance["audio_file"]), (b"\x01\x02", "audio.flac"))
+
+        # Once the uploads were waited for, later utterances are uploaded on the calling thread
+        self.controller.on_audio_utterance_completed({"speaker_id": "participant_1", "audio_data": b"\x03", "sample_rate": 16000, "timestamp_ms": 2000})
+        self.assertEqual(upload_thread_names[1], threading.current_thread().name)
+        self.assertEqual(self.controller.completed_audio_utterances.get_nowait()["audio_file"], "audio.flac")
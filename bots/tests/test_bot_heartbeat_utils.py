@@ -0,0 +1,84 @@
+from unittest.mock import MagicMock, patch
+
+import redis
+from django.test import TestCase
+from django.utils import timezone
+
+from bots.bot_heartbeat_utils import heartbeat_key, sync_bot_heartbeat_from_redis, sync_bot_heartbeats_to_database
+from bots.management.commands.clean_up_bots_with_heartbeat_timeout_or_that_never_launched import Command
+from bots.models import Bot, BotEventSubTypes, BotEventTypes, BotStates, Organization, Project
+
+
+class FakeRedis:
+    def __init__(self, values):
+        self.values = {key.encode("utf-8"): str(value).encode("utf-8") for key, value in values.items()}
+
+    def mget(self, keys):
+        return [self.values.get(key.encode("utf-8")) for key in keys]
+
+    def scan_iter(self, match, count):
+        return iter(self.values.keys())
+
+
+class BotHeartbeatUtilsTest(TestCase):
+    def setUp(self):
+        self.organization = Organization.objects.create(name="Test Org")
+        self.project = Project.objects.create(name="Test Project", organization=self.organization)
+        self.now = int(timezone.now().timestamp())
+        self.bot = Bot.objects.create(
+            project=self.project,
+            name="Test Bot",
+            meeting_url="https://meet.google.com/abc-defg-hij",
+            state=BotStates.JOINED_RECORDING,
+            first_heartbeat_timestamp=self.now - 3600,
+            last_heartbeat_timestamp=self.now - 660,
+        )
+
+    def test_sync_moves_heartbeats_forward_without_bumping_version(self):
+        other_bot = Bot.objects.create(
+            project=self.project,
+            name="Other Bot",
+            meeting_url="https://meet.google.com/abc-defg-hij",
+            state=BotStates.JOINED_RECORDING,
+            first_heartbeat_timestamp=self.now - 3600,
+            last_heartbeat_timestamp=self.now - 30,
+        )
+        version_before_sync = self.bot.version
+        fake_redis = FakeRedis({heartbeat_key(self.bot.id): self.now - 60, heartbeat_key(other_bot.id): self.now - 120})
+
+        with patch("bots.bot_heartbeat_utils.get_redis_client", return_value=fake_redis):
+            sync_bot_heartbeats_to_database()
+
+        self.bot.refresh_from_db()
+        other_bot.refresh_from_db()
+        self.assertEqual(self.bot.last_heartbeat_timestamp, self.now - 60)
+        self.assertEqual(self.bot.version, version_before_sync)
+        # The database already had a newer heartbeat for this one
+        self.assertEqual(other_bot.last_heartbeat_timestamp, self.now - 30)
+
+    def test_sync_bot_heartbeat_from_redis_fails_open(self):
+        failing_redis = MagicMock()
+        failing_redis.mget.side_effect = redis.exceptions.ConnectionError("Connection refused")
+
+        with patch("bots.bot_heartbeat_utils.get_redis_client", return_value=failing_redis):
+            sync_bot_heartbeat_from_redis(self.bot)
+
+        self.assertEqual(self.bot.last_heartbeat_timestamp, self.now - 660)
+
+    def test_clean_up_skips_bots_with_recent_redis_heartbeat(self):
+        fake_redis = FakeRedis({heartbeat_key(self.bot.id): self.now - 30})
+
+        with patch("bots.bot_heartbeat_utils.get_redis_client", return_value=fake_redis):
+            Command().terminate_bots_with_heartbeat_timeout()
+
+        self.bot.refresh_from_db()
+        self.assertEqual(self.bot.state, BotStates.JOINED_RECORDING)
+        self.assertEqual(self.bot.last_heartbeat_timestamp, self.now - 30)
+
+    def test_clean_up_terminates_bots_without_redis_heartbeat(self):
+        with patch("bots.bot_heartbeat_utils.get_redis_client", return_value=FakeRedis({})):
+            Command().terminate_bots_with_heartbeat_timeout()
+
+        self.bot.refresh_from_db()
+        self.assertEqual(self.bot.state, BotStates.FATAL_ERROR)
+        self.assertTrue(self.bot.bot_events.filter(event_type=BotEventTypes.FATAL_ERROR, event_sub_type=BotEventSubTypes.FATAL_ERROR_HEARTBEAT_TIMEOUT).exists())
@@ -0,0 +1,85 @@
+import os
+import urllib.error
+import urllib.request
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from bots import bot_metrics
+from bots.bot_metrics import MetricsRegistry, start_metrics_server, start_metrics_server_if_configured
+
+
+class MetricsRegistryTest(SimpleTestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_counter_and_gauge_render_in_prometheus_format(self):
+        counter = self.registry.counter("test_messages_total", "Messages received", ["type"])
+        gauge = self.registry.gauge("test_queue_depth", "Items in the queue")
+
+        counter.inc(type="Video")
+        counter.inc(3, type="Video")
+        counter.inc(type='Caption"Update')
+        gauge.set(7)
+
+        self.assertEqual(
+            self.registry.render_prometheus_text(),
+            '# HELP test_messages_total Messages received\n# TYPE test_messages_total counter\ntest_messages_total{type="Video"} 4\ntest_messages_total{type="Caption\\"Update"} 1\n# HELP test_queue_depth Items in the queue\n# TYPE test_queue_depth gauge\ntest_queue_depth 7\n',
+        )
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = self.registry.histogram("test_duration_seconds", "Duration", ["task"], buckets=(0.1, 1))
+
+        histogram.observe(0.05, task="flush")
+        histogram.observe(0.1, task="flush")
+        histogram.observe(0.5, task="flush")
+        histogram.observe(5, task="flush")
+
+        lines = self.registry.render_prometheus_text().splitlines()
+        self.assertIn('test_duration_seconds_bucket{task="flush",le="0.1"} 2', lines)
+        self.assertIn('test_duration_seconds_bucket{task="flush",le="1"} 3', lines)
+        self.assertIn('test_duration_seconds_bucket{task="flush",le="+Inf"} 4', lines)
+        self.assertIn('test_duration_seconds_sum{task="flush"} 5.65', lines)
+        self.assertIn('test_duration_seconds_count{task="flush"} 4', lines)
+
+    def test_wrong_labels_are_rejected(self):
+        counter = self.registry.counter("test_messages_total", "Messages received", ["type"])
+
+        with self.assertRaises(ValueError):
+            counter.inc()
+        with self.assertRaises(ValueError):
+            counter.inc(type="Video", queue="q1")
+
+    def test_metric_names_must_be_unique(self):
+        self.registry.gauge("test_queue_depth", "Items in the queue")
+
+        with self.assertRaises(ValueError):
+            self.registry.counter("test_queue_depth", "Items in the queue")
+
+
+class MetricsServerTest(SimpleTestCase):
+    def test_metrics_endpoint_serves_the_registry(self):
+        bot_metrics.websocket_messages_total.inc(type="UsersUpdate")
+        server = start_metrics_server(0)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+        with urllib.request.urlopen(f"{base_url}/metrics", timeout=5) as response:
+            body = response.read().decode("utf-8")
+            self.assertTrue(response.headers["Content-Type"].startswith("text/plain; version=0.0.4"))
+
+        self.assertIn('bot_websocket_messages_total{type="UsersUpdate"}', body)
+        self.assertIn("# TYPE bot_main_loop_task_duration_seconds histogram", body)
+
+        with self.assertRaises(urllib.error.HTTPError) as context:
+            urllib.request.urlopen(f"{base_url}/other", timeout=5)
+        self.assertEqual(context.exception.code, 404)
+
+    def test_server_is_not_started_without_a_port(self):
+        with patch.dict(os.environ, {}, clear=False):
+            os.environ.pop("BOT_METRICS_PORT", None)
+            self.assertIsNone(start_metrics_server_if_configured())
+
+        with patch.dict(os.environ, {"BOT_METRICS_PORT": "not_a_port"}):
+            self.assertIsNone(start_metrics_server_if_configured())
@@ -0,0 +1,63 @@
+import threading
+import time
+
+from django.test import SimpleTestCase
+
+from bots.bot_controller.cleanup_step_runner import CleanupStepRunner
+
+
+class CleanupStepRunnerTest(SimpleTestCase):
+    def test_independent_steps_run_concurrently_and_dependencies_run_in_order(self):
+        runner = CleanupStepRunner()
+        events = []
+        barrier = threading.Barrier(2, timeout=5)
+
+        def finalize_recording():
+            # Only passes if the utterance wait is running at the same time
+            barrier.wait()
+            events.append("finalize_recording")
+
+        def wait_for_utterances():
+            barrier.wait()
+            events.append("wait_for_utterances")
+
+        runner.add_step("finalize_recording", finalize_recording)
+        runner.add_step("upload_recording", lambda: events.append("upload_recording"), depends_on=["finalize_recording"])
+        runner.add_step("wait_for_utterances", wait_for_utterances)
+        runner.run()
+
+        self.assertEqual(set(events), {"finalize_recording", "upload_recording", "wait_for_utterances"})
+        self.assertLess(events.index("finalize_recording"), events.index("upload_recording"))
+        self.assertEqual(set(runner.step_durations_seconds.keys()), {"finalize_recording", "upload_recording", "wait_for_utterances"})
+
+    def test_failed_step_skips_its_dependents_but_not_unrelated_steps(self):
+        runner = CleanupStepRunner()
+        events = []
+
+        def finalize_recording():
+            raise RuntimeError("ffmpeg failed")
+
+        def wait_for_utterances():
+            time.sleep(0.1)
+            events.append("wait_for_utterances")
+
+        runner.add_step("finalize_recording", finalize_recording)
+        runner.add_step("upload_recording", lambda: events.append("upload_recording"), depends_on=["finalize_recording"])
+        runner.add_step("wait_for_utterances", wait_for_utterances)
+
+        with self.assertRaisesRegex(RuntimeError, "ffmpeg failed"):
+            runner.run()
+
+        self.assertEqual(events, ["wait_for_utterances"])
+
+    def test_run_step_now_records_duration(self):
+        runner = CleanupStepRunner()
+        runner.run_step_now("adapter_leave", lambda: time.sleep(0.05))
+
+        self.assertGreaterEqual(runner.step_durations_seconds["adapter_leave"], 0.05)
+
+    def test_unknown_dependency_is_rejected(self):
+        runner = CleanupStepRunner()
+
+        with self.assertRaises(ValueError):
+            runner.add_step("upload_recording", lambda: None, depends_on=["finalize_recording"])
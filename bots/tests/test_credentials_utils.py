@@ -0,0 +1,68 @@
+from unittest import mock
+
+from django.test import TransactionTestCase
+
+from accounts.models import Organization
+from bots.credentials_utils import clear_credentials_cache, get_cached_credentials, get_cached_credentials_client
+from bots.models import Credentials, Project
+
+
+class CredentialsCacheTest(TransactionTestCase):
+    def setUp(self):
+        self.organization = Organization.objects.create(name="Test Org")
+        self.project = Project.objects.create(name="Test Project", organization=self.organization)
+        self.credentials = Credentials.objects.create(project=self.project, credential_type=Credentials.CredentialTypes.DEEPGRAM)
+        self.credentials.set_credentials({"api_key": "key_1"})
+
+        clear_credentials_cache()
+        self.addCleanup(clear_credentials_cache)
+
+    def test_credentials_are_only_fetched_once(self):
+        self.assertEqual(get_cached_credentials(self.project, Credentials.CredentialTypes.DEEPGRAM), {"api_key": "key_1"})
+
+        with self.assertNumQueries(0), mock.patch.object(Credentials, "get_credentials") as mock_get_credentials:
+            self.assertEqual(get_cached_credentials(self.project, Credentials.CredentialTypes.DEEPGRAM), {"api_key": "key_1"})
+        mock_get_credentials.assert_not_called()
+
+    def test_setting_credentials_invalidates_them(self):
+        get_cached_credentials(self.project, Credentials.CredentialTypes.DEEPGRAM)
+
+        self.credentials.set_credentials({"api_key": "key_2"})
+
+        self.assertEqual(get_cached_credentials(self.project, Credentials.CredentialTypes.DEEPGRAM), {"api_key": "key_2"})
+
+    @mock.patch.dict("os.environ", {"CREDENTIALS_CACHE_TTL_SECONDS": "60"})
+    def test_credentials_are_fetched_again_once_they_expire(self):
+        with mock.patch("bots.credentials_utils.time.monotonic", return_value=1000):
+            get_cached_credentials(self.project, Credentials.CredentialTypes.DEEPGRAM)
+
+        # Changed by another process, so this one isn't told
+        Credentials.objects.filter(id=self.credentials.id).update(_encrypted_data=None)
+
+        with mock.patch("bots.credentials_utils.time.monotonic", return_value=1059):
+            self.assertEqual(get_cached_credentials(self.project, Credentials.CredentialTypes.DEEPGRAM), {"api_key": "key_1"})
+        with mock.patch("bots.credentials_utils.time.monotonic", return_value=1061):
+            self.assertIsNone(get_cached_credentials(self.project, Credentials.CredentialTypes.DEEPGRAM))
+
+    def test_missing_credentials_are_not_cached(self):
+        self.assertIsNone(get_cached_credentials(self.project, Credentials.CredentialTypes.GLADIA))
+
+        Credentials.objects.create(project=self.project, credential_type=Credentials.CredentialTypes.GLADIA).set_credentials({"api_key": "gladia_key"})
+
+        self.assertEqual(get_cached_credentials(self.project, Credentials.CredentialTypes.GLADIA), {"api_key": "gladia_key"})
+
+    def test_client_is_reused_until_the_credentials_change(self):
+        build_client = mock.Mock(side_effect=lambda credentials: object())
+
+        with mock.patch("bots.credentials_utils.time.monotonic", return_value=1000):
+            client = get_cached_credentials_client(self.project, Credentials.CredentialTypes.DEEPGRAM, "client", build_client)
+            self.assertIs(get_cached_credentials_client(self.project, Credentials.CredentialTypes.DEEPGRAM, "client", build_client), client)
+
+        # The credentials are fetched again once they expire, but they haven't changed, so the client is kept
+        with mock.patch("bots.credentials_utils.time.monotonic", return_value=100000):
+            self.assertIs(get_cached_credentials_client(self.project, Credentials.CredentialTypes.DEEPGRAM, "client", build_client), client)
+
+        self.credentials.set_credentials({"api_key": "key_2"})
+
+        self.assertIsNot(get_cached_credentials_client(self.project, Credentials.CredentialTypes.DEEPGRAM, "client", build_client), client)
+        self.assertEqual(build_client.call_args_list, [mock.call({"api_key": "key_1"}), mock.call({"api_key": "key_2"})])
@@ -0,0 +1,215 @@
+from unittest.mock import Mock, patch
+
+from django.db import OperationalError
+from django.test.testcases import TransactionTestCase
+
+from bots.bot_controller.database_write_buffer import DatabaseWriteBuffer
+from bots.models import (
+    Bot,
+    ChatMessage,
+    ChatMessageToOptions,
+    Organization,
+    Participant,
+    ParticipantEvent,
+    ParticipantEventTypes,
+    Project,
+    Recording,
+    RecordingTypes,
+    TranscriptionProviders,
+    TranscriptionTypes,
+    Utterance,
+    WebhookDeliveryAttempt,
+    WebhookSubscription,
+    WebhookTriggerTypes,
+)
+
+
+class DatabaseWriteBufferTest(TransactionTestCase):
+    def setUp(self):
+        self.organization = Organization.objects.create(name="Test Org")
+        self.project = Project.objects.create(name="Test Project", organization=self.organization)
+        self.bot = Bot.objects.create(project=self.project, name="Test Bot", meeting_url="https://meet.google.com/abc-defg-hij")
+        self.recording = Recording.objects.create(
+            bot=self.bot,
+            recording_type=RecordingTypes.AUDIO_AND_VIDEO,
+            transcription_type=TranscriptionTypes.NON_REALTIME,
+            transcription_provider=TranscriptionProviders.DEEPGRAM,
+            is_default_recording=True,
+        )
+        self.participant = Participant.objects.create(bot=self.bot, uuid="user1", full_name="Test User")
+        self.bot_participant = Participant.objects.create(bot=self.bot, uuid="bot1", full_name="Test Bot", is_the_bot=True)
+
+        WebhookSubscription.objects.create(
+            project=self.project,
+            url="https://example.com/webhook",
+            triggers=[WebhookTriggerTypes.TRANSCRIPT_UPDATE, WebhookTriggerTypes.PARTICIPANT_EVENTS_JOIN_LEAVE, WebhookTriggerTypes.CHAT_MESSAGES_UPDATE],
+        )
+
+        self.buffer = DatabaseWriteBuffer(bot=self.bot, flush_interval_seconds=0.5, max_buffered_records=3)
+
+    def caption_utterance(self, text):
+        return Utterance(
+            recording=self.recording,
+            source_uuid=f"{self.recording.object_id}-user1-caption1",
+            source=Utterance.Sources.CLOSED_CAPTION_FROM_PLATFORM,
+            participant=self.participant,
+            transcription={"transcript": text},
+            timestamp_ms=1000,
+            duration_ms=500,
+        )
+
+    def chat_message(self, text):
+        return ChatMessage(
+            bot=self.bot,
+            source_uuid=f"{self.recording.object_id}-message1",
+            timestamp=1000,
+            to=ChatMessageToOptions.EVERYONE,
+            text=text,
+            participant=self.participant,
+        )
+
+    def test_seconds_until_flush_due(self):
+        self.assertIsNone(self.buffer.seconds_until_flush_due())
+
+        self.buffer.add_utterance(self.caption_utterance("Hello"))
+        self.assertGreater(self.buffer.seconds_until_flush_due(), 0)
+
+        self.buffer.add_chat_message(self.chat_message("Hi"))
+        self.buffer.add_participant_event(ParticipantEvent(participant=self.participant, event_type=ParticipantEventTypes.JOIN, timestamp_ms=1000))
+        self.assertTrue(self.buffer.is_full())
+        self.assertEqual(self.buffer.seconds_until_flush_due(), 0)
+
+    @patch("bots.tasks.deliver_webhook_task.deliver_webhook.delay")
+    @patch("bots.tasks.process_utterance_task.process_utterance.delay")
+    def test_flush_writes_records_and_webhooks_in_bulk(self, mock_process_utterance_delay, mock_deliver_webhook_delay):
+        # Two upserts of the same caption are coalesced
+        self.buffer.add_utterance(self.caption_utterance("Hello"))
+        self.buffer.add_utterance(self.caption_utterance("Hello world"))
+        audio_utterance = Utterance(
+            recording=self.recording,
+            source=Utterance.Sources.PER_PARTICIPANT_AUDIO,
+            participant=self.participant,
+            audio_blob=b"\x00\x01" * 100,
+            audio_format=Utterance.AudioFormat.PCM,
+            timestamp_ms=2000,
+            duration_ms=3,
+            sample_rate=32000,
+        )
+        self.buffer.add_utterance(audio_utterance)
+        self.buffer.add_participant_event(ParticipantEvent(participant=self.participant, event_type=ParticipantEventTypes.JOIN, timestamp_ms=1000))
+        self.buffer.add_participant_event(ParticipantEvent(participant=self.bot_participant, event_type=ParticipantEventTypes.JOIN, timestamp_ms=1000))
+        self.buffer.add_chat_message(self.chat_message("Hi"))
+
+        self.buffer.flush()
+
+        self.assertIsNone(self.buffer.seconds_until_flush_due())
+        self.assertEqual(Utterance.objects.filter(recording=self.recording).count(), 2)
+        caption_utterance = Utterance.objects.get(source=Utterance.Sources.CLOSED_CAPTION_FROM_PLATFORM)
+        self.assertEqual(caption_utterance.transcription, {"transcript": "Hello world"})
+        self.assertEqual(ParticipantEvent.objects.count(), 2)
+        self.assertTrue(all(participant_event.object_id.startswith("pe_") for participant_event in ParticipantEvent.objects.all()))
+        self.assertEqual(ChatMessage.objects.count(), 1)
+
+        # Only the new audio utterance needs to be transcribed
+        mock_process_utterance_delay.assert_called_once_with(audio_utterance.id)
+        self.assertEqual(self.recording.transcription_progress.pending_utterance_count, 1)
+
+        # One transcript update, one participant event (not the bot's) and one chat message
+        self.assertEqual(WebhookDeliveryAttempt.objects.count(), 3)
+        self.assertEqual(mock_deliver_webhook_delay.call_count, 3)
+
+    @patch("bots.tasks.deliver_webhook_task.deliver_webhook.delay")
+    def test_upserted_chat_message_keeps_its_object_id(self, mock_deliver_webhook_delay):
+        self.buffer.add_chat_message(self.chat_message("Hi"))
+        self.buffer.flush()
+        original_object_id = ChatMessage.objects.get().object_id
+
+        self.buffer.add_chat_message(self.chat_message("Hi, edited"))
+        self.buffer.flush()
+
+        chat_message = ChatMessage.objects.get()
+        self.assertEqual(chat_message.text, "Hi, edited")
+        self.assertEqual(chat_message.object_id, original_object_id)
+
+        webhook_payloads = [attempt.payload for attempt in WebhookDeliveryAttempt.objects.order_by("created_at")]
+        self.assertEqual([payload["id"] for payload in webhook_payloads], [original_object_id, original_object_id])
+        self.assertEqual(webhook_payloads[1]["text"], "Hi, edited")
+
+    @patch("bots.tasks.deliver_webhook_task.deliver_webhook.delay")
+    @patch("bots.tasks.process_utterance_task.process_utterance.delay")
+    def test_failed_flush_puts_the_records_back(self, mock_process_utterance_delay, mock_deliver_webhook_delay):
+        self.buffer.add_utterance(self.caption_utterance("Hello"))
+        self.buffer.add_participant_event(ParticipantEvent(participant=self.participant, event_type=ParticipantEventTypes.JOIN, timestamp_ms=1000))
+        self.buffer.add_chat_message(self.chat_message("Hi"))
+
+        # The utterance is inserted before the participant events fail, and rolled back with them
+        with patch.object(ParticipantEvent.objects, "bulk_create", side_effect=OperationalError("connection lost")):
+            with self.assertRaises(OperationalError):
+                self.buffer.flush()
+
+        self.assertEqual(Utterance.objects.count(), 0)
+        self.assertEqual(self.buffer.buffered_record_count(), 3)
+        self.assertEqual(self.buffer.seconds_until_flush_due(), 0)
+
+        # A newer version of the chat message buffered since replaces the one that was put back
+        self.buffer.add_chat_message(self.chat_message("Hi, edited"))
+        self.buffer.flush()
+
+        self.assertEqual(Utterance.objects.get().transcription, {"transcript": "Hello"})
+        self.assertEqual(ParticipantEvent.objects.count(), 1)
+        self.assertEqual(ChatMessage.objects.get().text, "Hi, edited")
+        self.assertIsNone(self.buffer.seconds_until_flush_due())
+
+    def audio_utterance(self, timestamp_ms, duration_ms):
+        return Utterance(
+            recording=self.recording,
+            source=Utterance.Sources.PER_PARTICIPANT_AUDIO,
+            participant=self.participant,
+            audio_blob=b"\x00\x01" * 100,
+            audio_format=Utterance.AudioFormat.PCM,
+            timestamp_ms=timestamp_ms,
+            duration_ms=duration_ms,
+            sample_rate=32000,
+        )
+
+    @patch("bots.tasks.process_utterance_task.UTTERANCE_BATCHING_ENABLED", True)
+    @patch("bots.tasks.process_utterance_task.UTTERANCE_BATCH_MAX_DELAY_SECONDS", 15)
+    @patch("bots.tasks.deliver_webhook_task.deliver_webhook.delay")
+    @patch("bots.tasks.process_utterance_task.process_utterance_batch.delay")
+    @patch("bots.tasks.process_utterance_task.process_utterance.delay")
+    def test_utterances_from_separate_flushes_are_batched(self, mock_process_utterance_delay, mock_process_utterance_batch_delay, mock_deliver_webhook_delay):
+        now = 0
+        with patch("bots.bot_controller.database_write_buffer.time", Mock(monotonic=lambda: now)):
+            # A speaker talks for two seconds at a time, with three seconds of silence in between, so each
+            # utterance is written by a different flush
+            utterances = []
+            while now < 20:
+                if now % 5 == 0 and now < 15:
+                    utterances.append(self.audio_utterance(timestamp_ms=int(now * 1000), duration_ms=2000))
+                    self.buffer.add_utterance(utterances[-1])
+                if self.buffer.seconds_until_flush_due() == 0:
+                    self.buffer.flush()
+                if now == 15:
+                    # Every utterance has been written, but the batch is still held for more
+                    self.assertEqual(Utterance.objects.count(), 3)
+                    mock_process_utterance_batch_delay.assert_not_called()
+                now += 0.5
+
+        # The batch was sent once the first utterance had waited 15 seconds after it was written
+        mock_process_utterance_batch_delay.assert_called_once_with([utterance.id for utterance in utterances])
+        mock_process_utterance_delay.assert_not_called()
+        self.assertIsNone(self.buffer.seconds_until_flush_due())
+
+    @patch("bots.tasks.process_utterance_task.UTTERANCE_BATCHING_ENABLED", True)
+    @patch("bots.tasks.process_utterance_task.process_utterance_batch.delay")
+    @patch("bots.tasks.process_utterance_task.process_utterance.delay")
+    def test_final_flush_sends_held_utterances(self, mock_process_utterance_delay, mock_process_utterance_batch_delay):
+        utterance = self.audio_utterance(timestamp_ms=0, duration_ms=2000)
+        self.buffer.add_utterance(utterance)
+        self.buffer.flush()
+        mock_process_utterance_delay.assert_not_called()
+
+        self.buffer.flush(final=True)
+
+        mock_process_utterance_delay.assert_called_once_with(utterance.id)
+        mock_process_utterance_batch_delay.assert_not_called()
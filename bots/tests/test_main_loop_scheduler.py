@@ -0,0 +1,102 @@
+import threading
+import time
+
+import gi
+from django.test import TestCase
+
+from bots.bot_controller.main_loop_scheduler import MainLoopScheduler
+
+gi.require_version("GLib", "2.0")
+from gi.repository import GLib
+
+
+class MainLoopSchedulerTest(TestCase):
+    def setUp(self):
+        self.main_loop = GLib.MainLoop()
+        self.errors = []
+        self.scheduler = MainLoopScheduler(on_task_error_callback=lambda task_name, e: self.errors.append((task_name, e)))
+
+    def run_main_loop_for(self, seconds):
+        GLib.timeout_add(int(seconds * 1000), self.main_loop.quit)
+        self.main_loop.run()
+
+    def test_task_runs_at_the_delay_it_returns(self):
+        run_times = []
+
+        def task():
+            run_times.append(time.monotonic())
+            if len(run_times) < 3:
+                return 0.2
+            return None
+
+        self.scheduler.add_task("task", task)
+        self.run_main_loop_for(1)
+
+        # Ran immediately, then twice more 200ms apart, then went idle
+        self.assertEqual(len(run_times), 3)
+        self.assertGreaterEqual(run_times[1] - run_times[0], 0.19)
+        self.assertGreaterEqual(run_times[2] - run_times[1], 0.19)
+
+    def test_idle_task_runs_when_woken_from_another_thread(self):
+        run_count = {"value": 0}
+
+        def task():
+            run_count["value"] += 1
+            return None
+
+        self.scheduler.add_task("task", task)
+        threading.Timer(0.2, lambda: self.scheduler.wake("task")).start()
+        self.run_main_loop_for(0.5)
+
+        self.assertEqual(run_count["value"], 2)
+
+    def test_wake_does_not_preempt_a_scheduled_run(self):
+        run_count = {"value": 0}
+
+        def task():
+            run_count["value"] += 1
+            return 10
+
+        self.scheduler.add_task("task", task)
+
+        def wake_repeatedly():
+            for _ in range(10):
+                self.scheduler.wake("task")
+                time.sleep(0.01)
+
+        threading.Timer(0.1, wake_repeatedly).start()
+        self.run_main_loop_for(0.5)
+
+        self.assertEqual(run_count["value"], 1)
+
+    def test_reschedule_replaces_the_scheduled_run(self):
+        run_count = {"value": 0}
+
+        def task():
+            run_count["value"] += 1
+            return 10
+
+        self.scheduler.add_task("task", task, initial_delay_seconds=10)
+        GLib.timeout_add(100, lambda: self.scheduler.reschedule("task") and False)
+        self.run_main_loop_for(0.5)
+
+        self.assertEqual(run_count["value"], 1)
+
+    def test_task_error_stops_the_scheduler(self):
+        other_run_count = {"value": 0}
+
+        def failing_task():
+            raise Exception("boom")
+
+        def other_task():
+            other_run_count["value"] += 1
+            return 0.1
+
+        self.scheduler.add_task("other_task", other_task, initial_delay_seconds=0.2)
+        self.scheduler.add_task("failing_task", failing_task)
+        self.run_main_loop_for(0.5)
+
+        self.assertEqual(len(self.errors), 1)
+        self.assertEqual(self.errors[0][0], "failing_task")
+        self.assertTrue(self.scheduler.stopped)
+        self.assertEqual(other_run_count["value"], 0)
@@ -0,0 +1,167 @@
+import datetime
+import os
+import tempfile
+import threading
+from unittest.mock import MagicMock
+
+import numpy as np
+from django.db import connection
+from django.test import SimpleTestCase
+from django.test.testcases import TransactionTestCase
+
+from bots.bot_adapter import BotAdapter
+from bots.bot_controller.media_trace import MediaTraceWriter, read_media_trace
+from bots.bot_controller.replay_bot_controller import ReplayBotController
+from bots.models import (
+    Bot,
+    BotEventManager,
+    BotEventTypes,
+    BotStates,
+    Organization,
+    Project,
+    Recording,
+    RecordingTypes,
+    TranscriptionProviders,
+    TranscriptionTypes,
+    Utterance,
+)
+from bots.replay_bot_adapter import ReplayBotAdapter
+
+PARTICIPANT = {
+    "participant_uuid": "device_1",
+    "participant_full_name": "Test User",
+    "participant_user_uuid": None,
+    "participant_is_the_bot": False,
+}
+
+
+def write_trace(file_path, write_records):
+    writer = MediaTraceWriter(file_path)
+    write_records(writer)
+    writer.close()
+
+
+class MediaTraceTest(SimpleTestCase):
+    def setUp(self):
+        self.trace_file_path = os.path.join(tempfile.mkdtemp(), "test.trace")
+
+    def test_records_round_trip(self):
+        chunk_time = datetime.datetime(2025, 1, 1, 12, 0, 0)
+        video_frame = np.arange(12, dtype=np.uint8)
+
+        def write_records(writer):
+            writer.wrap_callback("add_audio_chunk", MagicMock())("device_1", chunk_time, b"\x01\x02")
+            writer.wrap_callback("add_video_frame", MagicMock())(video_frame, 1_000_000)
+            writer.wrap_callback("upsert_caption", MagicMock())({"deviceId": "device_1", "captionId": 1, "text": "Hello"})
+
+        write_trace(self.trace_file_path, write_records)
+
+        header, records = read_media_trace(self.trace_file_path)
+        records = list(records)
+
+        self.assertEqual(header["version"], 1)
+        self.assertEqual([record.callback_name for record in records], ["add_audio_chunk", "add_video_frame", "upsert_caption"])
+        self.assertEqual(records[0].args, ["device_1", chunk_time, b"\x01\x02"])
+        self.assertEqual(records[1].args, [video_frame.tobytes(), 1_000_000])
+        self.assertEqual(records[2].args, [{"deviceId": "device_1", "captionId": 1, "text": "Hello"}])
+        self.assertTrue(all(record.time_offset_seconds >= 0 for record in records))
+
+    def test_truncated_record_is_ignored(self):
+        write_trace(self.trace_file_path, lambda writer: writer.write("add_audio_chunk", ["device_1", b"\x00" * 100]))
+        with open(self.trace_file_path, "r+b") as file:
+            file.truncate(os.path.getsize(self.trace_file_path) - 10)
+
+        _, records = read_media_trace(self.trace_file_path)
+        self.assertEqual(list(records), [])
+
+    def test_participants_are_only_traced_when_they_change(self):
+        participants = {"device_1": dict(PARTICIPANT)}
+
+        def write_records(writer):
+            get_participant = writer.wrap_get_participant(participants.get)
+            get_participant("device_1")
+            get_participant("device_1")
+            participants["device_1"]["participant_full_name"] = "Renamed User"
+            get_participant("device_1")
+            get_participant("unknown_device")
+
+        write_trace(self.trace_file_path, write_records)
+
+        _, records = read_media_trace(self.trace_file_path)
+        self.assertEqual([record.args[0]["participant_full_name"] for record in records], ["Test User", "Renamed User"])
+
+    def test_replay_adapter_feeds_records_to_callbacks(self):
+        chunk_time = datetime.datetime(2025, 1, 1, 12, 0, 0)
+
+        def write_records(writer):
+            writer.write("get_participant", [PARTICIPANT])
+            writer.write("add_audio_chunk", ["device_1", chunk_time, b"\x01\x02"])
+            writer.write("add_mixed_audio_chunk", [b"\x03\x04"])
+
+        write_trace(self.trace_file_path, write_records)
+
+        add_audio_chunk = MagicMock()
+        messages = []
+        meeting_ended = threading.Event()
+
+        def send_message(message):
+            messages.append(message["message"])
+            if message["message"] == BotAdapter.Messages.MEETING_ENDED:
+                meeting_ended.set()
+
+        adapter = ReplayBotAdapter(trace_file_path=self.trace_file_path, speed=0, send_message_callback=send_message, callbacks={"add_audio_chunk": add_audio_chunk})
+        adapter.init()
+        self.assertTrue(meeting_ended.wait(timeout=5))
+        adapter.cleanup()
+
+        self.assertEqual(messages, [BotAdapter.Messages.BOT_JOINED_MEETING, BotAdapter.Messages.BOT_RECORDING_PERMISSION_GRANTED, BotAdapter.Messages.MEETING_ENDED])
+        self.assertEqual(adapter.get_participant("device_1"), PARTICIPANT)
+        # The mixed audio chunk had no callback, so it was skipped
+        self.assertEqual(adapter.records_replayed, {"add_audio_chunk": 1})
+
+        speaker_id, replayed_chunk_time, chunk_bytes = add_audio_chunk.call_args.args
+        self.assertEqual((speaker_id, chunk_bytes), ("device_1", b"\x01\x02"))
+        # Datetimes are moved to the time of the replay
+        self.assertGreater(replayed_chunk_time, chunk_time)
+
+
+class ReplayBotControllerTest(TransactionTestCase):
+    def setUp(self):
+        self.organization = Organization.objects.create(name="Test Org")
+        self.project = Project.objects.create(name="Test Project", organization=self.organization)
+        self.bot = Bot.objects.create(project=self.project, name="Test Bot", meeting_url="https://meet.google.com/abc-defg-hij")
+        self.recording = Recording.objects.create(
+            bot=self.bot,
+            recording_type=RecordingTypes.AUDIO_AND_VIDEO,
+            transcription_type=TranscriptionTypes.NON_REALTIME,
+            transcription_provider=TranscriptionProviders.CLOSED_CAPTION_FROM_PLATFORM,
+            is_default_recording=True,
+        )
+        BotEventManager.create_event(self.bot, BotEventTypes.JOIN_REQUESTED)
+        self.trace_file_path = os.path.join(tempfile.mkdtemp(), "test.trace")
+
+    def test_replayed_captions_become_utterances(self):
+        def write_records(writer):
+            writer.write("get_participant", [PARTICIPANT])
+            writer.write("upsert_caption", [{"deviceId": "device_1", "captionId": 1, "text": "Hello", "isFinal": False}])
+            writer.write("upsert_caption", [{"deviceId": "device_1", "captionId": 1, "text": "Hello world", "isFinal": True}])
+
+        write_trace(self.trace_file_path, write_records)
+
+        controller = ReplayBotController(self.bot.id, trace_file_path=self.trace_file_path, speed=0)
+        bot_thread = threading.Thread(target=controller.run, daemon=True)
+        bot_thread.start()
+        bot_thread.join(timeout=30)
+        self.assertFalse(bot_thread.is_alive())
+
+        self.bot.refresh_from_db()
+        self.assertEqual(self.bot.state, BotStates.ENDED)
+        utterance = Utterance.objects.get(recording=self.recording)
+        self.assertEqual(utterance.transcription, {"transcript": "Hello world"})
+
+        stats = controller.replay_stats()
+        self.assertEqual(stats["records_replayed"], {"upsert_caption": 2})
+        self.assertEqual(stats["callback_latency_ms"]["upsert_caption"]["count"], 2)
+        self.assertIsNotNone(stats["teardown_seconds"])
+
+        connection.close()
@@ -0,0 +1,176 @@
+import datetime
+from unittest.mock import MagicMock, call, patch
+
+from django.test import SimpleTestCase
+
+from bots.bot_controller.per_participant_non_streaming_audio_input_manager import PerParticipantNonStreamingAudioInputManager, UtteranceAudioBuffer
+from bots.bot_controller.utterance_audio_conditioner import UtteranceAudioConditioner
+
+
+class PerParticipantNonStreamingAudioInputManagerQueueTest(SimpleTestCase):
+    def create_manager(self, **kwargs):
+        return PerParticipantNonStreamingAudioInputManager(
+            save_utterance_callback=MagicMock(),
+            get_participant_callback=MagicMock(),
+            sample_rate=32000,
+            utterance_size_limit=19200000,
+            silence_duration_limit=3,
+            **kwargs,
+        )
+
+    def queued_chunks(self, manager, speaker_id):
+        return [chunk_bytes for _, chunk_bytes in manager.queues.get(speaker_id, [])]
+
+    def test_drop_oldest_keeps_the_newest_chunks(self):
+        manager = self.create_manager(max_queued_bytes_per_speaker=4, drop_policy=PerParticipantNonStreamingAudioInputManager.DROP_OLDEST)
+        chunk_time = datetime.datetime.utcnow()
+
+        for chunk_bytes in [b"aa", b"bb", b"cc"]:
+            manager.add_chunk("speaker_1", chunk_time, chunk_bytes)
+        manager.add_chunk("speaker_2", chunk_time, b"dd")
+
+        self.assertEqual(self.queued_chunks(manager, "speaker_1"), [b"bb", b"cc"])
+        # Each speaker has their own queue, so speaker_2 isn't affected by speaker_1 filling up
+        self.assertEqual(self.queued_chunks(manager, "speaker_2"), [b"dd"])
+        self.assertEqual(manager.ingest_queue_stats(), {"max_queued_bytes_per_speaker": 4, "drop_policy": "drop_oldest", "dropped_chunks": 1, "dropped_bytes": 2, "high_water_mark_bytes": 4})
+
+    def test_drop_newest_keeps_the_oldest_chunks(self):
+        manager = self.create_manager(max_queued_bytes_per_speaker=4, drop_policy=PerParticipantNonStreamingAudioInputManager.DROP_NEWEST)
+        chunk_time = datetime.datetime.utcnow()
+
+        for chunk_bytes in [b"aa", b"bb", b"cc"]:
+            manager.add_chunk("speaker_1", chunk_time, chunk_bytes)
+
+        self.assertEqual(self.queued_chunks(manager, "speaker_1"), [b"aa", b"bb"])
+        self.assertEqual(manager.ingest_queue_stats()["dropped_chunks"], 1)
+
+    def test_chunk_larger_than_the_limit_is_kept_when_the_queue_is_empty(self):
+        manager = self.create_manager(max_queued_bytes_per_speaker=4, drop_policy=PerParticipantNonStreamingAudioInputManager.DROP_NEWEST)
+
+        manager.add_chunk("speaker_1", datetime.datetime.utcnow(), b"aaaaaa")
+
+        self.assertEqual(self.queued_chunks(manager, "speaker_1"), [b"aaaaaa"])
+        self.assertEqual(manager.ingest_queue_stats()["dropped_chunks"], 0)
+
+    def test_unbounded_queue_never_drops(self):
+        manager = self.create_manager()
+
+        for _ in range(100):
+            manager.add_chunk("speaker_1", datetime.datetime.utcnow(), b"aa")
+
+        self.assertEqual(len(self.queued_chunks(manager, "speaker_1")), 100)
+        self.assertEqual(manager.ingest_queue_stats()["high_water_mark_bytes"], 200)
+
+    def test_process_chunks_drains_the_queues_in_order(self):
+        manager = self.create_manager(max_queued_bytes_per_speaker=100)
+        chunk_time = datetime.datetime.utcnow()
+        manager.add_chunk("speaker_1", chunk_time, b"aa")
+        manager.add_chunk("speaker_2", chunk_time, b"bb")
+        manager.add_chunk("speaker_1", chunk_time, b"cc")
+
+        with patch.object(manager, "process_chunk") as mock_process_chunk, patch.object(manager.voice_activity_detector, "detect_speech", side_effect=lambda chunks: [chunk != b"cc" for chunk in chunks]) as mock_detect_speech:
+            manager.process_chunks()
+
+        # Speech is detected once per speaker, for all of their queued chunks
+        self.assertEqual(mock_detect_speech.call_args_list, [call([b"aa", b"cc"]), call([b"bb"])])
+        self.assertEqual(
+            mock_process_chunk.call_args_list,
+            [call("speaker_1", chunk_time, b"aa", audio_is_silent=False), call("speaker_1", chunk_time, b"cc", audio_is_silent=True), call("speaker_2", chunk_time, b"bb", audio_is_silent=False)],
+        )
+        self.assertFalse(manager.has_pending_audio())
+
+    def test_invalid_drop_policy_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.create_manager(drop_policy="coalesce")
+
+
+class UtteranceAudioBufferTest(SimpleTestCase):
+    def test_buffer_grows_and_keeps_the_audio(self):
+        buffer = UtteranceAudioBuffer(initial_capacity=4, max_retained_capacity=16)
+
+        buffer.append(b"abc")
+        buffer.append(b"defgh")
+
+        self.assertEqual(len(buffer), 8)
+        self.assertEqual(bytes(buffer.view()), b"abcdefgh")
+        self.assertEqual(len(buffer.array), 8)
+
+    def test_array_is_reused_after_clear(self):
+        buffer = UtteranceAudioBuffer(initial_capacity=4, max_retained_capacity=16)
+        buffer.append(b"abcdefgh")
+        array = buffer.array
+
+        buffer.clear()
+        buffer.append(b"xy")
+
+        self.assertIs(buffer.array, array)
+        self.assertEqual(bytes(buffer.view()), b"xy")
+
+    def test_array_that_grew_too_large_is_freed_on_clear(self):
+        buffer = UtteranceAudioBuffer(initial_capacity=4, max_retained_capacity=16)
+        buffer.append(b"a" * 20)
+
+        buffer.clear()
+
+        self.assertEqual(len(buffer), 0)
+        self.assertEqual(len(buffer.array), 4)
+
+
+class PerParticipantNonStreamingAudioInputManagerFlushTest(SimpleTestCase):
+    def test_flushed_utterance_is_a_view_of_the_speakers_buffer(self):
+        saved_audio = []
+        manager = PerParticipantNonStreamingAudioInputManager(
+            save_utterance_callback=lambda utterance: saved_audio.append((bytes(utterance["audio_data"]), utterance["audio_data"].obj)),
+            get_participant_callback=lambda speaker_id: {"participant_uuid": speaker_id},
+            sample_rate=32000,
+            utterance_size_limit=4,
+            silence_duration_limit=3,
+        )
+        chunk_time = datetime.datetime.utcnow()
+
+        with patch.object(manager, "silence_detected", return_value=False):
+            manager.process_chunk("speaker_1", chunk_time, b"abcd")
+            manager.process_chunk("speaker_1", chunk_time, b"efgh")
+
+        self.assertEqual([audio for audio, _ in saved_audio], [b"abcd", b"efgh"])
+        # Both utterances were handed out from the same reused array
+        self.assertIs(saved_audio[0][1].base, saved_audio[1][1].base)
+
+    def test_participant_lookup_can_be_left_to_the_save_callback(self):
+        saved_utterances = []
+        manager = PerParticipantNonStreamingAudioInputManager(
+            save_utterance_callback=saved_utterances.append,
+            get_participant_callback=None,
+            sample_rate=32000,
+            utterance_size_limit=4,
+            silence_duration_limit=3,
+        )
+
+        with patch.object(manager, "silence_detected", return_value=False):
+            manager.process_chunk("speaker_1", datetime.datetime.utcnow(), b"abcd")
+
+        self.assertEqual(len(saved_utterances), 1)
+        self.assertEqual(saved_utterances[0]["speaker_id"], "speaker_1")
+        self.assertNotIn("participant_uuid", saved_utterances[0])
+
+    def test_audio_conditioner_trims_silence_after_the_last_speech(self):
+        saved_utterances = []
+        audio_conditioner = UtteranceAudioConditioner(output_sample_rate=16000, trailing_silence_to_keep_seconds=0)
+        manager = PerParticipantNonStreamingAudioInputManager(
+            save_utterance_callback=saved_utterances.append,
+            get_participant_callback=None,
+            sample_rate=32000,
+            utterance_size_limit=19200000,
+            silence_duration_limit=3,
+            audio_conditioner=audio_conditioner,
+        )
+        chunk_time = datetime.datetime.utcnow()
+
+        manager.process_chunk("speaker_1", chunk_time, b"\x01\x00" * 3200, audio_is_silent=False)
+        manager.process_chunk("speaker_1", chunk_time + datetime.timedelta(seconds=1), b"\x00\x00" * 3200, audio_is_silent=True)
+        manager.process_chunk("speaker_1", chunk_time + datetime.timedelta(seconds=4), b"\x00\x00" * 3200, audio_is_silent=True)
+
+        self.assertEqual(len(saved_utterances), 1)
+        self.assertEqual(saved_utterances[0]["sample_rate"], 16000)
+        # Only the 3200 samples of speech are kept, at half the sample rate
+        self.assertEqual(len(saved_utterances[0]["audio_data"]), 1600 * 2)
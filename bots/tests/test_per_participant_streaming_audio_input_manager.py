@@ -0,0 +1,97 @@
+from unittest.mock import MagicMock, patch
+
+from django.test import SimpleTestCase
+
+from bots.bot_controller.per_participant_streaming_audio_input_manager import PerParticipantStreamingAudioInputManager
+from bots.models import TranscriptionProviders
+
+
+def transcription_result(transcript, *, start, duration, timestamp_ms, is_final=True, speech_final=False):
+    words = transcript.split(" ") if transcript else []
+    word_duration = duration / max(len(words), 1)
+    return {
+        "is_final": is_final,
+        "speech_final": speech_final,
+        "start": start,
+        "duration": duration,
+        "timestamp_ms": timestamp_ms,
+        "transcription": {
+            "transcript": transcript,
+            "words": [{"word": word, "start": start + index * word_duration, "end": start + (index + 1) * word_duration} for index, word in enumerate(words)],
+        },
+    }
+
+
+class PerParticipantStreamingAudioInputManagerResultsTest(SimpleTestCase):
+    def setUp(self):
+        self.saved_utterances = []
+        self.transcript_updates = []
+        self.manager = PerParticipantStreamingAudioInputManager(
+            save_utterance_callback=self.saved_utterances.append,
+            transcript_update_callback=self.transcript_updates.append,
+            get_participant_callback=MagicMock(),
+            sample_rate=32000,
+            transcription_provider=TranscriptionProviders.DEEPGRAM,
+            bot=MagicMock(),
+        )
+
+    def test_final_results_are_batched_into_one_utterance_per_speech(self):
+        self.manager.on_transcription_result("speaker_1", transcription_result("hello there", start=10, duration=1, timestamp_ms=50000))
+        self.manager.on_transcription_result("speaker_1", transcription_result("how are", start=11, duration=0.5, timestamp_ms=51000, is_final=False))
+        self.assertEqual(self.saved_utterances, [])
+
+        self.manager.on_transcription_result("speaker_1", transcription_result("how are you", start=11, duration=1, timestamp_ms=51000, speech_final=True))
+
+        self.assertEqual(len(self.saved_utterances), 1)
+        utterance = self.saved_utterances[0]
+        self.assertEqual(utterance["speaker_id"], "speaker_1")
+        self.assertEqual(utterance["timestamp_ms"], 50000)
+        self.assertEqual(utterance["duration_ms"], 2000)
+        self.assertEqual(utterance["transcription"]["transcript"], "hello there how are you")
+        # Word timings are relative to the start of the utterance
+        self.assertEqual(utterance["transcription"]["words"][0]["start"], 0)
+        self.assertAlmostEqual(utterance["transcription"]["words"][-1]["end"], 2)
+
+    def test_empty_final_result_ends_the_speech(self):
+        self.manager.on_transcription_result("speaker_1", transcription_result("hello there", start=10, duration=1, timestamp_ms=50000))
+        self.manager.on_transcription_result("speaker_1", transcription_result("", start=11, duration=0.5, timestamp_ms=51000, is_final=False))
+        self.assertEqual(self.saved_utterances, [])
+
+        # The words were already finalized, so the end of speech comes on a result without any
+        self.manager.on_transcription_result("speaker_1", transcription_result("", start=11, duration=1, timestamp_ms=51000, speech_final=True))
+
+        self.assertEqual(len(self.saved_utterances), 1)
+        self.assertEqual(self.saved_utterances[0]["transcription"]["transcript"], "hello there")
+        self.assertEqual(self.saved_utterances[0]["duration_ms"], 1000)
+        self.assertEqual([update["transcript"] for update in self.transcript_updates], ["hello there", "hello there", "hello there"])
+
+        # An empty result with nothing pending is ignored
+        self.manager.on_transcription_result("speaker_1", transcription_result("", start=12, duration=1, timestamp_ms=52000, speech_final=True))
+        self.assertEqual(len(self.saved_utterances), 1)
+        self.assertEqual(len(self.transcript_updates), 3)
+
+    def test_every_result_is_sent_as_a_transcript_update(self):
+        self.manager.on_transcription_result("speaker_1", transcription_result("hello there", start=10, duration=1, timestamp_ms=50000))
+        self.manager.on_transcription_result("speaker_1", transcription_result("how are", start=11, duration=0.5, timestamp_ms=51000, is_final=False))
+
+        self.assertEqual(
+            self.transcript_updates,
+            [
+                {"speaker_id": "speaker_1", "is_final": True, "timestamp_ms": 50000, "transcript": "hello there"},
+                {"speaker_id": "speaker_1", "is_final": False, "timestamp_ms": 50000, "transcript": "hello there how are"},
+            ],
+        )
+
+    def test_final_results_without_an_end_of_speech_are_saved_once_stale(self):
+        with patch("bots.bot_controller.per_participant_streaming_audio_input_manager.time.monotonic", return_value=100):
+            self.manager.on_transcription_result("speaker_1", transcription_result("hello", start=0, duration=1, timestamp_ms=50000))
+            self.manager.on_transcription_result("speaker_2", transcription_result("hi", start=0, duration=1, timestamp_ms=50000))
+        with patch("bots.bot_controller.per_participant_streaming_audio_input_manager.time.monotonic", return_value=103):
+            self.manager.on_transcription_result("speaker_2", transcription_result("again", start=1, duration=1, timestamp_ms=51000))
+
+        with patch("bots.bot_controller.per_participant_streaming_audio_input_manager.time.monotonic", return_value=106):
+            self.manager.monitor_transcription()
+        self.assertEqual([utterance["speaker_id"] for utterance in self.saved_utterances], ["speaker_1"])
+
+        self.manager.close()
+        self.assertEqual([utterance["transcription"]["transcript"] for utterance in self.saved_utterances], ["hello", "hi again"])
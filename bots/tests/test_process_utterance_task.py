@@ -1,7 +1,7 @@
 import uuid
 from unittest import mock
 
-from django.test import TransactionTestCase
+from django.test import SimpleTestCase, TransactionTestCase
 
 from bots.models import (
     Bot,
@@ -10,12 +10,26 @@ from bots.models import (
     Participant,
     Project,
     Recording,
+    RecordingManager,
     RecordingStates,
     RecordingTranscriptionStates,
     TranscriptionFailureReasons,
+    TranscriptionProviders,
     Utterance,
 )
-from bots.tasks.process_utterance_task import get_transcription_via_assemblyai, get_transcription_via_deepgram, get_transcription_via_gladia, get_transcription_via_openai, get_transcription_via_sarvam, process_utterance
+from bots.tasks.process_utterance_task import (
+    UtteranceBatcher,
+    check_utterance_transcription_job,
+    get_transcription_via_assemblyai,
+    get_transcription_via_deepgram,
+    get_transcription_via_gladia,
+    get_transcription_via_openai,
+    get_transcription_via_sarvam,
+    process_utterance,
+    process_utterance_batch,
+    save_transcription_result,
+    split_batch_transcription,
+)
 
 
 class ProcessUtteranceTaskTest(TransactionTestCase):
@@ -82,6 +96,66 @@ class ProcessUtteranceTaskTest(TransactionTestCase):
         # Recording manager called because this was the last outstanding utterance
         mock_set_complete.assert_called_once_with(self.recording)
 
+    @mock.patch("bots.tasks.process_utterance_task.RecordingManager.set_recording_transcription_complete")
+    @mock.patch("bots.tasks.process_utterance_task.is_retryable_failure", return_value=False)
+    @mock.patch("bots.tasks.process_utterance_task.get_transcription")
+    def test_recording_completes_once_its_pending_utterances_are_transcribed(self, mock_get_transcription, mock_is_retryable, mock_set_complete):
+        second_utterance = Utterance.objects.create(recording=self.recording, participant=self.participant, audio_blob=b"rawpcmbytes", timestamp_ms=1000, duration_ms=500, sample_rate=16_000)
+        RecordingManager.add_utterances_pending_transcription(self.recording.id, 2)
+
+        mock_get_transcription.return_value = ({"transcript": "hello world"}, None)
+        self._run_task()
+        mock_set_complete.assert_not_called()
+
+        # A failed utterance keeps the recording's transcription from completing
+        mock_get_transcription.return_value = (None, {"reason": TranscriptionFailureReasons.CREDENTIALS_INVALID})
+        process_utterance.apply(args=[second_utterance.id])
+        mock_set_complete.assert_not_called()
+
+        progress = self.recording.transcription_progress
+        progress.refresh_from_db()
+        self.assertEqual((progress.pending_utterance_count, progress.transcribed_utterance_count, progress.failed_utterance_count), (0, 1, 1))
+
+    @mock.patch("bots.tasks.process_utterance_task.RecordingManager.set_recording_transcription_complete")
+    @mock.patch("bots.tasks.process_utterance_task.is_retryable_failure", return_value=False)
+    def test_utterance_finished_by_another_run_is_left_alone(self, mock_is_retryable, mock_set_complete):
+        RecordingManager.add_utterances_pending_transcription(self.recording.id, 1)
+        # The same utterance loaded by two runs of the task, e.g. when a message is redelivered
+        first_copy = Utterance.objects.get(id=self.utterance.id)
+        second_copy = Utterance.objects.get(id=self.utterance.id)
+
+        save_transcription_result(first_copy, None, {"reason": TranscriptionFailureReasons.CREDENTIALS_INVALID})
+        save_transcription_result(second_copy, {"transcript": "hello"}, None)
+
+        self.utterance.refresh_from_db()
+        self.assertIsNone(self.utterance.transcription)
+        self.assertEqual(self.utterance.failure_data, {"reason": TranscriptionFailureReasons.CREDENTIALS_INVALID})
+        # The audio is kept for the failed utterance
+        self.assertEqual(bytes(self.utterance.audio_blob), b"rawpcmbytes")
+        progress = self.recording.transcription_progress
+        progress.refresh_from_db()
+        self.assertEqual((progress.pending_utterance_count, progress.transcribed_utterance_count, progress.failed_utterance_count), (0, 0, 1))
+
+    @mock.patch("bots.tasks.process_utterance_task.RecordingManager.set_recording_transcription_complete")
+    @mock.patch("bots.tasks.process_utterance_task.is_retryable_failure", return_value=True)
+    def test_retryable_failure_after_another_run_finished_the_utterance(self, mock_is_retryable, mock_set_complete):
+        RecordingManager.add_utterances_pending_transcription(self.recording.id, 1)
+        first_copy = Utterance.objects.get(id=self.utterance.id)
+        second_copy = Utterance.objects.get(id=self.utterance.id)
+        second_copy.transcription_attempt_count += 1
+
+        save_transcription_result(first_copy, {"transcript": "hello"}, None)
+        # Nothing is left to retry
+        self.assertTrue(save_transcription_result(second_copy, None, {"reason": TranscriptionFailureReasons.RATE_LIMIT_EXCEEDED}))
+
+        self.utterance.refresh_from_db()
+        self.assertEqual(self.utterance.transcription, {"transcript": "hello"})
+        self.assertIsNone(self.utterance.failure_data)
+        self.assertEqual(self.utterance.transcription_attempt_count, 0)
+        progress = self.recording.transcription_progress
+        progress.refresh_from_db()
+        self.assertEqual((progress.pending_utterance_count, progress.transcribed_utterance_count), (0, 1))
+
     # ------------------------------------------------------------------
 
     @mock.patch("bots.tasks.process_utterance_task.is_retryable_failure", return_value=True)
@@ -116,6 +190,30 @@ class ProcessUtteranceTaskTest(TransactionTestCase):
 
     # ------------------------------------------------------------------
 
+    @mock.patch("bots.tasks.process_utterance_task.get_redis_client")
+    @mock.patch("bots.tasks.process_utterance_task.get_transcription")
+    def test_terminated_utterance_notifies_bot(self, mock_get_transcription, mock_get_redis_client):
+        """Once the utterance is terminated, the bot is notified on its command channel."""
+        mock_get_transcription.return_value = ({"transcript": "hello world"}, None)
+
+        self._run_task()
+
+        mock_get_redis_client.return_value.publish.assert_called_once_with(f"bot_{self.bot.id}", json.dumps({"command": "utterance_terminated", "utterance_id": self.utterance.id}))
+
+    @mock.patch("bots.tasks.process_utterance_task.get_redis_client")
+    @mock.patch("bots.tasks.process_utterance_task.is_retryable_failure", return_value=True)
+    @mock.patch("bots.tasks.process_utterance_task.get_transcription")
+    def test_retryable_failure_does_not_notify_bot(self, mock_get_transcription, mock_is_retryable, mock_get_redis_client):
+        """The utterance isn't terminated yet, so the bot keeps waiting for it."""
+        mock_get_transcription.return_value = (None, {"reason": TranscriptionFailureReasons.RATE_LIMIT_EXCEEDED})
+
+        with self.assertRaises(Exception):
+            self._run_task()
+
+        mock_get_redis_client.return_value.publish.assert_not_called()
+
+    # ------------------------------------------------------------------
+
     @mock.patch("bots.tasks.process_utterance_task.get_transcription")
     def test_existing_failure_data_short_circuits_task(self, mock_get_transcription):
         """If utterance already failed, task should exit early and not call provider."""
@@ -127,6 +225,177 @@ class ProcessUtteranceTaskTest(TransactionTestCase):
         # Provider function never invoked
         mock_get_transcription.assert_not_called()
 
+    # ------------------------------------------------------------------
+
+    @mock.patch("bots.tasks.process_utterance_task.check_utterance_transcription_job.apply_async")
+    @mock.patch("bots.tasks.process_utterance_task.submit_transcription_job_via_assemblyai", return_value=({"transcript_id": "tid"}, None))
+    def test_async_provider_stores_job_and_schedules_check(self, mock_submit, mock_check_apply_async):
+        """Asynchronous providers submit a job and hand off to a scheduled check instead of waiting for it."""
+        self.recording.transcription_provider = TranscriptionProviders.ASSEMBLY_AI
+        self.recording.save()
+
+        self._run_task()
+        self.utterance.refresh_from_db()
+
+        mock_submit.assert_called_once()
+        self.assertEqual(self.utterance.transcription_job, {"transcript_id": "tid", "check_count": 0})
+        self.assertIsNone(self.utterance.transcription)
+        self.assertEqual(self.utterance.transcription_attempt_count, 1)
+        mock_check_apply_async.assert_called_once_with(args=[self.utterance.id], countdown=1)
+
+    @mock.patch("bots.tasks.process_utterance_task.check_utterance_transcription_job.apply_async")
+    @mock.patch("bots.tasks.process_utterance_task.check_transcription_job_via_assemblyai", return_value=(None, None))
+    def test_pending_job_check_is_rescheduled(self, mock_check, mock_check_apply_async):
+        self.recording.transcription_provider = TranscriptionProviders.ASSEMBLY_AI
+        self.recording.save()
+        self.utterance.transcription_job = {"transcript_id": "tid", "check_count": 12}
+        self.utterance.save()
+
+        check_utterance_transcription_job.apply(args=[self.utterance.id])
+        self.utterance.refresh_from_db()
+
+        self.assertEqual(self.utterance.transcription_job["check_count"], 13)
+        mock_check_apply_async.assert_called_once_with(args=[self.utterance.id], countdown=5)
+
+    @mock.patch("bots.tasks.process_utterance_task.RecordingManager.set_recording_transcription_complete")
+    @mock.patch("bots.tasks.process_utterance_task.check_transcription_job_via_assemblyai", return_value=({"transcript": "hello world", "words": []}, None))
+    def test_finished_job_check_saves_transcription(self, mock_check, mock_set_complete):
+        self.recording.transcription_provider = TranscriptionProviders.ASSEMBLY_AI
+        self.recording.save()
+        self.utterance.transcription_job = {"transcript_id": "tid", "check_count": 2}
+        self.utterance.save()
+
+        check_utterance_transcription_job.apply(args=[self.utterance.id])
+        self.utterance.refresh_from_db()
+
+        self.assertEqual(self.utterance.transcription["transcript"], "hello world")
+        self.assertIsNone(self.utterance.transcription_job)
+        self.assertEqual(self.utterance.audio_blob, b"")
+        mock_set_complete.assert_called_once_with(self.recording)
+
+    @mock.patch("bots.tasks.process_utterance_task.ASYNC_TRANSCRIPTION_JOBS_ENABLED", False)
+    @mock.patch("bots.tasks.process_utterance_task.RecordingManager.set_recording_transcription_complete")
+    @mock.patch("bots.tasks.process_utterance_task.check_transcription_job_via_assemblyai", return_value=({"transcript": "hello world", "words": []}, None))
+    def test_submitted_job_finishes_after_async_jobs_are_turned_off(self, mock_check, mock_set_complete):
+        self.recording.transcription_provider = TranscriptionProviders.ASSEMBLY_AI
+        self.recording.save()
+        self.utterance.transcription_job = {"transcript_id": "tid", "check_count": 2}
+        self.utterance.save()
+
+        check_utterance_transcription_job.apply(args=[self.utterance.id])
+        self.utterance.refresh_from_db()
+
+        self.assertEqual(self.utterance.transcription["transcript"], "hello world")
+        self.assertIsNone(self.utterance.transcription_job)
+
+    @mock.patch("bots.tasks.process_utterance_task.process_utterance.apply_async")
+    @mock.patch("bots.tasks.process_utterance_task.check_transcription_job_via_assemblyai", return_value=(None, {"reason": TranscriptionFailureReasons.TRANSCRIPTION_REQUEST_FAILED}))
+    def test_failed_job_check_resubmits_utterance(self, mock_check, mock_process_apply_async):
+        self.recording.transcription_provider = TranscriptionProviders.ASSEMBLY_AI
+        self.recording.save()
+        self.utterance.transcription_attempt_count = 1
+        self.utterance.transcription_job = {"transcript_id": "tid", "check_count": 2}
+        self.utterance.save()
+
+        check_utterance_transcription_job.apply(args=[self.utterance.id])
+        self.utterance.refresh_from_db()
+
+        self.assertIsNone(self.utterance.transcription_job)
+        self.assertIsNone(self.utterance.failure_data)
+        mock_process_apply_async.assert_called_once_with(args=[self.utterance.id], countdown=2)
+
+    @mock.patch("bots.tasks.process_utterance_task.RecordingManager.set_recording_transcription_complete")
+    @mock.patch("bots.tasks.process_utterance_task.get_transcription")
+    def test_batch_transcription_is_split_onto_the_utterances(self, mock_get_transcription, mock_set_complete):
+        second_utterance = Utterance.objects.create(
+            recording=self.recording,
+            participant=self.participant,
+            audio_blob=b"\x00\x00" * 16000,
+            timestamp_ms=2000,
+            duration_ms=1000,
+            sample_rate=16_000,
+        )
+        self.utterance.audio_blob = b"\x00\x00" * 16000
+        self.utterance.save()
+        # The second utterance starts after the first one's second of audio and half a second of silence
+        mock_get_transcription.return_value = (
+            {"transcript": "hello there", "words": [{"word": "hello", "start": 0.2, "end": 0.6}, {"word": "there", "start": 1.6, "end": 2.0}]},
+            None,
+        )
+
+        process_utterance_batch.apply(args=[[self.utterance.id, second_utterance.id]])
+        self.utterance.refresh_from_db()
+        second_utterance.refresh_from_db()
+
+        # One provider request for both utterances
+        mock_get_transcription.assert_called_once()
+        self.assertEqual(len(mock_get_transcription.call_args[0][0].audio_blob), 2 * (16000 + 8000 + 16000))
+        self.assertEqual(self.utterance.transcription, {"transcript": "hello", "words": [{"word": "hello", "start": 0.2, "end": 0.6}]})
+        self.assertEqual(second_utterance.transcription["transcript"], "there")
+        self.assertAlmostEqual(second_utterance.transcription["words"][0]["start"], 0.1)
+        self.assertEqual(second_utterance.transcription_attempt_count, 1)
+        mock_set_complete.assert_called_once_with(self.recording)
+
+    @mock.patch("bots.tasks.process_utterance_task.process_utterance.delay")
+    @mock.patch("bots.tasks.process_utterance_task.get_transcription", return_value=(None, {"reason": TranscriptionFailureReasons.RATE_LIMIT_EXCEEDED}))
+    def test_failed_batch_falls_back_to_one_utterance_at_a_time(self, mock_get_transcription, mock_process_utterance_delay):
+        second_utterance = Utterance.objects.create(recording=self.recording, participant=self.participant, audio_blob=b"\x00\x00", timestamp_ms=2000, duration_ms=1000, sample_rate=16_000)
+
+        process_utterance_batch.apply(args=[[self.utterance.id, second_utterance.id]])
+
+        self.assertEqual(mock_process_utterance_delay.call_args_list, [mock.call(self.utterance.id), mock.call(second_utterance.id)])
+
+
+class UtteranceBatchingTest(SimpleTestCase):
+    def create_utterance(self, participant_id, timestamp_ms, duration_ms, transcription_provider=TranscriptionProviders.SARVAM):
+        return Utterance(recording=Recording(transcription_provider=transcription_provider), participant_id=participant_id, timestamp_ms=timestamp_ms, duration_ms=duration_ms, sample_rate=16000)
+
+    @mock.patch("bots.tasks.process_utterance_task.UTTERANCE_BATCHING_ENABLED", True)
+    def test_consecutive_utterances_are_batched_per_speaker_up_to_the_duration_limit(self):
+        utterances = [
+            self.create_utterance(1, 0, 10000),
+            self.create_utterance(2, 1000, 5000),
+            self.create_utterance(1, 12000, 10000),
+            # Would take speaker 1's batch past Sarvam's 30 seconds, counting the silence between the utterances
+            self.create_utterance(1, 25000, 9500),
+            # Too long to batch at all
+            self.create_utterance(2, 40000, 30000),
+        ]
+        batcher = UtteranceBatcher()
+
+        self.assertEqual(batcher.add(utterances, now=0), [[utterances[0], utterances[2]], [utterances[4]]])
+        # The open batches are held for more utterances
+        self.assertEqual(batcher.pop_due_batches(now=0), [])
+        self.assertEqual(batcher.pop_due_batches(now=0, all=True), [[utterances[1]], [utterances[3]]])
+
+    @mock.patch("bots.tasks.process_utterance_task.UTTERANCE_BATCHING_ENABLED", True)
+    @mock.patch("bots.tasks.process_utterance_task.UTTERANCE_BATCH_MAX_DELAY_SECONDS", 15)
+    def test_open_batches_are_sent_once_they_have_waited_long_enough(self):
+        utterances = [self.create_utterance(1, 0, 1000), self.create_utterance(2, 5000, 1000), self.create_utterance(1, 10000, 1000)]
+        batcher = UtteranceBatcher()
+
+        self.assertEqual(batcher.add(utterances[:2], now=100), [])
+        self.assertEqual(batcher.add(utterances[2:], now=110), [])
+        self.assertEqual(batcher.seconds_until_next_batch_due(now=110), 5)
+
+        self.assertEqual(batcher.pop_due_batches(now=115), [[utterances[0], utterances[2]], [utterances[1]]])
+        self.assertIsNone(batcher.seconds_until_next_batch_due(now=115))
+
+    @mock.patch("bots.tasks.process_utterance_task.UTTERANCE_BATCHING_ENABLED", True)
+    def test_providers_without_word_timings_are_not_batched(self):
+        utterances = [self.create_utterance(1, 0, 1000, TranscriptionProviders.OPENAI), self.create_utterance(1, 2000, 1000, TranscriptionProviders.OPENAI)]
+
+        self.assertEqual(UtteranceBatcher().add(utterances, now=0), [[utterances[0]], [utterances[1]]])
+
+    def test_batching_is_off_by_default(self):
+        utterances = [self.create_utterance(1, 0, 1000), self.create_utterance(1, 2000, 1000)]
+
+        self.assertEqual(UtteranceBatcher().add(utterances, now=0), [[utterances[0]], [utterances[1]]])
+
+    def test_transcription_without_word_timings_cannot_be_split(self):
+        self.assertIsNone(split_batch_transcription({"transcript": "hello there"}, [0, 1.5]))
+        self.assertEqual(split_batch_transcription({"transcript": "", "words": []}, [0, 1.5]), [{"transcript": "", "words": []}, {"transcript": "", "words": []}])
+
 
 import json
 import types
@@ -134,6 +403,8 @@ from unittest import mock
 
 from django.test import TransactionTestCase
 
+from bots.transcription_http_utils import clear_transcription_clients
+
 
 def _build_fake_deepgram(success=True, err_code=None):
     """
@@ -202,6 +473,8 @@ class DeepgramProviderTest(TransactionTestCase):
         Credentials.objects.create(project=self.project, credential_type=Credentials.CredentialTypes.DEEPGRAM)
         mock.patch.object(Credentials, "get_credentials", return_value={"api_key": "dg_key"}).start()
         self.addCleanup(mock.patch.stopall)
+        # Deepgram clients are reused across utterances, so don't let one test's fake client leak into the next
+        self.addCleanup(clear_transcription_clients)
 
     # ────────────────────────────────────────────────────────────────────
     def _call_with_fake_module(self, fake_module):
@@ -346,8 +619,8 @@ class GladiaProviderTest(TransactionTestCase):
         with (
             self._patch_creds(),
             mock.patch("bots.tasks.process_utterance_task.pcm_to_mp3", return_value=b"mp3"),
-            mock.patch("bots.tasks.process_utterance_task.requests.request") as m_request,
-            mock.patch("bots.tasks.process_utterance_task.requests.get") as m_get,
+            mock.patch("bots.tasks.process_utterance_task.requests.Session.request") as m_request,
+            mock.patch("bots.tasks.process_utterance_task.requests.Session.get") as m_get,
         ):
             # ---- requests.request calls: upload, transcribe, delete -----------------------
             def _request_side_effect(method, url, **_):
@@ -399,7 +672,7 @@ class GladiaProviderTest(TransactionTestCase):
         with (
             self._patch_creds(),
             mock.patch("bots.tasks.process_utterance_task.pcm_to_mp3", return_value=b"mp3"),
-            mock.patch("bots.tasks.process_utterance_task.requests.request") as m_request,
+            mock.patch("bots.tasks.process_utterance_task.requests.Session.request") as m_request,
         ):
             resp401 = mock.Mock(status_code=401)
             m_request.return_value = resp401
@@ -460,7 +733,7 @@ class OpenAIProviderTest(TransactionTestCase):
         self.creds = Credentials.objects.create(project=self.project, credential_type=Credentials.CredentialTypes.OPENAI)
 
     # ────────────────────────────────────────────────────────────────────────────────
-    @mock.patch("bots.tasks.process_utterance_task.requests.post")
+    @mock.patch("bots.tasks.process_utterance_task.requests.Session.post")
     @mock.patch("bots.tasks.process_utterance_task.pcm_to_mp3", return_value=b"mp3")
     def test_success_path(self, mock_pcm, mock_post):
         mock_post.return_value.status_code = 200
@@ -474,7 +747,7 @@ class OpenAIProviderTest(TransactionTestCase):
         mock_post.assert_called_once()  # ensure request made
 
     # ────────────────────────────────────────────────────────────────────────────────
-    @mock.patch("bots.tasks.process_utterance_task.requests.post")
+    @mock.patch("bots.tasks.process_utterance_task.requests.Session.post")
     @mock.patch("bots.tasks.process_utterance_task.pcm_to_mp3", return_value=b"mp3")
     def test_invalid_credentials(self, mock_pcm, mock_post):
         mock_post.return_value.status_code = 401
@@ -488,7 +761,7 @@ class OpenAIProviderTest(TransactionTestCase):
         )
 
     # ────────────────────────────────────────────────────────────────────────────────
-    @mock.patch("bots.tasks.process_utterance_task.requests.post")
+    @mock.patch("bots.tasks.process_utterance_task.requests.Session.post")
     @mock.patch("bots.tasks.process_utterance_task.pcm_to_mp3", return_value=b"mp3")
     def test_request_failure(self, mock_pcm, mock_post):
         mock_post.return_value.status_code = 500
@@ -516,7 +789,7 @@ class OpenAIProviderTest(TransactionTestCase):
         self.assertEqual(failure, {"reason": TranscriptionFailureReasons.CREDENTIALS_NOT_FOUND})
 
     # ────────────────────────────────────────────────────────────────────────────────
-    @mock.patch("bots.tasks.process_utterance_task.requests.post")
+    @mock.patch("bots.tasks.process_utterance_task.requests.Session.post")
     @mock.patch("bots.tasks.process_utterance_task.pcm_to_mp3", return_value=b"mp3")
     @mock.patch.dict("os.environ", {"OPENAI_BASE_URL": "https://custom.openai.com/v1"})
     def test_custom_base_url_from_env(self, mock_pcm, mock_post):
@@ -533,7 +806,7 @@ class OpenAIProviderTest(TransactionTestCase):
         self.assertEqual(call_args[0][0], "https://custom.openai.com/v1/audio/transcriptions")
 
     # ────────────────────────────────────────────────────────────────────────────────
-    @mock.patch("bots.tasks.process_utterance_task.requests.post")
+    @mock.patch("bots.tasks.process_utterance_task.requests.Session.post")
     @mock.patch("bots.tasks.process_utterance_task.pcm_to_mp3", return_value=b"mp3")
     @mock.patch.dict("os.environ", {"OPENAI_MODEL_NAME": "custom-model"})
     def test_custom_model_name_from_env(self, mock_pcm, mock_post):
@@ -551,7 +824,7 @@ class OpenAIProviderTest(TransactionTestCase):
         self.assertEqual(files_dict["model"][1], "custom-model")
 
     # ────────────────────────────────────────────────────────────────────────────────
-    @mock.patch("bots.tasks.process_utterance_task.requests.post")
+    @mock.patch("bots.tasks.process_utterance_task.requests.Session.post")
     @mock.patch("bots.tasks.process_utterance_task.pcm_to_mp3", return_value=b"mp3")
     @mock.patch.dict("os.environ", {"OPENAI_BASE_URL": "https://custom-ai-endpoint.example.com/v1", "OPENAI_MODEL_NAME": "gpt-4-turbo-transcribe"})
     def test_both_env_vars_together(self, mock_pcm, mock_post):
@@ -679,9 +952,9 @@ class AssemblyAIProviderTest(TransactionTestCase):
         with (
             self._patch_creds(),
             mock.patch("bots.tasks.process_utterance_task.pcm_to_mp3", return_value=b"mp3"),
-            mock.patch("bots.tasks.process_utterance_task.requests.post") as m_post,
-            mock.patch("bots.tasks.process_utterance_task.requests.get") as m_get,
-            mock.patch("bots.tasks.process_utterance_task.requests.delete") as m_delete,
+            mock.patch("bots.tasks.process_utterance_task.requests.Session.post") as m_post,
+            mock.patch("bots.tasks.process_utterance_task.requests.Session.get") as m_get,
+            mock.patch("bots.tasks.process_utterance_task.requests.Session.delete") as m_delete,
         ):
             # 1. Mock upload response
             upload_response = mock.Mock(status_code=200)
@@ -729,7 +1002,7 @@ class AssemblyAIProviderTest(TransactionTestCase):
         with (
             self._patch_creds(),
             mock.patch("bots.tasks.process_utterance_task.pcm_to_mp3", return_value=b"mp3"),
-            mock.patch("bots.tasks.process_utterance_task.requests.post") as m_post,
+            mock.patch("bots.tasks.process_utterance_task.requests.Session.post") as m_post,
         ):
             resp401 = mock.Mock(status_code=401)
             m_post.return_value = resp401
@@ -752,7 +1025,7 @@ class AssemblyAIProviderTest(TransactionTestCase):
         with (
             self._patch_creds(),
             mock.patch("bots.tasks.process_utterance_task.pcm_to_mp3", return_value=b"mp3"),
-            mock.patch("bots.tasks.process_utterance_task.requests.post") as m_post,
+            mock.patch("bots.tasks.process_utterance_task.requests.Session.post") as m_post,
         ):
             upload_response = mock.Mock(status_code=200)
             upload_response.json.return_value = {"upload_url": "https://cdn.assemblyai.com/upload/123"}
@@ -772,8 +1045,8 @@ class AssemblyAIProviderTest(TransactionTestCase):
         with (
             self._patch_creds(),
             mock.patch("bots.tasks.process_utterance_task.pcm_to_mp3", return_value=b"mp3"),
-            mock.patch("bots.tasks.process_utterance_task.requests.post") as m_post,
-            mock.patch("bots.tasks.process_utterance_task.requests.get") as m_get,
+            mock.patch("bots.tasks.process_utterance_task.requests.Session.post") as m_post,
+            mock.patch("bots.tasks.process_utterance_task.requests.Session.get") as m_get,
         ):
             upload_response = mock.Mock(status_code=200)
             upload_response.json.return_value = {"upload_url": "https://cdn.assemblyai.com/upload/123"}
@@ -797,8 +1070,8 @@ class AssemblyAIProviderTest(TransactionTestCase):
         with (
             self._patch_creds(),
             mock.patch("bots.tasks.process_utterance_task.pcm_to_mp3", return_value=b"mp3"),
-            mock.patch("bots.tasks.process_utterance_task.requests.post") as m_post,
-            mock.patch("bots.tasks.process_utterance_task.requests.get") as m_get,
+            mock.patch("bots.tasks.process_utterance_task.requests.Session.post") as m_post,
+            mock.patch("bots.tasks.process_utterance_task.requests.Session.get") as m_get,
             mock.patch("bots.tasks.process_utterance_task.time.sleep"),  # speed up test
         ):
             upload_response = mock.Mock(status_code=200)
@@ -832,9 +1105,9 @@ class AssemblyAIProviderTest(TransactionTestCase):
         with (
             self._patch_creds(),
             mock.patch("bots.tasks.process_utterance_task.pcm_to_mp3", return_value=b"mp3"),
-            mock.patch("bots.tasks.process_utterance_task.requests.post") as m_post,
-            mock.patch("bots.tasks.process_utterance_task.requests.get") as m_get,
-            mock.patch("bots.tasks.process_utterance_task.requests.delete") as m_delete,
+            mock.patch("bots.tasks.process_utterance_task.requests.Session.post") as m_post,
+            mock.patch("bots.tasks.process_utterance_task.requests.Session.get") as m_get,
+            mock.patch("bots.tasks.process_utterance_task.requests.Session.delete") as m_delete,
         ):
             # 1. Mock upload response
             upload_response = mock.Mock(status_code=200)
@@ -921,7 +1194,7 @@ class SarvamProviderTest(TransactionTestCase):
         with (
             self._patch_creds(),
             mock.patch("bots.tasks.process_utterance_task.pcm_to_mp3", return_value=b"mp3"),
-            mock.patch("bots.tasks.process_utterance_task.requests.post") as m_post,
+            mock.patch("bots.tasks.process_utterance_task.requests.Session.post") as m_post,
         ):
             success_response = mock.Mock(status_code=200)
             success_response.json.return_value = {"transcript": "hello sarvam"}
@@ -932,13 +1205,34 @@ class SarvamProviderTest(TransactionTestCase):
             self.assertIsNone(failure)
             self.assertEqual(transcript["transcript"], "hello sarvam")
             m_post.assert_called_once()
+            # Timestamps are only requested for batches
+            self.assertIsNone(m_post.call_args.kwargs["data"])
+
+    def test_timestamps_for_a_batch(self):
+        with (
+            self._patch_creds(),
+            mock.patch("bots.tasks.process_utterance_task.pcm_to_mp3", return_value=b"mp3"),
+            mock.patch("bots.tasks.process_utterance_task.requests.Session.post") as m_post,
+        ):
+            success_response = mock.Mock(status_code=200)
+            success_response.json.return_value = {
+                "transcript": "hello sarvam how are you",
+                "timestamps": {"words": ["hello sarvam", "how are you"], "start_time_seconds": [0.1, 1.6], "end_time_seconds": [0.9, 2.4]},
+            }
+            m_post.return_value = success_response
+
+            transcript, failure = get_transcription_via_sarvam(self.utterance, with_timestamps=True)
+
+            self.assertIsNone(failure)
+            self.assertEqual(m_post.call_args.kwargs["data"], {"with_timestamps": "true"})
+            self.assertEqual(split_batch_transcription(transcript, [0, 1.5]), [{"transcript": "hello sarvam"}, {"transcript": "how are you"}])
 
     def test_invalid_credentials(self):
         """Sarvam 403 on request → CREDENTIALS_INVALID."""
         with (
             self._patch_creds(),
             mock.patch("bots.tasks.process_utterance_task.pcm_to_mp3", return_value=b"mp3"),
-            mock.patch("bots.tasks.process_utterance_task.requests.post") as m_post,
+            mock.patch("bots.tasks.process_utterance_task.requests.Session.post") as m_post,
         ):
             resp403 = mock.Mock(status_code=403)
             m_post.return_value = resp403
@@ -953,7 +1247,7 @@ class SarvamProviderTest(TransactionTestCase):
         with (
             self._patch_creds(),
             mock.patch("bots.tasks.process_utterance_task.pcm_to_mp3", return_value=b"mp3"),
-            mock.patch("bots.tasks.process_utterance_task.requests.post") as m_post,
+            mock.patch("bots.tasks.process_utterance_task.requests.Session.post") as m_post,
         ):
             resp429 = mock.Mock(status_code=429)
             m_post.return_value = resp429
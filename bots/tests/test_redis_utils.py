@@ -0,0 +1,44 @@
+import json
+from unittest.mock import MagicMock, patch
+
+from django.test import TestCase
+
+from bots import redis_utils
+from bots.bots_api_utils import send_sync_commands
+
+
+class RedisUtilsTest(TestCase):
+    def setUp(self):
+        redis_utils._connection_pool = None
+        redis_utils._connection_pool_pid = None
+
+    def tearDown(self):
+        redis_utils._connection_pool = None
+        redis_utils._connection_pool_pid = None
+
+    def test_connection_pool_is_shared_within_a_process(self):
+        first_client = redis_utils.get_redis_client()
+        second_client = redis_utils.get_redis_client()
+
+        self.assertIs(first_client.connection_pool, second_client.connection_pool)
+
+    def test_connection_pool_is_recreated_after_fork(self):
+        pool_before_fork = redis_utils.get_redis_connection_pool()
+
+        with patch("bots.redis_utils.os.getpid", return_value=redis_utils._connection_pool_pid + 1):
+            pool_after_fork = redis_utils.get_redis_connection_pool()
+
+        self.assertIsNot(pool_before_fork, pool_after_fork)
+
+    def test_send_sync_commands_pipelines_publishes(self):
+        mock_redis_client = MagicMock()
+        mock_pipeline = mock_redis_client.pipeline.return_value
+        bots = [MagicMock(id=1), MagicMock(id=2)]
+
+        with patch("bots.bots_api_utils.get_redis_client", return_value=mock_redis_client):
+            send_sync_commands(bots, "sync_media_requests")
+
+        mock_redis_client.pipeline.assert_called_once_with(transaction=False)
+        message = json.dumps({"command": "sync_media_requests"})
+        self.assertEqual([call.args for call in mock_pipeline.publish.call_args_list], [("bot_1", message), ("bot_2", message)])
+        mock_pipeline.execute.assert_called_once()
@@ -0,0 +1,164 @@
+import threading
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from bots.bot_controller.streaming_transcriber_pool import PooledStreamingConnection, StreamingTranscriberPool
+
+
+class FakeStreamingTranscriber:
+    """
+    Stands in for a Deepgram websocket. start blocks until the test lets the connection open.
+    """
+
+    def __init__(self, speaker_id, on_result, fail_to_connect=False):
+        self.speaker_id = speaker_id
+        self.on_result = on_result
+        self.fail_to_connect = fail_to_connect
+        self.connected = threading.Event()
+        self.allow_connect = threading.Event()
+        self.sent_chunks = []
+        self.finished = False
+
+    def start(self):
+        self.allow_connect.wait(timeout=5)
+        if self.fail_to_connect:
+            raise Exception("Connection refused")
+        self.connected.set()
+
+    def send(self, data):
+        self.sent_chunks.append(data)
+
+    def finish(self):
+        self.finished = True
+
+
+class StreamingTranscriberPoolTest(SimpleTestCase):
+    def setUp(self):
+        self.transcribers = []
+        self.results = []
+        self.fail_to_connect = False
+
+    def create_transcriber(self, speaker_id, on_result):
+        transcriber = FakeStreamingTranscriber(speaker_id, on_result, fail_to_connect=self.fail_to_connect)
+        self.transcribers.append(transcriber)
+        return transcriber
+
+    def create_pool(self, **kwargs):
+        return StreamingTranscriberPool(
+            create_transcriber=self.create_transcriber,
+            on_result=lambda speaker_id, result: self.results.append((speaker_id, result)),
+            **{"bytes_per_second": 1000, "max_connections": 2, "idle_timeout_seconds": 60, "replay_buffer_max_bytes": 1000, **kwargs},
+        )
+
+    def open_connections(self, pool):
+        for transcriber in self.transcribers:
+            transcriber.allow_connect.set()
+        for connection in pool.connections.values():
+            while connection.state == PooledStreamingConnection.CONNECTING:
+                threading.Event().wait(0.01)
+
+    def test_audio_sent_while_connecting_is_replayed_in_order(self):
+        pool = self.create_pool()
+
+        pool.send("speaker_1", b"aa", 0)
+        pool.send("speaker_1", b"bb", 0)
+        self.assertEqual(self.transcribers[0].sent_chunks, [])
+
+        self.open_connections(pool)
+        pool.send("speaker_1", b"cc", 0)
+
+        self.assertEqual(len(self.transcribers), 1)
+        self.assertEqual(self.transcribers[0].sent_chunks, [b"aa", b"bb", b"cc"])
+
+    def test_replay_buffer_drops_the_oldest_audio_when_full(self):
+        pool = self.create_pool(replay_buffer_max_bytes=4)
+
+        for chunk in [b"aa", b"bb", b"cc"]:
+            pool.send("speaker_1", chunk, 0)
+        self.open_connections(pool)
+
+        self.assertEqual(self.transcribers[0].sent_chunks, [b"bb", b"cc"])
+        self.assertEqual(pool.connections["speaker_1"].dropped_replay_bytes, 2)
+
+    def test_least_recently_used_connection_is_evicted(self):
+        pool = self.create_pool()
+
+        pool.send("speaker_1", b"aa", 0)
+        pool.send("speaker_2", b"aa", 0)
+        pool.send("speaker_1", b"bb", 0)
+        pool.send("speaker_3", b"aa", 0)
+
+        self.assertEqual(list(pool.connections), ["speaker_1", "speaker_3"])
+        self.assertEqual(pool.connections["speaker_1"].transcriber, self.transcribers[0])
+        self.open_connections(pool)
+        # speaker_2's connection was closed while it was still connecting, so it is finished once it opens
+        self.assertTrue(self.transcribers[1].finished)
+
+    def test_warmed_up_connections_are_evicted_before_ones_in_use(self):
+        pool = self.create_pool()
+
+        pool.send("speaker_1", b"aa", 0)
+        pool.prewarm("speaker_2")
+        # The pool is full, so speaker_3 isn't warmed up
+        pool.prewarm("speaker_3")
+        self.assertEqual(list(pool.connections), ["speaker_1", "speaker_2"])
+
+        pool.send("speaker_3", b"aa", 0)
+
+        self.assertEqual(list(pool.connections), ["speaker_1", "speaker_3"])
+
+    def test_speakers_are_only_warmed_up_once(self):
+        pool = self.create_pool()
+
+        pool.prewarm("speaker_1")
+        pool.close()
+        pool.prewarm("speaker_1")
+
+        self.assertEqual(len(self.transcribers), 1)
+
+    def test_idle_connections_are_closed(self):
+        pool = self.create_pool(idle_timeout_seconds=60)
+        with patch("bots.bot_controller.streaming_transcriber_pool.time.monotonic", return_value=1000):
+            pool.send("speaker_1", b"aa", 0)
+            self.open_connections(pool)
+
+        with patch("bots.bot_controller.streaming_transcriber_pool.time.monotonic", return_value=1030):
+            pool.monitor()
+        self.assertIn("speaker_1", pool.connections)
+
+        with patch("bots.bot_controller.streaming_transcriber_pool.time.monotonic", return_value=1061):
+            pool.monitor()
+        self.assertNotIn("speaker_1", pool.connections)
+        self.assertTrue(self.transcribers[0].finished)
+
+    def test_failed_connection_is_retried_after_a_delay(self):
+        self.fail_to_connect = True
+        pool = self.create_pool()
+        with patch("bots.bot_controller.streaming_transcriber_pool.time.monotonic", return_value=1000):
+            pool.send("speaker_1", b"aa", 0)
+            self.open_connections(pool)
+            pool.send("speaker_1", b"bb", 0)
+        self.assertEqual(len(self.transcribers), 1)
+
+        self.fail_to_connect = False
+        with patch("bots.bot_controller.streaming_transcriber_pool.time.monotonic", return_value=1002):
+            pool.send("speaker_1", b"cc", 0)
+        self.open_connections(pool)
+
+        self.assertEqual(len(self.transcribers), 2)
+        self.assertEqual(self.transcribers[1].sent_chunks, [b"cc"])
+
+    def test_result_times_are_mapped_back_to_when_the_audio_was_captured(self):
+        pool = self.create_pool()
+        pool.send("speaker_1", b"a" * 500, 10000)
+        self.open_connections(pool)
+        pool.send("speaker_1", b"a" * 500, 10500)
+        # Audio stopped being sent for a while, so the next chunk starts a new anchor
+        pool.send("speaker_1", b"a" * 1000, 30000)
+
+        transcriber = self.transcribers[0]
+        transcriber.on_result({"start": 0.25, "is_final": True})
+        transcriber.on_result({"start": 1.5, "is_final": True})
+
+        self.assertEqual([result["timestamp_ms"] for _, result in self.results], [10250, 30500])
@@ -0,0 +1,82 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from bots.transcription_http_utils import clear_transcription_clients, get_transcription_session, transcription_request_limit
+
+
+class MockProviderHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.connection_count += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = b'{"transcript": "hello"}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TranscriptionSessionTest(SimpleTestCase):
+    def setUp(self):
+        clear_transcription_clients()
+        self.addCleanup(clear_transcription_clients)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), MockProviderHandler)
+        self.server.connection_count = 0
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/transcribe"
+
+    def test_requests_reuse_the_providers_connection(self):
+        for _ in range(3):
+            response = get_transcription_session(1).post(self.url, data=b"audio")
+            self.assertEqual(response.json(), {"transcript": "hello"})
+
+        self.assertEqual(self.server.connection_count, 1)
+
+    def test_each_provider_has_its_own_session(self):
+        self.assertIs(get_transcription_session(1), get_transcription_session(1))
+        self.assertIsNot(get_transcription_session(1), get_transcription_session(3))
+
+    def test_sessions_are_recreated_after_a_fork(self):
+        session = get_transcription_session(1)
+
+        with mock.patch("bots.transcription_http_utils.os.getpid", return_value=-1):
+            self.assertIsNot(get_transcription_session(1), session)
+
+
+class TranscriptionRequestLimitTest(SimpleTestCase):
+    def setUp(self):
+        clear_transcription_clients()
+        self.addCleanup(clear_transcription_clients)
+
+    @mock.patch.dict("os.environ", {"TRANSCRIPTION_MAX_CONCURRENT_REQUESTS_PER_KEY": "1"})
+    def test_requests_with_the_same_key_wait_for_each_other(self):
+        entered = threading.Event()
+        with transcription_request_limit(1, "key_1"):
+            thread = threading.Thread(target=lambda: self.enter_limit(1, "key_1", entered))
+            thread.start()
+            self.assertFalse(entered.wait(timeout=0.2))
+
+            # A different key, or the same key with another provider, isn't held up
+            with transcription_request_limit(1, "key_2"), transcription_request_limit(3, "key_1"):
+                pass
+
+        thread.join(timeout=5)
+        self.assertTrue(entered.is_set())
+
+    def enter_limit(self, provider, api_key, entered):
+        with transcription_request_limit(provider, api_key):
+            entered.set()
@@ -0,0 +1,157 @@
+from unittest import mock
+
+import redis
+from django.test import SimpleTestCase
+
+from bots.transcription_rate_limiter import TranscriptionRateLimiter
+
+
+class FakeRedisPipeline:
+    def __init__(self, fake_redis):
+        self.fake_redis = fake_redis
+        self.commands = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def watch(self, key):
+        if self.fake_redis.watch_errors:
+            self.fake_redis.watch_errors -= 1
+            self.watch_error = True
+        else:
+            self.watch_error = False
+
+    def hmget(self, key, fields):
+        values = self.fake_redis.hashes.get(key, {})
+        return [values.get(field) for field in fields]
+
+    def multi(self):
+        self.commands = []
+
+    def hset(self, key, mapping):
+        self.commands.append(lambda: self.fake_redis.hashes.setdefault(key, {}).update({field: str(value).encode() for field, value in mapping.items()}))
+
+    def expire(self, key, seconds):
+        pass
+
+    def execute(self):
+        # Another client changed the key after it was watched
+        if self.watch_error:
+            raise redis.exceptions.WatchError()
+        for command in self.commands:
+            command()
+
+
+class FakeRedis:
+    def __init__(self):
+        self.hashes = {}
+        self.watch_errors = 0
+
+    def pipeline(self):
+        return FakeRedisPipeline(self)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class MockProvider:
+    """
+    Allows requests_per_second requests in each second and returns 429 for the rest.
+    """
+
+    def __init__(self, clock, requests_per_second):
+        self.clock = clock
+        self.requests_per_second = requests_per_second
+        self.requests_by_second = {}
+
+    def request(self):
+        second = int(self.clock.now)
+        self.requests_by_second[second] = self.requests_by_second.get(second, 0) + 1
+        return 429 if self.requests_by_second[second] > self.requests_per_second else 200
+
+
+class TranscriptionRateLimiterTest(SimpleTestCase):
+    def setUp(self):
+        self.fake_redis = FakeRedis()
+        self.clock = FakeClock()
+        patcher = mock.patch("bots.transcription_rate_limiter.time", mock.Mock(time=self.clock.time, monotonic=self.clock.time, sleep=self.clock.sleep))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def create_rate_limiter(self, **kwargs):
+        return TranscriptionRateLimiter(get_redis_client=lambda: self.fake_redis, **kwargs)
+
+    def rate(self, rate_limiter):
+        return float(self.fake_redis.hashes[rate_limiter.bucket_key(1, "key")]["rate"])
+
+    def test_requests_wait_for_a_token_instead_of_failing(self):
+        rate_limiter = self.create_rate_limiter(max_rate=2)
+
+        waits = [rate_limiter.acquire(1, "key") for _ in range(4)]
+
+        # The first two use up the burst, then there is a token every half second
+        self.assertEqual(waits, [0, 0, 0.5, 0.5])
+
+    def test_too_many_requests_halves_the_rate_once_per_interval(self):
+        rate_limiter = self.create_rate_limiter(max_rate=20, decrease_interval_seconds=1)
+        rate_limiter.acquire(1, "key")
+
+        rate_limiter.record_response(1, "key", 429, 0.1)
+        rate_limiter.record_response(1, "key", 429, 0.1)
+        self.assertEqual(self.rate(rate_limiter), 10)
+
+        self.clock.sleep(1)
+        rate_limiter.record_response(1, "key", 429, 0.1)
+        self.assertEqual(self.rate(rate_limiter), 5)
+
+    def test_slow_responses_reduce_the_rate_and_fast_ones_increase_it(self):
+        rate_limiter = self.create_rate_limiter(max_rate=20, target_latency_seconds=10)
+        rate_limiter.acquire(1, "key")
+
+        rate_limiter.record_response(1, "key", 200, 15)
+        self.assertEqual(self.rate(rate_limiter), 18)
+
+        rate_limiter.record_response(1, "key", 200, 1)
+        self.assertAlmostEqual(self.rate(rate_limiter), 18 + 1 / 18)
+
+    def test_rate_adapts_to_the_providers_limit(self):
+        rate_limiter = self.create_rate_limiter(max_rate=20)
+        provider = MockProvider(self.clock, requests_per_second=5)
+
+        statuses = []
+        while self.clock.now < 1060:
+            rate_limiter.acquire(1, "key")
+            status_code = provider.request()
+            rate_limiter.record_response(1, "key", status_code, 0.1)
+            statuses.append((self.clock.now, status_code))
+
+        last_thirty_seconds = [status_code for now, status_code in statuses if now >= 1030]
+        # Requests are paced close to what the provider allows, with few of them rejected
+        self.assertLess(last_thirty_seconds.count(429) / len(last_thirty_seconds), 0.2)
+        self.assertGreater(last_thirty_seconds.count(200), 30 * 5 * 0.6)
+
+    def test_concurrent_update_is_retried(self):
+        rate_limiter = self.create_rate_limiter(max_rate=2)
+        self.fake_redis.watch_errors = 2
+
+        self.assertEqual(rate_limiter.acquire(1, "key"), 0)
+        self.assertEqual(self.fake_redis.watch_errors, 0)
+
+    def test_redis_errors_fail_open(self):
+        failing_redis = mock.MagicMock()
+        failing_redis.pipeline.side_effect = redis.exceptions.ConnectionError("Connection refused")
+        rate_limiter = TranscriptionRateLimiter(get_redis_client=lambda: failing_redis)
+
+        self.assertEqual(rate_limiter.acquire(1, "key"), 0)
+        rate_limiter.record_response(1, "key", 429, 0.1)
@@ -0,0 +1,64 @@
+import numpy as np
+from django.test import SimpleTestCase
+
+from bots.bot_controller.utterance_audio_conditioner import UtteranceAudioConditioner, resample
+
+
+def sine_wave(frequency, sample_rate, duration_seconds, amplitude=10000):
+    t = np.arange(int(sample_rate * duration_seconds)) / sample_rate
+    return (amplitude * np.sin(2 * np.pi * frequency * t)).astype(np.int16)
+
+
+def dominant_frequency(samples, sample_rate):
+    spectrum = np.abs(np.fft.rfft(samples.astype(np.float64)))
+    return np.fft.rfftfreq(len(samples), 1 / sample_rate)[np.argmax(spectrum)]
+
+
+class ResampleTest(SimpleTestCase):
+    def test_downsampling_keeps_the_tone_and_duration(self):
+        for input_sample_rate in [32000, 48000, 44100]:
+            samples = sine_wave(440, input_sample_rate, 1).astype(np.float32)
+
+            resampled = resample(samples, input_sample_rate, 16000)
+
+            self.assertEqual(len(resampled), 16000)
+            self.assertAlmostEqual(dominant_frequency(resampled, 16000), 440, delta=2)
+
+    def test_downsampling_filters_out_frequencies_above_the_new_nyquist(self):
+        # A 12kHz tone can't be represented at 16kHz. Without filtering, it would alias down to 4kHz.
+        samples = sine_wave(12000, 48000, 1).astype(np.float32)
+
+        resampled = resample(samples, 48000, 16000)
+
+        self.assertLess(np.max(np.abs(resampled[100:-100])), 500)
+
+
+class UtteranceAudioConditionerTest(SimpleTestCase):
+    def test_trailing_silence_is_trimmed_and_audio_is_resampled(self):
+        speech = sine_wave(440, 32000, 1)
+        audio = np.concatenate([speech, np.zeros(32000 * 3, dtype=np.int16)]).tobytes()
+        conditioner = UtteranceAudioConditioner(output_sample_rate=16000, trailing_silence_to_keep_seconds=0.25)
+
+        samples, sample_rate = conditioner.condition(memoryview(audio), 32000, speech_end_offset=len(speech) * 2)
+
+        self.assertEqual(sample_rate, 16000)
+        self.assertEqual(samples.dtype, np.int16)
+        self.assertEqual(len(samples), 20000)
+
+    def test_audio_is_unchanged_when_there_is_nothing_to_do(self):
+        audio = sine_wave(440, 32000, 0.1).tobytes()
+        conditioner = UtteranceAudioConditioner()
+
+        samples, sample_rate = conditioner.condition(memoryview(audio), 32000, speech_end_offset=len(audio))
+
+        self.assertEqual(sample_rate, 32000)
+        self.assertEqual(samples.tobytes(), audio)
+
+    def test_normalization_raises_the_peak_with_a_capped_gain(self):
+        conditioner = UtteranceAudioConditioner(normalize=True)
+
+        samples, _ = conditioner.condition(sine_wave(440, 16000, 0.1, amplitude=5000).tobytes(), 16000, None)
+        self.assertAlmostEqual(np.max(np.abs(samples)), 0.9 * 32767, delta=2)
+
+        quiet_samples, _ = conditioner.condition(sine_wave(440, 16000, 0.1, amplitude=100).tobytes(), 16000, None)
+        self.assertAlmostEqual(np.max(np.abs(quiet_samples)), 1000, delta=20)
@@ -0,0 +1,90 @@
+import uuid
+from unittest import mock
+
+import numpy as np
+from django.test import TransactionTestCase
+
+from bots.models import Bot, Organization, Participant, Project, Recording, RecordingStates, RecordingTranscriptionStates, Utterance, utterance_audio_storage
+from bots.tasks.process_utterance_task import process_utterance
+from bots.utterance_audio_utils import delete_utterance_audio, get_utterance_pcm_audio, store_utterance_audio
+
+
+class UtteranceAudioUtilsTest(TransactionTestCase):
+    def setUp(self):
+        self.organization = Organization.objects.create(name="Test Org")
+        self.project = Project.objects.create(name="Proj", organization=self.organization)
+        self.bot = Bot.objects.create(project=self.project, meeting_url="https://zoom.us/j/xyz")
+        self.recording = Recording.objects.create(
+            bot=self.bot,
+            recording_type=1,
+            transcription_type=1,
+            state=RecordingStates.COMPLETE,
+            transcription_state=RecordingTranscriptionStates.IN_PROGRESS,
+            transcription_provider=1,
+        )
+        self.participant = Participant.objects.create(bot=self.bot, uuid=str(uuid.uuid4()))
+
+        # A second of a 440Hz tone at 32kHz
+        samples = (np.sin(2 * np.pi * 440 * np.arange(32000) / 32000) * 10000).astype(np.int16)
+        self.pcm_data = samples.tobytes()
+
+    def create_utterance_with_stored_audio(self):
+        audio_file = store_utterance_audio(self.pcm_data, sample_rate=32000, bot_object_id=self.bot.object_id)
+        utterance = Utterance.objects.create(
+            recording=self.recording,
+            participant=self.participant,
+            audio_blob=b"",
+            audio_file=audio_file,
+            audio_format=Utterance.AudioFormat.FLAC,
+            timestamp_ms=0,
+            duration_ms=1000,
+            sample_rate=32000,
+        )
+        utterance.refresh_from_db()
+        return utterance
+
+    def test_stored_audio_is_compressed_and_reads_back_exactly(self):
+        utterance = self.create_utterance_with_stored_audio()
+
+        self.assertTrue(utterance.audio_file.name.startswith(f"{self.bot.object_id}/"))
+        self.assertTrue(utterance.audio_file.name.endswith(".flac"))
+        self.assertLess(utterance.audio_file.size, len(self.pcm_data))
+        self.assertEqual(get_utterance_pcm_audio(utterance), self.pcm_data)
+
+    def test_inline_audio_is_read_from_the_blob(self):
+        utterance = Utterance.objects.create(recording=self.recording, participant=self.participant, audio_blob=b"rawpcmbytes", timestamp_ms=0, duration_ms=500, sample_rate=16000)
+        utterance.refresh_from_db()
+
+        self.assertEqual(get_utterance_pcm_audio(utterance), b"rawpcmbytes")
+
+    def test_delete_removes_the_stored_file(self):
+        utterance = self.create_utterance_with_stored_audio()
+        audio_file_name = utterance.audio_file.name
+
+        delete_utterance_audio(utterance)
+        utterance.save()
+        utterance.refresh_from_db()
+
+        self.assertFalse(utterance_audio_storage().exists(audio_file_name))
+        self.assertFalse(utterance.audio_file)
+        self.assertEqual(utterance.audio_blob, b"")
+
+    @mock.patch("bots.tasks.process_utterance_task.get_transcription")
+    def test_process_utterance_reads_and_then_deletes_stored_audio(self, mock_get_transcription):
+        utterance = self.create_utterance_with_stored_audio()
+        audio_file_name = utterance.audio_file.name
+        transcribed_audio = []
+
+        def get_transcription(utterance, recording):
+            transcribed_audio.append(get_utterance_pcm_audio(utterance))
+            return {"transcript": "hello"}, None
+
+        mock_get_transcription.side_effect = get_transcription
+
+        process_utterance.apply(args=[utterance.id])
+        utterance.refresh_from_db()
+
+        self.assertEqual(transcribed_audio, [self.pcm_data])
+        self.assertEqual(utterance.transcription, {"transcript": "hello"})
+        self.assertFalse(utterance.audio_file)
+        self.assertFalse(utterance_audio_storage().exists(audio_file_name))
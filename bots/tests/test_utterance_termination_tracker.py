@@ -0,0 +1,55 @@
+import json
+import threading
+import time
+
+from django.test import SimpleTestCase
+
+from bots.bot_controller.utterance_termination_tracker import UtteranceTerminationTracker
+
+
+def utterance_terminated_message(utterance_id):
+    return {"type": "message", "data": json.dumps({"command": "utterance_terminated", "utterance_id": utterance_id}).encode("utf-8")}
+
+
+class UtteranceTerminationTrackerTest(SimpleTestCase):
+    def setUp(self):
+        self.tracker = UtteranceTerminationTracker(database_recheck_interval_seconds=60)
+
+    def test_handles_only_utterance_termination_messages(self):
+        self.assertTrue(self.tracker.handle_redis_message(utterance_terminated_message(1)))
+        self.assertFalse(self.tracker.handle_redis_message({"type": "message", "data": json.dumps({"command": "sync"}).encode("utf-8")}))
+        self.assertFalse(self.tracker.handle_redis_message({"type": "subscribe", "data": 1}))
+        self.assertFalse(self.tracker.handle_redis_message(None))
+        self.assertEqual(self.tracker.terminated_utterance_ids, {1})
+
+    def test_returns_as_soon_as_the_last_utterance_terminates(self):
+        database_queries = []
+
+        def get_outstanding_utterance_ids():
+            database_queries.append(time.monotonic())
+            return [1, 2]
+
+        def terminate_utterances():
+            time.sleep(0.1)
+            self.tracker.handle_redis_message(utterance_terminated_message(1))
+            time.sleep(0.1)
+            self.tracker.handle_redis_message(utterance_terminated_message(2))
+
+        threading.Thread(target=terminate_utterances, daemon=True).start()
+
+        start_time = time.monotonic()
+        self.assertTrue(self.tracker.wait_until_terminated(get_outstanding_utterance_ids, timeout_seconds=10))
+        self.assertLess(time.monotonic() - start_time, 5)
+        # Only the initial query, the notifications did the rest
+        self.assertEqual(len(database_queries), 1)
+
+    def test_rechecks_database_for_missed_notifications(self):
+        self.tracker = UtteranceTerminationTracker(database_recheck_interval_seconds=0.1)
+        outstanding_utterance_ids = [[1], []]
+
+        self.assertTrue(self.tracker.wait_until_terminated(lambda: outstanding_utterance_ids.pop(0), timeout_seconds=10))
+
+    def test_times_out(self):
+        self.tracker = UtteranceTerminationTracker(database_recheck_interval_seconds=0.1)
+
+        self.assertFalse(self.tracker.wait_until_terminated(lambda: [1], timeout_seconds=0.3))
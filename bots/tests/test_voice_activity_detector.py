@@ -0,0 +1,64 @@
+from unittest.mock import MagicMock
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from bots.bot_controller.voice_activity_detector import VoiceActivityDetector
+
+SAMPLE_RATE = 16000
+# 10 ms of audio at 16kHz
+SAMPLES_PER_10_MS = 160
+
+
+def create_chunk(duration_ms, amplitude):
+    return np.full(duration_ms * SAMPLES_PER_10_MS // 10, amplitude, dtype=np.int16).tobytes()
+
+
+class VoiceActivityDetectorTest(SimpleTestCase):
+    def setUp(self):
+        self.detector = VoiceActivityDetector(sample_rate=SAMPLE_RATE, rms_threshold=0.01)
+        # Treat every frame that gets past the energy gate as speech
+        self.detector.vad = MagicMock()
+        self.detector.vad.is_speech.return_value = True
+
+    def test_quiet_frames_are_not_passed_to_webrtcvad(self):
+        flags = self.detector.detect_speech([create_chunk(30, 0), create_chunk(30, 0)])
+
+        self.assertEqual(flags, [False, False])
+        self.detector.vad.is_speech.assert_not_called()
+
+    def test_chunks_are_reframed_into_valid_vad_frames(self):
+        # Three 15 ms chunks make one 30 ms frame and a trailing frame made of the last 30 ms. The trailing frame
+        # only decides for the chunk that didn't fit in a full frame.
+        chunks = [create_chunk(15, 0), create_chunk(15, 0), create_chunk(15, 10000)]
+
+        flags = self.detector.detect_speech(chunks)
+
+        self.assertEqual(flags, [False, False, True])
+        frame_lengths = {len(call.args[0]) for call in self.detector.vad.is_speech.call_args_list}
+        self.assertEqual(frame_lengths, {30 * SAMPLES_PER_10_MS // 10 * 2})
+        self.assertTrue(all(call.args[1] == SAMPLE_RATE for call in self.detector.vad.is_speech.call_args_list))
+
+    def test_loud_frames_that_webrtcvad_rejects_are_silent(self):
+        self.detector.vad.is_speech.return_value = False
+
+        self.assertEqual(self.detector.detect_speech([create_chunk(30, 10000)]), [False])
+        self.assertEqual(self.detector.vad.is_speech.call_count, 1)
+
+    def test_short_audio_uses_a_shorter_frame(self):
+        self.assertTrue(self.detector.is_speech(create_chunk(20, 10000)))
+        self.assertEqual(len(self.detector.vad.is_speech.call_args.args[0]), 20 * SAMPLES_PER_10_MS // 10 * 2)
+
+    def test_audio_shorter_than_the_smallest_frame_is_padded(self):
+        self.assertTrue(self.detector.is_speech(create_chunk(5, 10000)))
+        self.assertEqual(len(self.detector.vad.is_speech.call_args.args[0]), SAMPLES_PER_10_MS * 2)
+
+    def test_each_chunk_only_counts_frames_it_overlaps(self):
+        # 60 ms of silence then 30 ms of speech, delivered as 10 ms chunks
+        chunks = [create_chunk(10, 0)] * 6 + [create_chunk(10, 10000)] * 3
+
+        self.assertEqual(self.detector.detect_speech(chunks), [False] * 6 + [True] * 3)
+        self.assertEqual(self.detector.vad.is_speech.call_count, 1)
+
+    def test_no_chunks(self):
+        self.assertEqual(self.detector.detect_speech([]), [])
@@ -0,0 +1,63 @@
+import json
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from bots.models import RecordingViews
+from bots.web_bot_adapter.web_bot_adapter import WebBotAdapter
+
+
+def json_message(data):
+    return (1).to_bytes(4, byteorder="little") + json.dumps(data).encode("utf-8")
+
+
+def per_participant_audio_int16_message(stream_id, samples):
+    return (6).to_bytes(4, byteorder="little") + stream_id.to_bytes(2, byteorder="little") + np.array(samples, dtype=np.int16).tobytes()
+
+
+class WebBotAdapterPerParticipantAudioTest(SimpleTestCase):
+    def setUp(self):
+        self.add_audio_chunk_callback = MagicMock()
+        self.adapter = WebBotAdapter(
+            display_name="Bot",
+            send_message_callback=MagicMock(),
+            meeting_url="https://meet.google.com/abc-defg-hij",
+            add_video_frame_callback=MagicMock(),
+            wants_any_video_frames_callback=MagicMock(return_value=False),
+            add_audio_chunk_callback=self.add_audio_chunk_callback,
+            add_mixed_audio_chunk_callback=MagicMock(),
+            add_encoded_mp4_chunk_callback=MagicMock(),
+            upsert_caption_callback=MagicMock(),
+            upsert_chat_message_callback=MagicMock(),
+            add_participant_event_callback=MagicMock(),
+            automatic_leave_configuration=MagicMock(),
+            recording_view=RecordingViews.SPEAKER_VIEW,
+            should_create_debug_recording=False,
+            start_recording_screen_callback=MagicMock(),
+            stop_recording_screen_callback=MagicMock(),
+            video_frame_size=(1920, 1080),
+        )
+
+    def handle_messages(self, messages):
+        with patch("bots.web_bot_adapter.web_bot_adapter.os.makedirs"):
+            self.adapter.handle_websocket(messages)
+
+    def test_int16_audio_is_passed_through_for_the_assigned_participant(self):
+        self.handle_messages(
+            [
+                json_message({"type": "PerParticipantAudioStreamAssignment", "streamId": 0, "participantId": "device_1"}),
+                json_message({"type": "PerParticipantAudioStreamAssignment", "streamId": 1, "participantId": "device_2"}),
+                per_participant_audio_int16_message(1, [1, -2, 32767, -32768]),
+            ]
+        )
+
+        self.add_audio_chunk_callback.assert_called_once()
+        participant_id, _, chunk_bytes = self.add_audio_chunk_callback.call_args.args
+        self.assertEqual(participant_id, "device_2")
+        self.assertEqual(chunk_bytes, np.array([1, -2, 32767, -32768], dtype=np.int16).tobytes())
+
+    def test_audio_for_an_unknown_stream_id_is_dropped(self):
+        self.handle_messages([per_participant_audio_int16_message(3, [1, 2])])
+
+        self.add_audio_chunk_callback.assert_not_called()
@@ -0,0 +1,107 @@
+import hashlib
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from bots.transcription_rate_limiter import transcription_rate_limiter_from_env
+
+_sessions = {}
+_deepgram_clients = {}
+_concurrency_limits = {}
+_pid = None
+_lock = threading.Lock()
+
+
+def _reset_after_fork():
+    # Called with the lock held. Sockets can't be shared between processes, so a forked worker starts over.
+    global _pid
+    pid = os.getpid()
+    if _pid != pid:
+        _sessions.clear()
+        _deepgram_clients.clear()
+        _concurrency_limits.clear()
+        _pid = pid
+
+
+def get_transcription_session(provider):
+    """
+    Returns the requests session shared by everything in this process that talks to the provider. Its connections
+    (and their TLS sessions) are kept alive and reused across utterances, instead of every request paying for a new
+    handshake.
+    """
+    with _lock:
+        _reset_after_fork()
+        session = _sessions.get(provider)
+        if session is None:
+            session = requests.Session()
+            pool_size = int(os.getenv("TRANSCRIPTION_HTTP_POOL_SIZE", "10"))
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _sessions[provider] = session
+        return session
+
+
+def get_deepgram_client(api_key):
+    """
+    Returns a Deepgram client for the API key that is reused across utterances, so its connections are too.
+    """
+    from deepgram import DeepgramClient
+
+    with _lock:
+        _reset_after_fork()
+        client = _deepgram_clients.get(api_key)
+        if client is None:
+            client = DeepgramClient(api_key)
+            _deepgram_clients[api_key] = client
+        return client
+
+
+class TranscriptionRequest:
+    def __init__(self):
+        self.status_code = None
+
+    def record_response(self, status_code):
+        self.status_code = status_code
+
+
+# Shared by every worker through redis. None if it is disabled.
+transcription_rate_limiter = transcription_rate_limiter_from_env()
+
+
+@contextmanager
+def transcription_request_limit(provider, api_key):
+    """
+    Wraps a request to a provider. Limits how many requests this process makes at once to a provider with the same
+    API key, which matters when a worker runs tasks on several threads, and waits for the rate limiter shared by all
+    workers. Record the response's status code on the yielded request, so the rate limiter can adapt to it.
+    """
+    api_key_hash = hashlib.sha256(api_key.encode()).hexdigest()
+    key = (provider, api_key_hash)
+    with _lock:
+        _reset_after_fork()
+        semaphore = _concurrency_limits.get(key)
+        if semaphore is None:
+            semaphore = threading.BoundedSemaphore(int(os.getenv("TRANSCRIPTION_MAX_CONCURRENT_REQUESTS_PER_KEY", "8")))
+            _concurrency_limits[key] = semaphore
+
+    rate_limiter = transcription_rate_limiter
+    with semaphore:
+        if rate_limiter:
+            rate_limiter.acquire(provider, api_key_hash)
+        request = TranscriptionRequest()
+        start = time.monotonic()
+        yield request
+        if rate_limiter:
+            rate_limiter.record_response(provider, api_key_hash, request.status_code, time.monotonic() - start)
+
+
+def clear_transcription_clients():
+    with _lock:
+        _sessions.clear()
+        _deepgram_clients.clear()
+        _concurrency_limits.clear()
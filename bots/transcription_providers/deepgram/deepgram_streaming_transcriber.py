@@ -1,3 +1,4 @@
+import json
 import logging
 import time
 
@@ -12,8 +13,8 @@ logger = logging.getLogger(__name__)
 
 
 class DeepgramStreamingTranscriber:
-    def __init__(self, *, deepgram_api_key, interim_results, language, model, sample_rate, metadata, callback):
-        # Configure the DeepgramClientOptions to enable KeepAlive for maintaining the WebSocket connection (only if necessary to your scenario)
+    def __init__(self, *, deepgram_api_key, interim_results, language, model, sample_rate, metadata, callback, on_result=None):
+        # KeepAlive messages hold the connection open while the speaker is silent and no audio is being sent
         config = DeepgramClientOptions(options={"keepalive": "true"})
 
         self.last_send_time = time.time()
@@ -24,11 +25,25 @@ class DeepgramStreamingTranscriber:
         # Use the listen.live class to create the websocket connection
         self.dg_connection = self.deepgram.listen.websocket.v("1")
 
+        # Called on the SDK's receive thread
         def on_message(self, result, **kwargs):
             sentence = result.channel.alternatives[0].transcript
-            if len(sentence) == 0:
+            # Empty final results still matter, since speech_final often comes on one after the words were finalized
+            if len(sentence) == 0 and not result.is_final:
                 return
-            logger.info(f"Transcription: {sentence}")
+            if sentence:
+                logger.info(f"Transcription: {sentence}")
+            if on_result:
+                # start and duration are in seconds from the beginning of the audio sent on this connection
+                on_result(
+                    {
+                        "is_final": result.is_final,
+                        "speech_final": result.speech_final,
+                        "start": result.start,
+                        "duration": result.duration,
+                        "transcription": json.loads(result.channel.alternatives[0].to_json()),
+                    }
+                )
 
         self.dg_connection.on(LiveTranscriptionEvents.Transcript, on_message)
 
@@ -37,7 +52,7 @@ class DeepgramStreamingTranscriber:
 
         self.dg_connection.on(LiveTranscriptionEvents.Error, on_error)
 
-        options = LiveOptions(
+        self.options = LiveOptions(
             model=model,
             smart_format=True,
             language=language,
@@ -48,7 +63,10 @@ class DeepgramStreamingTranscriber:
             callback=callback,
         )
 
-        self.dg_connection.start(options)
+    # Opens the websocket. Blocks until the connection is established, so callers that can't wait should call it on another thread.
+    def start(self):
+        if not self.dg_connection.start(self.options):
+            raise Exception("Failed to connect to Deepgram")
 
     def send(self, data):
         self.dg_connection.send(data)
@@ -0,0 +1,142 @@
+import logging
+import os
+import time
+
+import redis
+
+from bots.redis_utils import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_KEY_PREFIX = "transcription_rate_limit:"
+# Buckets for API keys that stop being used are dropped after this long
+RATE_LIMIT_KEY_TTL_SECONDS = 3600
+
+
+class TranscriptionRateLimiter:
+    """
+    Paces the requests that every worker makes to a provider with the same API key, so a burst of utterances waits
+    for its turn instead of failing with 429s and falling back to Celery's retry backoff.
+
+    Each provider and API key has a token bucket in redis. Its rate adapts AIMD style: it is halved when the provider
+    returns a 429, cut a little when requests get slower than target_latency_seconds, and otherwise grows by about
+    one request per second, every second. Decreases happen at most once per decrease_interval_seconds, so a burst of
+    429s from requests that were already in flight only counts once.
+
+    Redis errors fail open, so transcription keeps working without it.
+    """
+
+    def __init__(
+        self,
+        *,
+        get_redis_client=get_redis_client,
+        min_rate=0.5,
+        max_rate=20,
+        burst_seconds=1,
+        max_wait_seconds=60,
+        target_latency_seconds=30,
+        decrease_interval_seconds=1,
+    ):
+        self.get_redis_client = get_redis_client
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        # How many seconds' worth of requests can be made at once after the bucket has been idle
+        self.burst_seconds = burst_seconds
+        # Past this, the request goes ahead anyway and the provider decides
+        self.max_wait_seconds = max_wait_seconds
+        self.target_latency_seconds = target_latency_seconds
+        self.decrease_interval_seconds = decrease_interval_seconds
+
+    def bucket_key(self, provider, api_key_hash):
+        return f"{RATE_LIMIT_KEY_PREFIX}{provider}:{api_key_hash}"
+
+    def update_bucket(self, key, update):
+        """
+        Applies update(state, now) to the bucket's state in a redis transaction, retrying if another worker changed
+        it at the same time. update modifies the state in place and returns the value to return.
+        """
+        with self.get_redis_client().pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(key)
+                    tokens, rate, updated_at, decreased_at = pipe.hmget(key, ["tokens", "rate", "updated_at", "decreased_at"])
+                    now = time.time()
+                    if rate is None:
+                        state = {"tokens": self.max_rate * self.burst_seconds, "rate": self.max_rate, "decreased_at": 0}
+                    else:
+                        rate = float(rate)
+                        # Refill the tokens for the time since the last update
+                        state = {"tokens": min(float(tokens) + (now - float(updated_at)) * rate, rate * self.burst_seconds), "rate": rate, "decreased_at": float(decreased_at)}
+
+                    result = update(state, now)
+
+                    pipe.multi()
+                    pipe.hset(key, mapping={**state, "updated_at": now})
+                    pipe.expire(key, RATE_LIMIT_KEY_TTL_SECONDS)
+                    pipe.execute()
+                    return result
+                except redis.exceptions.WatchError:
+                    continue
+
+    def try_take_token(self, key):
+        """
+        Takes a token if there is one. Returns 0 if it did, otherwise how many seconds until there will be one.
+        """
+
+        def take(state, now):
+            # Allows for rounding in the refill, which would otherwise leave waits too short to make progress
+            if state["tokens"] >= 1 - 1e-9:
+                state["tokens"] -= 1
+                return 0
+            return (1 - state["tokens"]) / state["rate"]
+
+        return self.update_bucket(key, take)
+
+    def acquire(self, provider, api_key_hash):
+        """
+        Waits until a request can be made to the provider with the API key. Returns the seconds spent waiting.
+        """
+        key = self.bucket_key(provider, api_key_hash)
+        start = time.monotonic()
+        try:
+            while True:
+                wait_seconds = self.try_take_token(key)
+                waited_seconds = time.monotonic() - start
+                if wait_seconds == 0:
+                    return waited_seconds
+                if waited_seconds + wait_seconds > self.max_wait_seconds:
+                    logger.warning(f"Waited {waited_seconds:.1f} seconds to make a request to transcription provider {provider}, making it anyway")
+                    return waited_seconds
+                time.sleep(wait_seconds)
+        except redis.exceptions.RedisError as e:
+            logger.warning(f"Failed to rate limit request to transcription provider {provider}: {e}")
+            return time.monotonic() - start
+
+    def record_response(self, provider, api_key_hash, status_code, latency_seconds):
+        def adjust_rate(state, now):
+            if status_code == 429 or latency_seconds > self.target_latency_seconds:
+                if now - state["decreased_at"] < self.decrease_interval_seconds:
+                    return
+                factor = 0.5 if status_code == 429 else 0.9
+                state["rate"] = max(state["rate"] * factor, self.min_rate)
+                state["tokens"] = min(state["tokens"], state["rate"] * self.burst_seconds)
+                state["decreased_at"] = now
+            elif status_code is not None and status_code < 500:
+                # Adds up to about one request per second for every second of successful requests
+                state["rate"] = min(state["rate"] + 1 / state["rate"], self.max_rate)
+
+        try:
+            self.update_bucket(self.bucket_key(provider, api_key_hash), adjust_rate)
+        except redis.exceptions.RedisError as e:
+            logger.warning(f"Failed to record response from transcription provider {provider}: {e}")
+
+
+def transcription_rate_limiter_from_env():
+    if os.getenv("TRANSCRIPTION_RATE_LIMIT_ENABLED", "false") != "true":
+        return None
+    return TranscriptionRateLimiter(
+        min_rate=float(os.getenv("TRANSCRIPTION_RATE_LIMIT_MIN_REQUESTS_PER_SECOND", "0.5")),
+        max_rate=float(os.getenv("TRANSCRIPTION_RATE_LIMIT_MAX_REQUESTS_PER_SECOND", "20")),
+        max_wait_seconds=float(os.getenv("TRANSCRIPTION_RATE_LIMIT_MAX_WAIT_SECONDS", "60")),
+        target_latency_seconds=float(os.getenv("TRANSCRIPTION_RATE_LIMIT_TARGET_LATENCY_SECONDS", "30")),
+    )
@@ -1,10 +1,8 @@
-import io
-
 import cv2
 import numpy as np
-from pydub import AudioSegment
 from tldextract import tldextract
 
+from .audio_codec import audio_duration_ms, decode_to_pcm, encode_pcm
 from .models import (
     MeetingTypes,
     TranscriptionProviders,
@@ -33,29 +31,8 @@ def pcm_to_mp3(
     Returns:
         bytes: MP3 encoded audio data
     """
-    # Create AudioSegment from raw PCM data
-    audio_segment = AudioSegment(
-        data=pcm_data,
-        sample_width=sample_width,
-        frame_rate=sample_rate,
-        channels=channels,
-    )
-
-    # Resample to different sample rate if specified
-    if output_sample_rate is not None and output_sample_rate != sample_rate:
-        audio_segment = audio_segment.set_frame_rate(output_sample_rate)
-
-    # Create a bytes buffer to store the MP3 data
-    buffer = io.BytesIO()
-
-    # Export the audio segment as MP3 to the buffer with specified bitrate
-    audio_segment.export(buffer, format="mp3", parameters=["-b:a", bitrate])
-
-    # Get the MP3 data as bytes
-    mp3_data = buffer.getvalue()
-    buffer.close()
-
-    return mp3_data
+    # Encoded in process and resampled by the encoder, without spawning ffmpeg
+    return encode_pcm(pcm_data, format="mp3", sample_rate=sample_rate, channels=channels, sample_width=sample_width, output_sample_rate=output_sample_rate, bitrate=bitrate)
 
 
 def mp3_to_pcm(mp3_data: bytes, sample_rate: int = 32000, channels: int = 1, sample_width: int = 2) -> bytes:
@@ -71,22 +48,37 @@ def mp3_to_pcm(mp3_data: bytes, sample_rate: int = 32000, channels: int = 1, sam
     Returns:
         bytes: Raw PCM audio data
     """
-    # Create a bytes buffer from the MP3 data
-    buffer = io.BytesIO(mp3_data)
+    # Decoded in process and converted to the desired format in the same pass
+    return decode_to_pcm(mp3_data, format="mp3", sample_rate=sample_rate, channels=channels, sample_width=sample_width)
 
-    # Load the MP3 data into an AudioSegment
-    audio_segment = AudioSegment.from_mp3(buffer)
 
-    # Convert to the desired format
-    audio_segment = audio_segment.set_frame_rate(sample_rate)
-    audio_segment = audio_segment.set_channels(channels)
-    audio_segment = audio_segment.set_sample_width(sample_width)
+def pcm_to_flac(pcm_data: bytes, sample_rate: int = 32000, channels: int = 1, sample_width: int = 2) -> bytes:
+    """
+    Convert PCM audio data to FLAC format. FLAC is lossless, so the PCM can be recovered exactly.
 
-    # Get the raw PCM data
-    pcm_data = audio_segment.raw_data
-    buffer.close()
+    Args:
+        pcm_data (bytes): Raw PCM audio data
+        sample_rate (int): Sample rate in Hz (default: 32000)
+        channels (int): Number of audio channels (default: 1)
+        sample_width (int): Sample width in bytes (default: 2)
 
-    return pcm_data
+    Returns:
+        bytes: FLAC encoded audio data
+    """
+    return encode_pcm(pcm_data, format="flac", sample_rate=sample_rate, channels=channels, sample_width=sample_width)
+
+
+def flac_to_pcm(flac_file) -> bytes:
+    """
+    Convert FLAC audio to PCM format, with the sample rate, channels and sample width it was encoded with.
+
+    Args:
+        flac_file: A file-like object with FLAC audio data. It is read as a stream, so it can be a file in storage.
+
+    Returns:
+        bytes: Raw PCM audio data
+    """
+    return decode_to_pcm(flac_file, format="flac")
 
 
 def calculate_audio_duration_ms(audio_data: bytes, content_type: str) -> int:
@@ -100,18 +92,11 @@ def calculate_audio_duration_ms(audio_data: bytes, content_type: str) -> int:
     Returns:
         int: Duration in milliseconds
     """
-    buffer = io.BytesIO(audio_data)
-
     if content_type == "audio/mp3":
-        audio = AudioSegment.from_mp3(buffer)
+        return audio_duration_ms(audio_data, format="mp3")
     else:
         raise ValueError(f"Unsupported content type for duration calculation: {content_type}")
 
-    buffer.close()
-    # len(audio) returns duration in milliseconds for pydub AudioSegment objects
-    duration_ms = len(audio)
-    return duration_ms
-
 
 def half_ceil(x):
     return (x + 1) // 2
@@ -0,0 +1,44 @@
+import logging
+import uuid
+
+from django.core.files.base import ContentFile
+
+from bots.models import utterance_audio_storage
+from bots.utils import flac_to_pcm, pcm_to_flac
+
+logger = logging.getLogger(__name__)
+
+
+def store_utterance_audio(pcm_data, sample_rate, bot_object_id):
+    """
+    Compresses an utterance's PCM audio to FLAC and writes it to the utterance audio storage.
+    Returns the name to store in Utterance.audio_file.
+    """
+    flac_data = pcm_to_flac(pcm_data, sample_rate=sample_rate)
+    return utterance_audio_storage().save(f"{bot_object_id}/{uuid.uuid4()}.flac", ContentFile(flac_data))
+
+
+def get_utterance_pcm_audio(utterance):
+    """
+    Returns an utterance's audio as PCM, wherever it is stored. Audio in storage is decoded as it is read, but the
+    PCM is returned whole, since every transcription provider takes the audio as a single buffer.
+    """
+    if not utterance.audio_file:
+        return utterance.audio_blob.tobytes() if isinstance(utterance.audio_blob, memoryview) else bytes(utterance.audio_blob)
+
+    with utterance.audio_file.open("rb") as audio_file:
+        return flac_to_pcm(audio_file)
+
+
+def delete_utterance_audio(utterance):
+    """
+    Drops an utterance's audio once it is no longer needed. Doesn't save the utterance.
+    """
+    if utterance.audio_file:
+        try:
+            utterance.audio_file.delete(save=False)
+        except Exception as e:
+            # A leftover file is harmless, so this shouldn't fail the transcription
+            logger.warning(f"Failed to delete audio file for utterance {utterance.id}: {e}")
+    utterance.audio_file = None
+    utterance.audio_blob = b""
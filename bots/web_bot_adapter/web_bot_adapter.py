@@ -13,6 +13,7 @@ from pyvirtualdisplay import Display
 from selenium import webdriver
 from websockets.sync.server import serve
 
+from bots import bot_metrics
 from bots.automatic_leave_configuration import AutomaticLeaveConfiguration
 from bots.bot_adapter import BotAdapter
 from bots.models import ParticipantEventTypes, RecordingViews
@@ -82,6 +83,8 @@ class WebBotAdapter(BotAdapter):
         self.media_sending_enable_timestamp_ms = None
 
         self.participants_info = {}
+        # Per participant audio stream ids assigned by the payload, mapped to participant ids
+        self.per_participant_audio_stream_participant_ids = {}
         self.only_one_participant_in_meeting_at = None
         self.video_frame_ticker = 0
 
@@ -165,7 +168,9 @@ class WebBotAdapter(BotAdapter):
 
             # Check if len(video_data) does not agree with width and height
             if len(video_data) == expected_video_data_length:  # I420 format uses 1.5 bytes per pixel
+                scale_start_time = time.monotonic()
                 scaled_i420_frame = scale_i420(video_data, (width, height), self.video_frame_size)
+                bot_metrics.video_frame_scale_duration_seconds.observe(time.monotonic() - scale_start_time)
                 if self.wants_any_video_frames_callback() and self.send_frames:
                     self.add_video_frame_callback(scaled_i420_frame, timestamp * 1000)
 
@@ -213,6 +218,22 @@ class WebBotAdapter(BotAdapter):
 
             self.add_audio_chunk_callback(participant_id, datetime.datetime.utcnow(), audio_data.tobytes())
 
+    def process_per_participant_audio_int16_frame(self, message):
+        if self.recording_paused:
+            return
+
+        self.last_media_message_processed_time = time.time()
+        if len(message) > 6:
+            # Bytes 4-6 contain the stream id the payload assigned to the participant
+            stream_id = int.from_bytes(message[4:6], byteorder="little")
+            participant_id = self.per_participant_audio_stream_participant_ids.get(stream_id)
+            if participant_id is None:
+                logger.warning(f"Received per participant audio for unknown stream id {stream_id}")
+                return
+
+            # The payload already converted the audio to 16 bit PCM, so it is passed on as is
+            self.add_audio_chunk_callback(participant_id, datetime.datetime.utcnow(), message[6:])
+
     def update_only_one_participant_in_meeting_at(self):
         if not self.joined_at:
             return
@@ -247,6 +268,11 @@ class WebBotAdapter(BotAdapter):
 
         self.upsert_chat_message_callback(json_data)
 
+    # JSON messages are counted by their own type, so a flood of UsersUpdates is told apart from CaptionUpdates
+    def record_websocket_message_metrics(self, message_type_name, message):
+        bot_metrics.websocket_messages_total.inc(type=message_type_name)
+        bot_metrics.websocket_message_bytes_total.inc(len(message), type=message_type_name)
+
     def handle_websocket(self, websocket):
         audio_format = None
         output_dir = "frames"  # Add output directory
@@ -262,6 +288,7 @@ class WebBotAdapter(BotAdapter):
                 if message_type == 1:  # JSON
                     json_data = json.loads(message[4:].decode("utf-8"))
                     logger.info("Received JSON message: %s", json_data)
+                    self.record_websocket_message_metrics(json_data.get("type", "unknown") if isinstance(json_data, dict) else "unknown", message)
 
                     # Handle audio format information
                     if isinstance(json_data, dict):
@@ -269,6 +296,9 @@ class WebBotAdapter(BotAdapter):
                             audio_format = json_data["format"]
                             logger.info(f"audio format {audio_format}")
 
+                        elif json_data.get("type") == "PerParticipantAudioStreamAssignment":
+                            self.per_participant_audio_stream_participant_ids[json_data["streamId"]] = json_data["participantId"]
+
                         elif json_data.get("type") == "CaptionUpdate":
                             self.handle_caption_update(json_data)
 
@@ -309,13 +339,21 @@ class WebBotAdapter(BotAdapter):
                                 self.handle_meeting_ended()
 
                 elif message_type == 2:  # VIDEO
+                    self.record_websocket_message_metrics("Video", message)
                     self.process_video_frame(message)
                 elif message_type == 3:  # AUDIO
+                    self.record_websocket_message_metrics("MixedAudio", message)
                     self.process_mixed_audio_frame(message)
                 elif message_type == 4:  # ENCODED_MP4_CHUNK
+                    self.record_websocket_message_metrics("EncodedMP4Chunk", message)
                     self.process_encoded_mp4_chunk(message)
+                # Float32 per participant audio with the participant id in every message. Superseded by PER_PARTICIPANT_AUDIO_INT16.
                 elif message_type == 5:  # PER_PARTICIPANT_AUDIO
+                    self.record_websocket_message_metrics("PerParticipantAudio", message)
                     self.process_per_participant_audio_frame(message)
+                elif message_type == 6:  # PER_PARTICIPANT_AUDIO_INT16
+                    self.record_websocket_message_metrics("PerParticipantAudio", message)
+                    self.process_per_participant_audio_int16_frame(message)
 
                 self.last_websocket_message_processed_time = time.time()
         except Exception as e:
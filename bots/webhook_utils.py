@@ -3,8 +3,11 @@ import hashlib
 import hmac
 import json
 import logging
+import time
 import uuid
 
+from bots import bot_metrics
+
 logger = logging.getLogger(__name__)
 
 
@@ -14,6 +17,7 @@ def trigger_webhook(webhook_trigger_type, bot, payload):
     """
     from bots.models import WebhookDeliveryAttempt
 
+    start_time = time.monotonic()
     subscriptions = bot.project.webhook_subscriptions.filter(triggers__contains=[webhook_trigger_type], is_active=True)
 
     delivery_attempts = []
@@ -31,6 +35,51 @@ def trigger_webhook(webhook_trigger_type, bot, payload):
         from bots.tasks.deliver_webhook_task import deliver_webhook
 
         deliver_webhook.delay(delivery_attempt.id)
+        bot_metrics.webhook_enqueue_latency_seconds.observe(time.monotonic() - start_time)
+
+    return len(delivery_attempts)
+
+
+def trigger_webhooks(bot, webhooks):
+    """
+    Trigger a batch of webhooks for a bot. webhooks is a list of (webhook_trigger_type, payload) tuples.
+    The subscriptions are queried once and the delivery attempts are created in bulk.
+    """
+    from django.db import transaction
+
+    from bots.models import WebhookDeliveryAttempt
+    from bots.tasks.deliver_webhook_task import deliver_webhook
+
+    start_time = time.monotonic()
+    subscriptions = list(bot.project.webhook_subscriptions.filter(is_active=True))
+
+    delivery_attempts = []
+    for webhook_trigger_type, payload in webhooks:
+        for subscription in subscriptions:
+            if webhook_trigger_type not in subscription.triggers:
+                continue
+            delivery_attempts.append(
+                WebhookDeliveryAttempt(
+                    webhook_subscription=subscription,
+                    webhook_trigger_type=webhook_trigger_type,
+                    idempotency_key=uuid.uuid4(),
+                    bot=bot,
+                    payload=payload,
+                )
+            )
+
+    if not delivery_attempts:
+        return 0
+
+    WebhookDeliveryAttempt.objects.bulk_create(delivery_attempts)
+
+    def deliver_webhooks():
+        for delivery_attempt in delivery_attempts:
+            deliver_webhook.delay(delivery_attempt.id)
+            bot_metrics.webhook_enqueue_latency_seconds.observe(time.monotonic() - start_time)
+
+    # If we're inside a transaction, wait until it commits so the delivery task can see the attempts
+    transaction.on_commit(deliver_webhooks)
 
     return len(delivery_attempts)
 
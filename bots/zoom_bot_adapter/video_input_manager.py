@@ -6,6 +6,8 @@ import numpy as np
 import zoom_meeting_sdk as zoom
 from gi.repository import GLib
 
+from bots import bot_metrics
+
 logger = logging.getLogger(__name__)
 
 
@@ -209,7 +211,9 @@ class VideoInputStream:
             logger.debug(f"In VideoInputStream.on_raw_video_frame_received_callback for user {self.user_id} received frame")
             self.last_debug_frame_time = time.time()
 
+        scale_start_time = time.monotonic()
         scaled_i420_frame = scale_i420(data, self.video_input_manager.video_frame_size)
+        bot_metrics.video_frame_scale_duration_seconds.observe(time.monotonic() - scale_start_time)
         self.video_input_manager.new_frame_callback(scaled_i420_frame, current_time_ns)
 
 